@@ -1,6 +1,12 @@
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from app.routers.Autoforecaster_module import router as autoforecaster_router
-from fastapi.responses import HTMLResponse
+from app.routers.data_layer import data_layer
+from app.routers.execution import execution_backend
+from app.routers.metrics import METRICS_ENABLED, METRICS_MEDIA_TYPE, MetricsMiddleware, render_metrics
+from app.routers.profiling import profiling_router
+from fastapi import HTTPException, Response
+from fastapi.responses import HTMLResponse, JSONResponse
 from dotenv import load_dotenv
 import os
 
@@ -9,14 +15,26 @@ load_dotenv()
 
 API_ROUTER_PREFIX = os.getenv("API_ROUTER_PREFIX")
 
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Load the datasets in the background so the worker starts serving right away
+    data_layer.start()
+    yield
+    data_layer.stop()
+    execution_backend.shutdown()
+
 app = FastAPI(
     title="FastAPI For ROAS Dashboard",
     summary="A collection of endpoints for FastAPI For ROAS Dashboard",
     version="0.1.0",
     docs_url=f"/{API_ROUTER_PREFIX}/docs",
     openapi_url=f"/{API_ROUTER_PREFIX}/openapi.json",
+    lifespan=lifespan,
 )
 
+if METRICS_ENABLED:
+    app.add_middleware(MetricsMiddleware)
+
 @app.get("/", response_class=HTMLResponse, summary="Welcome_Page", tags=["Root_Of_FastAPI_Application"])
 def root():
     html_content = """
@@ -57,7 +75,25 @@ def root():
     """
     return HTMLResponse(content=html_content)
 
+@app.get("/health", summary="Liveness_Check", tags=["Root_Of_FastAPI_Application"])
+def health():
+    return {"status": "ok"}
+
+@app.get("/ready", summary="Readiness_Check", tags=["Root_Of_FastAPI_Application"])
+def ready():
+    # 503 until every preloaded dataset is in memory, so load balancers hold traffic back
+    status = data_layer.status()
+    return JSONResponse(content=status, status_code=200 if status["ready"] else 503)
+
+@app.get("/metrics", summary="Metrics", tags=["Root_Of_FastAPI_Application"])
+def metrics():
+    # Latency histograms per endpoint and stage, in the Prometheus text format
+    if not METRICS_ENABLED:
+        raise HTTPException(status_code=404, detail="Metrics are disabled.")
+    return Response(content=render_metrics(), media_type=METRICS_MEDIA_TYPE)
+
 app.include_router(autoforecaster_router, prefix=f"/{API_ROUTER_PREFIX}", tags=["Autoforecaster"])
+app.include_router(profiling_router, prefix=f"/{API_ROUTER_PREFIX}", tags=["Profiling"])
 
 # Run the application
 if __name__ == "__main__":
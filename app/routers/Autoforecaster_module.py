@@ -1,17 +1,29 @@
-from fastapi import HTTPException, APIRouter, BackgroundTasks
+from fastapi import HTTPException, APIRouter, BackgroundTasks, Depends, Header, Query, Response
 from fastapi.responses import StreamingResponse
+from starlette.background import BackgroundTask
+from fastapi.concurrency import run_in_threadpool
 from dotenv import load_dotenv
 import pandas as pd
 import boto3
-from botocore.exceptions import NoCredentialsError
+from botocore.exceptions import NoCredentialsError, ClientError
 from pydantic import BaseModel
 import os
 import logging
-from io import BytesIO
-from typing import List, Dict, Any , Optional
+from typing import List, Dict, Any , Optional, Union, Tuple, Literal, BinaryIO
 import numpy as np
-from app.routers.load_exp_data_utils import ImportDataS3, load_clients_df, load_roas_df, load_campaigns_df, load_adsets_df, convert_df, load_feedback_form, get_storage_config
+from app.routers.load_exp_data_utils import ImportDataS3, load_clients_df, load_roas_df, load_campaigns_df, load_adsets_df, convert_df, load_feedback_form, get_s3_storage
 from app.routers.miscellaneous_utils import round_to_two_decimal_places_with_min 
+from app.routers.descriptive_stats import get_descriptive_stats
+from app.routers.dataset_registry import dataset_registry, DatasetSnapshot
+from app.routers.filter_engine import USE_FILTER_INDEX, coerce_filter_value, scan_positions
+from app.routers.pagination import ResultSet, ResultSetCache, result_set_cache
+from app.routers.stats_cache import stats_cache
+from app.routers.downloads import etag_matches, parse_range, iter_file, iter_body
+from app.routers.serialization import FrameJSONResponse, ResponseFormat, dataframe_response
+from app.routers.frame_bodies import FrameBodyRoute, request_frame
+from app.routers.execution import execution_backend, shared_frame
+from app.routers.metrics import TimedModel, TimedRoute, observe_rows, stage
+from app.routers.profiling import ProfiledRoute
 
 #################################################
 # Utility Functions and Classes
@@ -24,36 +36,46 @@ logger = logging.getLogger(__name__)
 logging.basicConfig(level=logging.INFO)
 
 API_ROUTER_PREFIX = os.getenv("API_ROUTER_PREFIX")
-key = os.getenv("BUCKET_NAME")
-storage_config = get_storage_config()
-if not storage_config['aws_access_key_id'] or not storage_config['aws_secret_access_key']:
-    raise HTTPException(status_code=500, detail="Storage configuration is missing.")
 
-s3_storage = ImportDataS3(storage_config['aws_access_key_id'], storage_config['aws_secret_access_key'], storage_config['bucket_name'])
-df = s3_storage.load_df(key)
+# Response header carrying the version (S3 ETag) of the dataset a response was computed from
+DATASET_VERSION_HEADER = "X-Dataset-Version"
 
-buffer = BytesIO()
-df.to_parquet(buffer, index=False)
-buffer.seek(0)
+class AutoforecasterRoute(ProfiledRoute, TimedRoute, FrameBodyRoute):
+    """
+    Route of the endpoints below: their stages are timed with `stage()`,
+    they can be profiled on demand, and those depending on `request_frame`
+    also accept their rows as an Arrow or parquet body.
+    """
+
+router = APIRouter(route_class=AutoforecasterRoute)
 
-router = APIRouter()
+# Caches derived from a dataset are dropped when a new version of it is loaded
+dataset_registry.add_invalidation_listener(result_set_cache.invalidate_dataset)
+dataset_registry.add_invalidation_listener(stats_cache.invalidate_dataset)
 
 #################################################
 # Filter Dataframe Endpoint
 #################################################
 
-# Pagination model
+# Pagination model. Set `use_cursor` (or send back a `cursor`) to page through
+# a cached result set of a registered dataset instead of re-filtering it.
 class Pagination(BaseModel):
     page: int
     size: int
+    use_cursor: bool = False
+    cursor: Optional[str] = None
 
 class FilterInput(BaseModel):
     data: list
     filter_options: dict
 
-# FilterInput model with pagination
-class FilterInputWithPagination(BaseModel):
-    data: List[Dict[str, Any]]
+# FilterInput model with pagination. Either send the rows inline in `data`
+# (or as an Arrow or parquet body, with the other fields in the `params`
+# query parameter) or reference a server-side dataset (e.g. "campaigns")
+# with `dataset_id`.
+class FilterInputWithPagination(TimedModel):
+    data: Optional[List[Dict[str, Any]]] = None
+    dataset_id: Optional[str] = None
     filter_options: Dict[str, Any]
     pagination: Pagination
 
@@ -80,10 +102,27 @@ class FilteredItem(BaseModel):
     Start_Year: int
     Start_Month: str
 
+# Response of the paginated endpoints in cursor mode
+class CursorPage(BaseModel):
+    items: List[Dict[str, Any]]
+    cursor: str
+    page: int
+    size: int
+    total_rows: int
+    total_pages: int
+
+class FilteredItemCursorPage(CursorPage):
+    items: List[FilteredItem]
+
+# Cursor page with `format=columnar`: one array per column instead of one object per row
+class ColumnarCursorPage(CursorPage):
+    items: Dict[str, List[Any]]
+
 def filter_dataframe(df: pd.DataFrame, options: dict) -> pd.DataFrame:
     df = df.copy()
     for key, value in options.items():
         if key in df.columns:
+            value = coerce_filter_value(df[key], value)
             if isinstance(value, list):
                 df = df[df[key].isin(value)]
             else:
@@ -92,109 +131,259 @@ def filter_dataframe(df: pd.DataFrame, options: dict) -> pd.DataFrame:
             raise KeyError(f"Column '{key}' not found in DataFrame")  
     return df
 
+def resolve_input(
+    data: Optional[List[Dict[str, Any]]],
+    dataset_id: Optional[str],
+    frame: Optional[pd.DataFrame] = None,
+) -> Tuple[pd.DataFrame, Optional[DatasetSnapshot]]:
+    """
+    Returns the DataFrame a request works on: the registered dataset when
+    `dataset_id` is given, otherwise the rows sent as an Arrow or parquet
+    body (`frame`), otherwise the rows sent inline in `data`.
+
+    For a registered dataset, the snapshot the frame belongs to is returned
+    too. The request should use it (rather than the registry) for the rest
+    of its work, so a refresh in the meantime can't mix two versions.
+
+    The registered datasets are shared between requests, and the frames
+    read from a binary body are views on it: neither may be modified in
+    place.
+    """
+    if dataset_id is not None:
+        try:
+            snapshot = dataset_registry.snapshot(dataset_id)
+        except KeyError as e:
+            raise HTTPException(status_code=404, detail=str(e.args[0]))
+        return snapshot.frame, snapshot
+    if frame is not None:
+        observe_rows("in", len(frame))
+        return frame, None
+    if data is None:
+        raise HTTPException(status_code=422, detail="Either 'data' or 'dataset_id' must be provided.")
+    with stage("dataframe"):
+        df = pd.DataFrame(data)
+    observe_rows("in", len(df))
+    return df, None
+
+def set_dataset_version(response: Response, snapshot: Optional[DatasetSnapshot]) -> None:
+    """Reports the version of the dataset a response was computed from."""
+    if snapshot is not None and snapshot.version is not None:
+        response.headers[DATASET_VERSION_HEADER] = snapshot.version
+
+def filter_input_dataframe(df: pd.DataFrame, snapshot: Optional[DatasetSnapshot], filter_options: Dict[str, Any]) -> pd.DataFrame:
+    """
+    Applies `filter_options` to `df`. Registered datasets go through their
+    precomputed CategoricalIndex when USE_FILTER_INDEX is enabled.
+    """
+    with stage("filter"):
+        if snapshot is not None and USE_FILTER_INDEX:
+            return dataset_registry.filter_index(snapshot).filter(filter_options)
+        return filter_dataframe(df, filter_options)
+
+def to_item_columns(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Renames the spaced columns of a registered dataset (e.g. 'Facebook
+    Page Name') to the `FilteredItem` field names ('Facebook_Page_Name').
+    """
+    return df.rename(columns=lambda column: column.replace(' ', '_'))
+
+def is_cursor_pagination(input: FilterInputWithPagination) -> bool:
+    return input.pagination.use_cursor or input.pagination.cursor is not None
+
+def paginate_with_cursor(snapshot: Optional[DatasetSnapshot], input: FilterInputWithPagination) -> Tuple[pd.DataFrame, Dict[str, Any]]:
+    """
+    Returns the requested page of a registered dataset, and the cursor of
+    its result set with the page and total row and page counts. The
+    filtered row positions are cached under the cursor, so later pages
+    only slice them. The result set is always looked up under the cursor
+    of the request's `dataset_id` and `filter_options`, so a cursor sent
+    with other filters is ignored. An unknown or expired cursor, or one
+    computed on another version of the dataset, is rebuilt.
+    """
+    if snapshot is None:
+        raise HTTPException(status_code=422, detail="Cursor pagination requires a 'dataset_id'.")
+
+    cursor = ResultSetCache.cursor_for(snapshot.dataset_id, input.filter_options)
+    result_set = result_set_cache.get(cursor)
+    if result_set is None or result_set.version != snapshot.version:
+        with stage("filter"):
+            if USE_FILTER_INDEX:
+                positions = dataset_registry.filter_index(snapshot).positions(input.filter_options)
+            else:
+                positions = scan_positions(snapshot.frame, input.filter_options)
+        result_set = ResultSet(snapshot.dataset_id, positions, snapshot.version)
+        result_set_cache.put(cursor, result_set)
+
+    page = input.pagination.page
+    size = input.pagination.size
+    paginated_df = snapshot.frame.iloc[result_set.page_positions(page, size)]
+
+    return paginated_df, {
+        'cursor': cursor,
+        'page': page,
+        'size': size,
+        'total_rows': result_set.total_rows,
+        'total_pages': result_set.total_pages(size),
+    }
+
 
 # Endpoint to filter the dataframe with pagination
-@router.post("/filter_dataframe", response_model=List[FilteredItem])
-def filter_dataframe_endpoint(input: FilterInputWithPagination):
-    df = pd.DataFrame(input.data)
-    
+@router.post(
+    "/filter_dataframe",
+    response_model=Union[List[FilteredItem], FilteredItemCursorPage, Dict[str, List[Any]], ColumnarCursorPage],
+    response_class=FrameJSONResponse,
+)
+def filter_dataframe_endpoint(
+    input: FilterInputWithPagination,
+    response: Response,
+    response_format: ResponseFormat = Query("records", alias="format"),
+    accept: Optional[str] = Header(None),
+    frame: Optional[pd.DataFrame] = Depends(request_frame),
+):
+    df, snapshot = resolve_input(input.data, input.dataset_id, frame)
+    set_dataset_version(response, snapshot)
+
+    # Registered datasets are filtered on their spaced column names, and
+    # only the returned rows are renamed to the `FilteredItem` fields
+    columns = [column.replace(' ', '_') for column in df.columns] if snapshot is not None else df.columns
+
     # Check if the column exists
     for col in ["Facebook_Page_Name"]: 
-        if col not in df.columns:
+        if col not in columns:
             raise ValueError(f"Column '{col}' does not exist in the DataFrame")  
 
-    filtered_df = filter_dataframe(df, input.filter_options)
+    if is_cursor_pagination(input):
+        paginated_df, page = paginate_with_cursor(snapshot, input)
+        return dataframe_response(to_item_columns(paginated_df), response, response_format, accept, page)
+
+    filtered_df = filter_input_dataframe(df, snapshot, input.filter_options)
 
     page = input.pagination.page
     size = input.pagination.size
     start = (page - 1) * size
     end = start + size
     paginated_df = filtered_df.iloc[start:end]
+    if snapshot is not None:
+        paginated_df = to_item_columns(paginated_df)
     
-    return paginated_df.to_dict(orient='records')
+    return dataframe_response(paginated_df, response, response_format, accept)
 
 #################################################
 # Get Descriptive Stats Endpoint
 #################################################
 
-class StatsInput(BaseModel):
-    data: List[Dict[str, Any]]
-
-@router.post("/get_descriptive_stats", response_model=List[Dict[str, Any]])
-def get_descriptive_stats_endpoint(input: StatsInput):
-    df = pd.DataFrame(input.data)
+# Either send the (already filtered) rows inline in `data` (or as an Arrow
+# or parquet body) or reference a registered dataset with `dataset_id`,
+# filtered with `filter_options`
+class StatsInput(TimedModel):
+    data: Optional[List[Dict[str, Any]]] = None
+    dataset_id: Optional[str] = None
+    filter_options: Dict[str, Any] = {}
+
+@router.post(
+    "/get_descriptive_stats",
+    response_model=Union[List[Dict[str, Any]], Dict[str, List[Any]]],
+    response_class=FrameJSONResponse,
+)
+def get_descriptive_stats_endpoint(
+    input: StatsInput,
+    response: Response,
+    response_format: ResponseFormat = Query("records", alias="format"),
+    accept: Optional[str] = Header(None),
+    frame: Optional[pd.DataFrame] = Depends(request_frame),
+):
+    df, snapshot = resolve_input(input.data, input.dataset_id, frame)
+    set_dataset_version(response, snapshot)
     logging.info(f"DataFrame Columns before stats calculation: {df.columns}")
-    return get_descriptive_stats(df).to_dict(orient='records')
-
-def get_descriptive_stats(df: pd.DataFrame) -> pd.DataFrame:
-    """
-    Function to get descriptive stats from the filtered dataframe, which
-    will be used to generate projections on campaign performance.
-
-    Args:
-        df (pd.DataFrame): The input DataFrame containing campaign data.
 
-    Returns:
-        pd.DataFrame: A DataFrame with descriptive statistics.
-    """
-    df = df.copy()
-    logging.info(f"DataFrame Columns in get_descriptive_stats: {df.columns}")
-    
-    if 'Cost per Result' not in df.columns or 'Cost per Mile' not in df.columns:
-        raise ValueError("Required columns 'Cost per Result' or 'Cost per Mile' are missing from the DataFrame.")
-    
-    if df['Cost per Result'].dtype != 'float64':
-        df['Cost per Result'] = pd.to_numeric(df['Cost per Result'], errors='coerce')
-    if df['Cost per Mile'].dtype != 'float64':
-        df['Cost per Mile'] = pd.to_numeric(df['Cost per Mile'], errors='coerce')
-    
-    best_campaign_sets = []
-    for result_types in df['Result Type'].unique():
-        
-        # median
-        median_cpr = df.loc[df['Result Type'] == result_types, 'Cost per Result'].median(skipna=True)
-        median_cpm = df.loc[df['Result Type'] == result_types, 'Cost per Mile'].median(skipna=True)
-
-        # min
-        min_cpr = df.loc[df['Result Type'] == result_types, 'Cost per Result'].quantile(q=0.25, interpolation='midpoint')
-        min_cpm = df.loc[df['Result Type'] == result_types, 'Cost per Mile'].quantile(q=0.25, interpolation='midpoint')
-
-        # max
-        max_cpr = df.loc[df['Result Type'] == result_types, 'Cost per Result'].quantile(q=0.80, interpolation='midpoint')
-        max_cpm = df.loc[df['Result Type'] == result_types, 'Cost per Mile'].quantile(q=0.80, interpolation='midpoint')
-
-        num_campaigns = len(df.loc[df['Result Type'] == result_types])
-
-        metrics = {
-            'Result Type': result_types,
-            'Min CPM': round(min_cpm, 2),
-            'Median CPM': round(median_cpm, 2),
-            'Max CPM': round(max_cpm, 2),
-            'Min CPR': round(min_cpr, 2),
-            'Median CPR': round(median_cpr, 2),
-            'Max CPR': round(max_cpr, 2),
-            'No. of Campaigns': num_campaigns,
-        }
-
-        df_metrics_by_industry = pd.DataFrame(metrics, index=[0])
-        best_campaign_sets.append(df_metrics_by_industry)
-
-    df_best_roas_sets = pd.concat(best_campaign_sets)
-    return df_best_roas_sets
+    if snapshot is None:
+        # Filtered on the backend along with the stats
+        with stage("stats"):
+            stats = execution_backend.run(get_filtered_descriptive_stats, df, input.filter_options)
+        return dataframe_response(stats, response, response_format, accept)
+
+    # The most common filters are precomputed when the dataset is loaded
+    if snapshot.stats_cube is not None:
+        with stage("stats"):
+            stats = snapshot.stats_cube.get(input.filter_options)
+        if stats is not None:
+            return dataframe_response(stats, response, response_format, accept)
+
+    def compute() -> pd.DataFrame:
+        # The index lookup is cheap: only ship the matching positions to the backend
+        if USE_FILTER_INDEX:
+            with stage("filter"):
+                positions = dataset_registry.filter_index(snapshot).positions(input.filter_options)
+            with stage("stats"):
+                return execution_backend.run(get_descriptive_stats_at, shared_frame(snapshot), positions)
+        with stage("stats"):
+            return execution_backend.run(get_filtered_descriptive_stats, shared_frame(snapshot), input.filter_options)
+
+    stats = stats_cache.get_or_compute(snapshot.dataset_id, snapshot.version, input.filter_options, compute)
+    return dataframe_response(stats, response, response_format, accept)
+
+@router.get("/get_descriptive_stats/cache", response_model=Dict[str, int])
+def get_descriptive_stats_cache_info():
+    """Hit/miss counters and size of the descriptive stats cache."""
+    return stats_cache.info()
+
+@router.get("/get_descriptive_stats/cube", response_model=Dict[str, Dict[str, Any]])
+def get_descriptive_stats_cube_info():
+    """Size, depth, build time and hit/miss counters of the stats cube of each loaded dataset."""
+    cubes = {}
+    for dataset_id in dataset_registry.dataset_ids():
+        if dataset_registry.is_loaded(dataset_id):
+            stats_cube = dataset_registry.snapshot(dataset_id).stats_cube
+            if stats_cube is not None:
+                cubes[dataset_id] = stats_cube.info()
+    return cubes
+
+@router.get("/execution", response_model=Dict[str, Any])
+def get_execution_info():
+    """Kind, limits and rejection counters of the execution backend."""
+    return execution_backend.info()
+
+def get_filtered_descriptive_stats(df: pd.DataFrame, filter_options: Dict[str, Any]) -> pd.DataFrame:
+    """`get_descriptive_stats` of the rows of `df` matching `filter_options`."""
+    if filter_options:
+        df = filter_dataframe(df, filter_options)
+    return get_descriptive_stats(df)
+
+def get_descriptive_stats_at(df: pd.DataFrame, positions: np.ndarray) -> pd.DataFrame:
+    """`get_descriptive_stats` of the rows of `df` at `positions`."""
+    return get_descriptive_stats(df.iloc[positions])
 
 #################################################
 # Get Forecast By Value Endpoint
 #################################################
 
-class ForecastInput(BaseModel):
-    data: List[Dict[str, Any]]
+# The rows of `data` (the output of `get_descriptive_stats`) can also be
+# sent as an Arrow or parquet body, with `budget` and `distribution` in the
+# `params` query parameter
+class ForecastInput(TimedModel):
+    data: Optional[List[Dict[str, Any]]] = None
     budget: float
     distribution: Dict[str, int]
 
+def forecast_records(forecast: pd.DataFrame) -> List[Dict[str, Any]]:
+    """Serializes a forecast to the list of row dicts returned by the forecast endpoints."""
+    observe_rows("out", len(forecast))
+    with stage("serialize"):
+        return forecast.to_dict(orient='records')
+
 @router.post("/get_forecast_by_value", response_model=List[Dict[str, Any]])
-def get_forecast_by_value_endpoint(input: ForecastInput):
-    df = pd.DataFrame(input.data)
-    return get_forecast_by_value(df, input.budget, input.distribution).to_dict(orient='records')
+def get_forecast_by_value_endpoint(input: ForecastInput, frame: Optional[pd.DataFrame] = Depends(request_frame)):
+    if frame is not None:
+        df = frame
+    elif input.data is not None:
+        with stage("dataframe"):
+            df = pd.DataFrame(input.data)
+    else:
+        raise HTTPException(status_code=422, detail="Either 'data' or an Arrow or parquet body must be provided.")
+    observe_rows("in", len(df))
+    with stage("forecast"):
+        forecast = execution_backend.run(get_forecast_by_value, df, input.budget, input.distribution)
+    return forecast_records(forecast)
 
 def get_forecast_by_value(df: pd.DataFrame, budget: float, distribution: Dict[str, int]) -> pd.DataFrame:
     """
@@ -245,53 +434,297 @@ def get_forecast_by_value(df: pd.DataFrame, budget: float, distribution: Dict[st
     return df_final
 
 
+#################################################
+# Get Forecast Batch Endpoint
+#################################################
+
+class ForecastScenario(BaseModel):
+    budget: float
+    distribution: Dict[str, float]
+
+class ForecastBatchInput(TimedModel):
+    data: List[Dict[str, Any]]
+    scenarios: List[ForecastScenario]
+
+@router.post("/get_forecast_batch", response_model=List[Dict[str, Any]])
+def get_forecast_batch_endpoint(input: ForecastBatchInput):
+    with stage("dataframe"):
+        df = pd.DataFrame(input.data)
+    observe_rows("in", len(df))
+    budgets = [scenario.budget for scenario in input.scenarios]
+    distributions = [scenario.distribution for scenario in input.scenarios]
+    with stage("forecast"):
+        forecast = execution_backend.run(get_forecast_batch, df, budgets, distributions)
+    return forecast_records(forecast)
+
+def get_forecast_batch(df: pd.DataFrame, budgets: List[float], distributions: List[Dict[str, float]]) -> pd.DataFrame:
+    """
+    Function that evaluates many budget/distribution scenarios against the
+    same output dataframe from `get_descriptive_stats()`. All projections
+    are computed as one broadcast array operation (scenarios x result
+    types x {min, median, max}) with the same formulas and rounding as
+    `get_forecast_by_value()`.
+
+    Args:
+        df (pd.DataFrame): The output pandas dataframe from `get_descriptive_stats()`.
+        budgets (List[float]): The budget of each scenario.
+        distributions (List[Dict[str, float]]): The distribution of budget among
+            result types of each scenario, in the same order as `budgets`.
+
+    Returns:
+        pd.DataFrame: The `get_forecast_by_value()` output of every scenario,
+        stacked in scenario order with the scenario's position in `Scenario`.
+    """
+    if len(budgets) != len(distributions):
+        raise ValueError("Each scenario needs both a budget and a distribution.")
+
+    result_types = df['Result Type']
+    unique_result_types = result_types.unique()
+    codes = pd.Index(unique_result_types).get_indexer(result_types)
+
+    # (scenarios x unique result types) -> (scenarios x rows)
+    distribution = np.array(
+        [[scenario.get(result_type, 0) for result_type in unique_result_types] for scenario in distributions],
+        dtype='float64',
+    ).reshape(len(distributions), len(unique_result_types))
+    budget = np.asarray(budgets, dtype='float64')[:, None]
+    ad_spent = ((distribution / 100) * budget)[:, codes]
+
+    # (1 x rows x {min, median, max}) cost columns, matching the order of the outputs
+    cpm = df[['Min CPM', 'Median CPM', 'Max CPM']].to_numpy(dtype='float64')[None, :, :]
+    cpr = df[['Min CPR', 'Median CPR', 'Max CPR']].to_numpy(dtype='float64')[None, :, :]
+    with np.errstate(divide='ignore', invalid='ignore'):
+        impressions = np.round((ad_spent[:, :, None] / cpm) * 1000)
+        results = np.round(ad_spent[:, :, None] / cpr)
+
+    n_scenarios, n_rows = ad_spent.shape
+    return pd.DataFrame({
+        'Scenario': np.repeat(np.arange(n_scenarios), n_rows),
+        'Result Type': np.tile(result_types.to_numpy(), n_scenarios),
+        'Ad Spent': ad_spent.ravel(),
+        'Max Impressions': impressions[:, :, 0].ravel(),
+        'Median Impressions': impressions[:, :, 1].ravel(),
+        'Min Impressions': impressions[:, :, 2].ravel(),
+        'Max Results': results[:, :, 0].ravel(),
+        'Median Results': results[:, :, 1].ravel(),
+        'Min Results': results[:, :, 2].ravel(),
+    })
+
+
+#################################################
+# Get Optimal Distribution Endpoint
+#################################################
+
+# Objective -> (cost column, multiplier, forecast column it maximizes)
+OPTIMIZATION_OBJECTIVES = {
+    'median_results': ('Median CPR', 1, 'Median Results'),
+    'impressions': ('Median CPM', 1000, 'Median Impressions'),
+}
+
+class ShareConstraint(BaseModel):
+    min: float = 0
+    max: float = 100
+
+class OptimizeInput(TimedModel):
+    data: List[Dict[str, Any]]
+    budget: float
+    objective: Literal['median_results', 'impressions'] = 'median_results'
+    constraints: Dict[str, ShareConstraint] = {}
+
+@router.post("/get_optimal_distribution", response_model=Dict[str, Any])
+def get_optimal_distribution_endpoint(input: OptimizeInput):
+    with stage("dataframe"):
+        df = pd.DataFrame(input.data)
+    observe_rows("in", len(df))
+    constraints = {result_type: (share.min, share.max) for result_type, share in input.constraints.items()}
+    try:
+        with stage("optimize"):
+            distribution = execution_backend.run(get_optimal_distribution, df, input.objective, constraints)
+    except ValueError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+
+    with stage("forecast"):
+        forecast = get_forecast_by_value(df, input.budget, distribution)
+    forecast_column = OPTIMIZATION_OBJECTIVES[input.objective][2]
+    return {
+        'objective': input.objective,
+        'distribution': distribution,
+        'expected_value': float(forecast[forecast_column].sum()),
+        'forecast': forecast_records(forecast),
+    }
+
+def get_optimal_distribution(df: pd.DataFrame, objective: str, constraints: Dict[str, Tuple[float, float]]) -> Dict[str, float]:
+    """
+    Function that finds the budget distribution (in %) among result types
+    maximizing a forecast from `get_forecast_by_value()`, given min/max
+    share constraints per result type.
+
+    Both objectives are linear in the money spent on each result type
+    (results = spend / CPR, impressions = spend / CPM * 1000), so the
+    optimum of this linear program is a greedy fill: every result type
+    gets its minimum share, then the rest of the budget goes to the
+    result types with the highest yield per unit spent, each up to its
+    maximum share. Result types without a positive cost yield nothing.
+
+    Args:
+        df (pd.DataFrame): The output pandas dataframe from `get_descriptive_stats()`.
+        objective (str): 'median_results' or 'impressions'.
+        constraints (Dict[str, Tuple[float, float]]): (min %, max %) per result
+            type. Result types not listed can take between 0% and 100%.
+
+    Returns:
+        Dict[str, float]: The distribution to pass to `get_forecast_by_value()`.
+    """
+    if objective not in OPTIMIZATION_OBJECTIVES:
+        raise ValueError(f"Unknown objective '{objective}'. Use one of: {list(OPTIMIZATION_OBJECTIVES)}")
+    cost_column, multiplier, _ = OPTIMIZATION_OBJECTIVES[objective]
+
+    result_types = df['Result Type']
+    unique_result_types = result_types.unique()
+    unknown = set(constraints) - set(unique_result_types)
+    if unknown:
+        raise ValueError(f"Constraints refer to unknown result types: {sorted(unknown)}")
+
+    # Yield per unit spent; rows sharing a result type all receive its spend
+    costs = pd.to_numeric(df[cost_column], errors='coerce').to_numpy(dtype='float64')
+    with np.errstate(divide='ignore'):
+        row_yield = np.where(costs > 0, multiplier / costs, 0.0)
+    codes = pd.Index(unique_result_types).get_indexer(result_types)
+    type_yield = np.bincount(codes, weights=np.nan_to_num(row_yield), minlength=len(unique_result_types))
+
+    lower = np.array([constraints.get(result_type, (0, 100))[0] for result_type in unique_result_types], dtype='float64')
+    upper = np.array([constraints.get(result_type, (0, 100))[1] for result_type in unique_result_types], dtype='float64')
+    if (lower < 0).any() or (upper > 100).any() or (lower > upper).any():
+        raise ValueError("Share constraints must satisfy 0 <= min <= max <= 100.")
+    if lower.sum() > 100 or upper.sum() < 100:
+        raise ValueError("Share constraints cannot add up to 100%.")
+
+    # Fill the remaining share by decreasing yield (stable, so ties keep the stats order)
+    order = np.argsort(-type_yield, kind='stable')
+    capacity = (upper - lower)[order]
+    remaining = 100 - lower.sum()
+    filled_before = np.cumsum(capacity) - capacity
+    shares = lower.copy()
+    shares[order] += np.clip(remaining - filled_before, 0, capacity)
+
+    return {result_type: float(share) for result_type, share in zip(unique_result_types, shares)}
+
+
 #################################################
 # Load Data from AWS S3 Endpoint 
 #################################################
-# Its Backend Function is ImportDataS3 & get_storage_config
+# Its Backend Function is ImportDataS3 & get_s3_storage
 class LoadDataInput(BaseModel):
     key: str
 
-@router.get("/load-data/{{key}}")
-async def load_data(key: str):
-    # storage_config = get_storage_config()
-    # if not storage_config['aws_access_key_id'] or not storage_config['aws_secret_access_key']:
-    #     raise HTTPException(status_code=500, detail="Storage configuration is missing.")
-    
-    # s3_storage = ImportDataS3(storage_config['aws_access_key_id'], storage_config['aws_secret_access_key'], storage_config['bucket_name'])
-    # df = s3_storage.load_df(key)
-    
-    # buffer = BytesIO()
-    # df.to_parquet(buffer, index=False)
-    # buffer.seek(0)
-    
+def _not_found_or_raise(e: ClientError, key: str):
+    if e.response.get("Error", {}).get("Code") in ("NoSuchKey", "404"):
+        raise HTTPException(status_code=404, detail=f"Object '{key}' not found.")
+    if e.response.get("Error", {}).get("Code") in ("PreconditionFailed", "412"):
+        # The object changed between reading its ETag and opening it
+        raise HTTPException(status_code=409, detail=f"Object '{key}' changed during the download, please retry.")
+    raise e
+
+@router.get("/load-data/{key:path}")
+async def load_data(
+    key: str,
+    range_header: Optional[str] = Header(None, alias="Range"),
+    if_none_match: Optional[str] = Header(None),
+    if_range: Optional[str] = Header(None),
+):
+    """
+    Streams an S3 object in chunks, from the disk cache when it is enabled.
+    Supports `If-None-Match` (304 when the client's copy is current) and a
+    single `Range` (206), honoured only if `If-Range` is absent or matches.
+    """
+    storage = get_s3_storage()
+    file = None
+    try:
+        if storage.cache is not None:
+            # Streamed from the open file, which a newer version can't remove
+            file, etag = await run_in_threadpool(storage.fetch_file, key)
+            size = os.fstat(file.fileno()).st_size
+        else:
+            etag, size = await run_in_threadpool(storage.get_object_info, key)
+    except ClientError as e:
+        _not_found_or_raise(e, key)
+
+    try:
+        return await _load_data_response(storage, key, file, etag, size, range_header, if_none_match, if_range)
+    except BaseException:
+        if file is not None:
+            file.close()
+        raise
+
+async def _load_data_response(
+    storage: ImportDataS3,
+    key: str,
+    file: Optional[BinaryIO],
+    etag: str,
+    size: int,
+    range_header: Optional[str],
+    if_none_match: Optional[str],
+    if_range: Optional[str],
+) -> Response:
+    """
+    Builds the `/load-data` response of an object whose ETag and size are
+    known. `file` is its copy in the disk cache, if enabled, which the
+    response closes once sent, even if its body was never streamed.
+    """
     headers = {
-        'Content-Disposition': f'attachment; filename="{key}"',
-        'Content-Type': 'application/octet-stream'
+        'Content-Disposition': f'attachment; filename="{os.path.basename(key)}"',
+        'Accept-Ranges': 'bytes',
+        'ETag': etag,
     }
-    
-    return StreamingResponse(buffer, headers=headers, media_type="application/octet-stream")
+    if if_none_match is not None and etag_matches(if_none_match, etag):
+        if file is not None:
+            file.close()
+        return Response(status_code=304, headers=headers)
+
+    byte_range = None
+    if range_header is not None and (if_range is None or if_range.strip() == etag):
+        byte_range = parse_range(range_header, size)
+    if byte_range is not None:
+        start, end = byte_range
+        headers['Content-Range'] = f'bytes {start}-{end}/{size}'
+    else:
+        start, end = 0, size - 1
+    headers['Content-Length'] = str(end - start + 1)
+
+    background = None
+    if file is not None:
+        chunks = iter_file(file, start, end - start + 1)
+        # iter_file only closes the file if the body is iterated
+        background = BackgroundTask(file.close)
+    else:
+        # Opened before responding so a missing or changed object is still an error status
+        try:
+            body = await run_in_threadpool(storage.open_object, key, etag, *(byte_range or (None, None)))
+        except ClientError as e:
+            _not_found_or_raise(e, key)
+        chunks = iter_body(body)
+
+    return StreamingResponse(
+        chunks,
+        status_code=206 if byte_range is not None else 200,
+        headers=headers,
+        media_type="application/octet-stream",
+        background=background,
+    )
 
 
 #################################################
 # Main Endpoint
 #################################################
 
-# Models for input data
-class Pagination(BaseModel):
-    page: int
-    size: int
-
-class FilterInputWithPagination(BaseModel):
-    data: List[Dict[str, Any]]
-    filter_options: Dict[str, Any]
-    pagination: Pagination
+# Uses the Pagination and FilterInputWithPagination models defined above
 
 # Function to filter the dataframe
 def filter_dataframe(df: pd.DataFrame, options: dict) -> pd.DataFrame:
     df = df.copy()
     for key, value in options.items():
         if key in df.columns:
+            value = coerce_filter_value(df[key], value)
             if isinstance(value, list):
                 df = df[df[key].isin(value)]
             else:
@@ -299,14 +732,30 @@ def filter_dataframe(df: pd.DataFrame, options: dict) -> pd.DataFrame:
     return df
     
 # Endpoint to filter data with pagination
-@router.post("/main", response_model=List[Dict])
-def main(input: FilterInputWithPagination):
+@router.post(
+    "/main",
+    response_model=Union[List[Dict], CursorPage, Dict[str, List[Any]], ColumnarCursorPage],
+    response_class=FrameJSONResponse,
+)
+def main(
+    input: FilterInputWithPagination,
+    response: Response,
+    response_format: ResponseFormat = Query("records", alias="format"),
+    accept: Optional[str] = Header(None),
+    frame: Optional[pd.DataFrame] = Depends(request_frame),
+):
     logging.info("Loading campaigns data")
-    df_unfiltered = pd.DataFrame(input.data)
+    df_unfiltered, snapshot = resolve_input(input.data, input.dataset_id, frame)
+    set_dataset_version(response, snapshot)
     logging.info(f"Unfiltered DataFrame: {df_unfiltered.head()}")
 
+    if is_cursor_pagination(input):
+        logging.info(f"Filter options: {input.filter_options}, cursor: {input.pagination.cursor}")
+        paginated_df, page = paginate_with_cursor(snapshot, input)
+        return dataframe_response(paginated_df, response, response_format, accept, page)
+
     logging.info(f"Filter options: {input.filter_options}")
-    filtered_df = filter_dataframe(df_unfiltered, input.filter_options)
+    filtered_df = filter_input_dataframe(df_unfiltered, snapshot, input.filter_options)
     logging.info(f"Filtered DataFrame: {filtered_df.head()}")
     
     # Implement pagination
@@ -316,7 +765,5 @@ def main(input: FilterInputWithPagination):
     end = start + size
     paginated_df = filtered_df.iloc[start:end]
     
-    result = paginated_df.to_dict(orient='records')
-    logging.info(f"Response data type: {type(result)}")  # Print the type of the result
-    logging.info(f"Response data: {result[:5]}")  # Log the first few items for brevity
-    return result
\ No newline at end of file
+    logging.info(f"Response page: {len(paginated_df)} rows, format {response_format}")
+    return dataframe_response(paginated_df, response, response_format, accept)
\ No newline at end of file
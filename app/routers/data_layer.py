@@ -0,0 +1,166 @@
+import logging
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional
+from dotenv import load_dotenv
+from app.routers.dataset_registry import DatasetRegistry, DATASET_LOADERS, DATASET_LOAD_CONCURRENCY, DATASET_REVALIDATE_SECONDS, dataset_registry
+
+#################################################
+# Data Layer
+#################################################
+
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+# Datasets loaded in the background at startup (comma separated, empty for none)
+PRELOAD_DATASETS = [
+    dataset_id.strip()
+    for dataset_id in os.getenv("PRELOAD_DATASETS", ",".join(DATASET_LOADERS)).split(",")
+    if dataset_id.strip()
+]
+
+# Seconds before retrying a preloaded dataset that failed to load, doubled
+# after every failure up to DATASET_RETRY_MAX_SECONDS (0 disables retries)
+DATASET_RETRY_SECONDS = float(os.getenv("DATASET_RETRY_SECONDS", "5"))
+DATASET_RETRY_MAX_SECONDS = float(os.getenv("DATASET_RETRY_MAX_SECONDS", "300"))
+
+
+class DataLayer:
+    """
+    Loads the registered datasets off the startup path. `start()` returns
+    immediately and a background thread warms the registry, so workers
+    accept requests (and answer health checks) while S3 is being read.
+    `ready` turns True once every preloaded dataset is in memory.
+    Up to `max_workers` datasets are loaded at the same time.
+
+    Requests reaching a dataset before the background load has finished
+    simply wait for that same load instead of starting another one.
+
+    Every `refresh_seconds` (0 disables it), a second thread checks the
+    ETags of the loaded datasets and swaps in the new version of those
+    that changed, so updated S3 objects are served without a restart.
+    The same thread retries the preloaded datasets that failed to load,
+    `retry_seconds` after the first failure and twice as long after each
+    of the next ones (up to `retry_max_seconds`), so a worker that started
+    while S3 was unreachable becomes ready once it's back.
+    """
+
+    def __init__(
+        self,
+        registry: DatasetRegistry,
+        preload: List[str],
+        max_workers: int = DATASET_LOAD_CONCURRENCY,
+        refresh_seconds: float = DATASET_REVALIDATE_SECONDS,
+        retry_seconds: float = DATASET_RETRY_SECONDS,
+        retry_max_seconds: float = DATASET_RETRY_MAX_SECONDS,
+    ):
+        self.registry = registry
+        self.preload = list(preload)
+        self.max_workers = max(max_workers, 1)
+        self.refresh_seconds = refresh_seconds
+        self.retry_seconds = retry_seconds
+        self.retry_max_seconds = retry_max_seconds
+        self._errors: Dict[str, str] = {}
+        # Failures in a row and time.monotonic() of the next retry of each failed dataset
+        self._failures: Dict[str, int] = {}
+        self._retry_at: Dict[str, float] = {}
+        self._thread: Optional[threading.Thread] = None
+        self._refresher: Optional[threading.Thread] = None
+        self._stopped = threading.Event()
+
+    def start(self) -> None:
+        """Starts loading the preloaded datasets, and refreshing them, in the background."""
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._load, name="dataset-loader", daemon=True)
+            self._thread.start()
+        if self._refresher is None and (self.refresh_seconds > 0 or self.retry_seconds > 0):
+            self._stopped.clear()
+            self._refresher = threading.Thread(target=self._refresh, name="dataset-refresher", daemon=True)
+            self._refresher.start()
+
+    def stop(self) -> None:
+        """Stops the refresher thread."""
+        self._stopped.set()
+        if self._refresher is not None:
+            self._refresher.join()
+            self._refresher = None
+
+    def _refresh(self) -> None:
+        next_refresh = time.monotonic() + self.refresh_seconds if self.refresh_seconds > 0 else None
+        while True:
+            # Wake up for the next refresh or retry, whichever comes first.
+            # Failures of the initial load show up while waiting, so wait
+            # at most `retry_seconds` when nothing is scheduled.
+            wake_ups = list(self._retry_at.values()) + ([next_refresh] if next_refresh is not None else [])
+            timeout = min(wake_ups) - time.monotonic() if wake_ups else self.retry_seconds
+            if self._stopped.wait(max(timeout, 0)):
+                return
+
+            now = time.monotonic()
+            due = [dataset_id for dataset_id, retry_at in list(self._retry_at.items()) if retry_at <= now]
+            if due:
+                logger.info(f"Retrying datasets that failed to load: {due}")
+                self._load_all(due)
+
+            if next_refresh is not None and now >= next_refresh:
+                next_refresh = now + self.refresh_seconds
+                try:
+                    changed = self.registry.refresh_all(self.max_workers)
+                except Exception:
+                    logger.exception("Failed to refresh the datasets")
+                    continue
+                if changed:
+                    logger.info(f"Refreshed datasets: {changed}")
+
+    def _load(self) -> None:
+        self._load_all(self.preload)
+
+    def _load_all(self, dataset_ids: List[str]) -> None:
+        with ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="dataset-load") as pool:
+            list(pool.map(self._load_dataset, dataset_ids))
+
+    def _load_dataset(self, dataset_id: str) -> None:
+        try:
+            self.registry.get(dataset_id)
+            self._errors.pop(dataset_id, None)
+            self._failures.pop(dataset_id, None)
+            self._retry_at.pop(dataset_id, None)
+        except Exception as e:
+            logger.exception(f"Failed to load dataset '{dataset_id}'")
+            self._errors[dataset_id] = str(e)
+            failures = self._failures.get(dataset_id, 0) + 1
+            self._failures[dataset_id] = failures
+            if self.retry_seconds > 0:
+                delay = min(self.retry_seconds * 2 ** min(failures - 1, 30), self.retry_max_seconds)
+                self._retry_at[dataset_id] = time.monotonic() + delay
+
+    def wait(self, timeout: Optional[float] = None) -> bool:
+        """Waits for the background load to finish; returns False on timeout."""
+        if self._thread is not None:
+            self._thread.join(timeout)
+            return not self._thread.is_alive()
+        return True
+
+    @property
+    def ready(self) -> bool:
+        return all(self.registry.is_loaded(dataset_id) for dataset_id in self.preload)
+
+    def status(self) -> Dict[str, object]:
+        """Returns the readiness of the data layer and the state of each preloaded dataset."""
+        datasets = {}
+        for dataset_id in self.preload:
+            if self.registry.is_loaded(dataset_id):
+                datasets[dataset_id] = "loaded"
+            elif dataset_id in self._errors:
+                datasets[dataset_id] = f"failed: {self._errors[dataset_id]}"
+            elif self._thread is not None and self._thread.is_alive():
+                datasets[dataset_id] = "loading"
+            else:
+                datasets[dataset_id] = "pending"
+        return {"ready": self.ready, "datasets": datasets}
+
+
+data_layer = DataLayer(dataset_registry, PRELOAD_DATASETS)
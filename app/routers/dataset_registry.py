@@ -0,0 +1,248 @@
+import logging
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, replace
+from typing import Callable, Dict, List, Optional
+import pandas as pd
+from dotenv import load_dotenv
+from app.routers.load_exp_data_utils import get_s3_storage, load_clients_df, load_roas_df, load_campaigns_df, load_adsets_df
+from app.routers.filter_engine import CategoricalIndex, USE_FILTER_INDEX
+from app.routers.dataset_store import ArrowDatasetStore, dataset_store
+from app.routers.stats_cube import STATS_CUBE_DEPTH, StatsCube, build_stats_cube
+
+#################################################
+# Dataset Registry
+#################################################
+
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+# Seconds between two ETag checks of the loaded datasets (0 disables the refresher)
+DATASET_REVALIDATE_SECONDS = float(os.getenv("DATASET_REVALIDATE_SECONDS", "300"))
+
+# Datasets loaded at the same time (each one is one S3 object plus its parsing)
+DATASET_LOAD_CONCURRENCY = int(os.getenv("DATASET_LOAD_CONCURRENCY", "4"))
+
+# Dataset ids accepted by the endpoints and the loader backing each of them
+DATASET_LOADERS: Dict[str, Callable[[], pd.DataFrame]] = {
+    "campaigns": load_campaigns_df,
+    "roas": load_roas_df,
+    "adsets": load_adsets_df,
+    "clients": load_clients_df,
+}
+
+# S3 object behind each dataset, used to track its version
+DATASET_KEYS: Dict[str, str] = {
+    "campaigns": "campaign_final.parquet",
+    "roas": "roas_final.csv",
+    "adsets": "adsets_final.parquet",
+    "clients": "clients_data_final.parquet",
+}
+
+
+def get_dataset_etag(dataset_id: str) -> str:
+    """Returns the ETag of the S3 object behind `dataset_id`."""
+    return get_s3_storage().get_etag(DATASET_KEYS[dataset_id])
+
+
+@dataclass(frozen=True)
+class DatasetSnapshot:
+    """
+    One loaded version of a dataset. Snapshots are never modified: a
+    refresh builds a new one and swaps it in, so a request that took a
+    snapshot works on a consistent frame, filter index and version until
+    it finishes, and the old frame is freed once the last one is done.
+
+    `path` is the Arrow file of the dataset store the frame is mapped
+    from, if any, and `stats_cube` the descriptive stats precomputed for
+    the common filters, if the dataset has their columns.
+    """
+    dataset_id: str
+    frame: pd.DataFrame
+    version: Optional[str]
+    filter_index: Optional[CategoricalIndex] = None
+    path: Optional[str] = None
+    stats_cube: Optional[StatsCube] = None
+
+
+class DatasetRegistry:
+    """
+    Keeps one DataFrame per dataset id so the endpoints can work on
+    server-side data instead of receiving the whole table in every
+    request body. Each dataset is loaded once, on first access, and
+    then shared by every request.
+
+    The frames handed out are shared, so callers must treat them as
+    read-only (`filter_dataframe` and `get_descriptive_stats` already
+    work on copies).
+
+    With `build_filter_index` enabled, a CategoricalIndex is built for
+    each dataset right after it is loaded.
+
+    When a `versions` function is given (dataset id -> ETag), the version
+    of each dataset is recorded when it is loaded. `refresh()` compares
+    it with the current one and, if it changed, loads the new version
+    while the old one keeps being served, swaps it in and calls the
+    invalidation listeners (e.g. to clear caches derived from it).
+
+    With a `store`, versioned datasets are persisted as Arrow files
+    shared by every worker on the host and memory-mapped from there, so
+    only the first worker runs the loader for a given version.
+
+    With a `stats_cube_depth` above 0, a StatsCube of every combination
+    of up to that many common filter dimensions is built at load time.
+    """
+
+    def __init__(
+        self,
+        loaders: Dict[str, Callable[[], pd.DataFrame]],
+        build_filter_index: bool = USE_FILTER_INDEX,
+        versions: Optional[Callable[[str], Optional[str]]] = None,
+        store: Optional[ArrowDatasetStore] = None,
+        stats_cube_depth: int = STATS_CUBE_DEPTH,
+    ):
+        self._loaders = dict(loaders)
+        self._build_filter_index = build_filter_index
+        self._versions = versions
+        self._store = store
+        self._stats_cube_depth = stats_cube_depth
+        self._snapshots: Dict[str, DatasetSnapshot] = {}
+        self._listeners: List[Callable[[str], None]] = []
+        self._locks = {dataset_id: threading.Lock() for dataset_id in self._loaders}
+
+    def dataset_ids(self) -> List[str]:
+        """Returns the ids of every dataset the registry can serve."""
+        return list(self._loaders)
+
+    def is_loaded(self, dataset_id: str) -> bool:
+        """Returns True if the dataset is already held in memory."""
+        return dataset_id in self._snapshots
+
+    def add_invalidation_listener(self, listener: Callable[[str], None]) -> None:
+        """Registers `listener(dataset_id)`, called whenever a loaded dataset is replaced or dropped."""
+        self._listeners.append(listener)
+
+    def snapshot(self, dataset_id: str) -> DatasetSnapshot:
+        """
+        Returns the current snapshot of `dataset_id`, loading it on first use.
+
+        Raises:
+            KeyError: If `dataset_id` is not a registered dataset.
+        """
+        if dataset_id not in self._loaders:
+            raise KeyError(f"Dataset '{dataset_id}' not found. Available datasets: {self.dataset_ids()}")
+
+        snapshot = self._snapshots.get(dataset_id)
+        if snapshot is None:
+            # One lock per dataset so a slow load doesn't block the others
+            with self._locks[dataset_id]:
+                snapshot = self._snapshots.get(dataset_id)
+                if snapshot is None:
+                    snapshot = self._load(dataset_id)
+                    self._snapshots[dataset_id] = snapshot
+        return snapshot
+
+    def get(self, dataset_id: str) -> pd.DataFrame:
+        """Returns the DataFrame for `dataset_id`, loading it on first use."""
+        return self.snapshot(dataset_id).frame
+
+    def version(self, dataset_id: str) -> Optional[str]:
+        """Returns the version (ETag) of the loaded dataset, loading it if needed."""
+        return self.snapshot(dataset_id).version
+
+    def filter_index(self, snapshot: DatasetSnapshot) -> CategoricalIndex:
+        """Returns the CategoricalIndex of a snapshot, building it on first use."""
+        if snapshot.filter_index is not None:
+            return snapshot.filter_index
+        index = CategoricalIndex(snapshot.frame)
+        # Keep the index for the next requests, unless a refresh replaced
+        # the snapshot or is busy loading its replacement
+        lock = self._locks[snapshot.dataset_id]
+        if lock.acquire(blocking=False):
+            try:
+                if self._snapshots.get(snapshot.dataset_id) is snapshot:
+                    self._snapshots[snapshot.dataset_id] = replace(snapshot, filter_index=index)
+            finally:
+                lock.release()
+        return index
+
+    def get_filter_index(self, dataset_id: str) -> CategoricalIndex:
+        """Returns the CategoricalIndex of `dataset_id`, building it on first use."""
+        return self.filter_index(self.snapshot(dataset_id))
+
+    def _load(self, dataset_id: str) -> DatasetSnapshot:
+        logger.info(f"Loading dataset '{dataset_id}'")
+        # Read the version first: if the object changes during the
+        # download, the next refresh loads it again
+        version = self._versions(dataset_id) if self._versions else None
+        path = None
+        if self._store is not None and version is not None:
+            frame = self._store.load(dataset_id, version, self._loaders[dataset_id])
+            path = self._store.path_for(dataset_id, version, ".arrow")
+        else:
+            frame = self._loaders[dataset_id]()
+        filter_index = CategoricalIndex(frame) if self._build_filter_index else None
+        stats_cube = build_stats_cube(frame, self._stats_cube_depth)
+        if stats_cube is not None:
+            logger.info(f"Stats cube of dataset '{dataset_id}' built with {stats_cube.info()['cells']} cells in {stats_cube.build_seconds:.2f}s")
+        logger.info(f"Dataset '{dataset_id}' loaded with {len(frame)} rows (version {version})")
+        return DatasetSnapshot(dataset_id, frame, version, filter_index, path, stats_cube=stats_cube)
+
+    def invalidate(self, dataset_id: str) -> None:
+        """Drops a loaded dataset so the next access loads it again."""
+        with self._locks[dataset_id]:
+            dropped = self._snapshots.pop(dataset_id, None) is not None
+        if dropped:
+            logger.info(f"Dataset '{dataset_id}' invalidated")
+            self._notify(dataset_id)
+
+    def refresh(self, dataset_id: str) -> bool:
+        """
+        Loads the new version of a loaded dataset if its ETag changed and
+        swaps it in. Requests keep being served the old version until the
+        swap. Returns True if a new version was swapped in.
+        """
+        current = self._snapshots.get(dataset_id)
+        if self._versions is None or current is None:
+            return False
+        try:
+            version = self._versions(dataset_id)
+        except Exception as e:
+            # Keep serving the loaded version if S3 can't be reached
+            logger.warning(f"Could not check the version of dataset '{dataset_id}': {e}")
+            return False
+        if version == current.version:
+            return False
+
+        logger.info(f"Dataset '{dataset_id}' changed from version {current.version} to {version}")
+        with self._locks[dataset_id]:
+            if self._snapshots.get(dataset_id) is not current:
+                # Refreshed or invalidated in the meantime
+                return False
+            self._snapshots[dataset_id] = self._load(dataset_id)
+        self._notify(dataset_id)
+        return True
+
+    def refresh_all(self, max_workers: int = DATASET_LOAD_CONCURRENCY) -> List[str]:
+        """Refreshes every loaded dataset, several at a time. Returns the ids of those that changed."""
+        loaded = [dataset_id for dataset_id in self._loaders if dataset_id in self._snapshots]
+        if not loaded:
+            return []
+        with ThreadPoolExecutor(max_workers=max(max_workers, 1), thread_name_prefix="dataset-refresh") as pool:
+            changed = list(pool.map(self.refresh, loaded))
+        return [dataset_id for dataset_id, was_changed in zip(loaded, changed) if was_changed]
+
+    def _notify(self, dataset_id: str) -> None:
+        for listener in self._listeners:
+            listener(dataset_id)
+
+    def load_all(self, max_workers: int = DATASET_LOAD_CONCURRENCY) -> None:
+        """Loads every registered dataset that isn't loaded yet, several at a time."""
+        with ThreadPoolExecutor(max_workers=max(max_workers, 1), thread_name_prefix="dataset-load") as pool:
+            for future in [pool.submit(self.get, dataset_id) for dataset_id in self._loaders]:
+                future.result()
+
+
+dataset_registry = DatasetRegistry(DATASET_LOADERS, versions=get_dataset_etag, store=dataset_store)
@@ -0,0 +1,104 @@
+import hashlib
+import logging
+import os
+import re
+import tempfile
+from typing import Callable, Optional
+import pandas as pd
+import pyarrow.feather as feather
+from dotenv import load_dotenv
+
+#################################################
+# Shared Dataset Store
+#################################################
+
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+# Directory shared by the workers of a host for the Arrow copies of the datasets
+DATASET_STORE_DIR = os.getenv("DATASET_STORE_DIR", os.path.join(tempfile.gettempdir(), "roas_datasets"))
+
+# Part of every file name: bump it whenever the loaders or CAMPAIGN_SCHEMA
+# change the stored columns or dtypes, so files written by the previous
+# code are not mapped by the new one
+STORE_FORMAT_VERSION = "1"
+
+
+def read_frame(path: str) -> pd.DataFrame:
+    """
+    Memory-maps an uncompressed Arrow IPC (Feather v2) file and converts it
+    to pandas. With `split_blocks` every column keeps its own block, so
+    numeric columns without nulls are views on the mapped pages (shared by
+    every process mapping the file, and read-only) instead of copies.
+
+    String columns come back Arrow-backed (`string[pyarrow]`), which keeps
+    them on the mapped buffers as well.
+    """
+    table = feather.read_table(path, memory_map=True)
+    with pd.option_context("mode.string_storage", "pyarrow"):
+        return table.to_pandas(split_blocks=True)
+
+
+class ArrowDatasetStore:
+    """
+    Persists each loaded dataset once per version as an Arrow IPC file
+    that every worker on the host memory-maps, instead of each worker
+    building and holding its own copy. The first worker to need a
+    version runs the loader and writes the file (under a temporary name,
+    renamed into place); the others map the existing file.
+
+    Files are named `<name>-<sha256(format_version, name, version)[:32]><suffix>`,
+    and writing a new version removes the older files of the same name.
+    """
+
+    def __init__(self, directory: str, format_version: str = STORE_FORMAT_VERSION):
+        self.directory = directory
+        self.format_version = format_version
+
+    def path_for(self, name: str, version: str, suffix: str) -> str:
+        digest = hashlib.sha256(f"{self.format_version}\n{name}\n{version}".encode("utf-8")).hexdigest()[:32]
+        return os.path.join(self.directory, f"{name}-{digest}{suffix}")
+
+    def materialize(self, name: str, version: str, suffix: str, write: Callable[[str], None]) -> str:
+        """
+        Returns the path of the file for `name` at `version`, calling
+        `write(path)` to create it if no worker has done so yet.
+        """
+        path = self.path_for(name, version, suffix)
+        if os.path.exists(path):
+            return path
+
+        os.makedirs(self.directory, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=self.directory, prefix=f"{name}-", suffix=".part")
+        os.close(fd)
+        try:
+            write(tmp_path)
+            os.replace(tmp_path, path)
+        except BaseException:
+            os.unlink(tmp_path)
+            raise
+        logger.info(f"Stored '{name}' version {version} at {path}")
+        self._remove_stale(name, path)
+        return path
+
+    def _remove_stale(self, name: str, keep: str) -> None:
+        pattern = re.compile(rf"{re.escape(name)}-[0-9a-f]{{32}}\.")
+        for file_name in os.listdir(self.directory):
+            path = os.path.join(self.directory, file_name)
+            if pattern.match(file_name) and path != keep:
+                try:
+                    # Workers still mapping the old file keep their mapping
+                    os.unlink(path)
+                except OSError:
+                    pass
+
+    def load(self, dataset_id: str, version: str, loader: Callable[[], pd.DataFrame]) -> pd.DataFrame:
+        """Returns `dataset_id` at `version`, mapped from the shared Arrow file."""
+        def write(path: str) -> None:
+            feather.write_feather(loader(), path, compression="uncompressed")
+
+        return read_frame(self.materialize(dataset_id, version, ".arrow", write))
+
+
+dataset_store: Optional[ArrowDatasetStore] = ArrowDatasetStore(DATASET_STORE_DIR) if DATASET_STORE_DIR else None
@@ -0,0 +1,118 @@
+import logging
+from typing import Any, Dict
+import numpy as np
+import pandas as pd
+
+#################################################
+# Descriptive Stats
+#################################################
+
+def get_descriptive_stats(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Function to get descriptive stats from the filtered dataframe, which
+    will be used to generate projections on campaign performance.
+
+    All result types are computed in a single pass: the rows are sorted
+    once by (result type, value) and every quantile is read from the
+    sorted groups, with the same `midpoint` interpolation and rounding as
+    computing each result type separately.
+
+    Args:
+        df (pd.DataFrame): The input DataFrame containing campaign data.
+
+    Returns:
+        pd.DataFrame: A DataFrame with descriptive statistics, one row per
+        result type, on a RangeIndex (the per result type loop returned
+        every row with index 0).
+    """
+    logging.info(f"DataFrame Columns in get_descriptive_stats: {df.columns}")
+    
+    if 'Cost per Result' not in df.columns or 'Cost per Mile' not in df.columns:
+        raise ValueError("Required columns 'Cost per Result' or 'Cost per Mile' are missing from the DataFrame.")
+    
+    cpr = df['Cost per Result']
+    cpm = df['Cost per Mile']
+    if cpr.dtype != 'float64':
+        cpr = pd.to_numeric(cpr, errors='coerce')
+    if cpm.dtype != 'float64':
+        cpm = pd.to_numeric(cpm, errors='coerce')
+
+    # Result types in order of first appearance. Missing result types
+    # match no rows, so they are reported with no stats and 0 campaigns.
+    result_types = df['Result Type']
+    all_result_types = result_types.unique()
+    codes, _ = pd.factorize(result_types)
+    is_missing = np.asarray(pd.isna(all_result_types), dtype=bool)
+    n_groups = int((~is_missing).sum())
+    group_of_row = np.full(len(all_result_types), -1)
+    group_of_row[~is_missing] = np.arange(n_groups)
+
+    num_campaigns = np.bincount(codes[codes >= 0], minlength=n_groups)
+    cpr_stats = _grouped_quantiles(codes, n_groups, cpr.to_numpy(dtype='float64', na_value=np.nan))
+    cpm_stats = _grouped_quantiles(codes, n_groups, cpm.to_numpy(dtype='float64', na_value=np.nan))
+
+    def per_result_type(values: np.ndarray) -> np.ndarray:
+        return np.where(group_of_row >= 0, np.append(values, np.nan)[group_of_row], np.nan)
+
+    df_best_roas_sets = pd.DataFrame({
+        'Result Type': np.asarray(all_result_types),
+        'Min CPM': np.round(per_result_type(cpm_stats[0.25]), 2),
+        'Median CPM': np.round(per_result_type(cpm_stats['median']), 2),
+        'Max CPM': np.round(per_result_type(cpm_stats[0.80]), 2),
+        'Min CPR': np.round(per_result_type(cpr_stats[0.25]), 2),
+        'Median CPR': np.round(per_result_type(cpr_stats['median']), 2),
+        'Max CPR': np.round(per_result_type(cpr_stats[0.80]), 2),
+        'No. of Campaigns': np.where(group_of_row >= 0, np.append(num_campaigns, 0)[group_of_row], 0).astype('int64'),
+    })
+    return df_best_roas_sets
+
+def _grouped_quantiles(codes: np.ndarray, n_groups: int, values: np.ndarray) -> Dict[Any, np.ndarray]:
+    """
+    Sort-based kernel returning the median and the 25th/80th `midpoint`
+    quantiles of `values` for every group in `codes` (NaN values skipped,
+    NaN for groups without values).
+
+    The arithmetic mirrors `Series.median()` and `Series.quantile(q,
+    interpolation='midpoint')` (numpy's virtual index and `_lerp`), so the
+    results are bit-for-bit identical to computing each group on its own.
+    """
+    valid = (codes >= 0) & ~np.isnan(values)
+    group_codes = codes[valid]
+    order = np.lexsort((values[valid], group_codes))
+    sorted_values = values[valid][order]
+
+    counts = np.bincount(group_codes, minlength=n_groups)
+    starts = np.concatenate(([0], np.cumsum(counts)[:-1]))
+    has_values = counts > 0
+    # Groups without values read position 0 and are masked out at the end
+    safe_starts = np.where(has_values, starts, 0)
+    last = np.where(has_values, counts - 1, 0)
+    padded = sorted_values if len(sorted_values) else np.array([np.nan])
+
+    stats = {}
+
+    # median: middle value, or the mean of the two middle values
+    low = padded[safe_starts + (last // 2)]
+    high = padded[safe_starts + (counts // 2).clip(max=last)]
+    median = np.where(counts % 2 == 1, low, (low + high) / 2)
+    stats['median'] = np.where(has_values, median, np.nan)
+
+    for q in (0.25, 0.80):
+        # pandas hands numpy the quantile as a percentage
+        q_effective = np.true_divide(q * 100.0, 100)
+        virtual = 0.5 * (np.floor((counts - 1) * q_effective) + np.ceil((counts - 1) * q_effective))
+        previous = np.floor(virtual)
+        following = previous + 1
+        above_bounds = virtual >= counts - 1
+        previous = np.where(above_bounds, last, previous).astype(np.intp)
+        following = np.where(above_bounds, last, following).astype(np.intp)
+        gamma = np.where(virtual % 1 == 0, 0.0, 0.5)
+
+        a = padded[safe_starts + previous.clip(0, None)]
+        b = padded[safe_starts + following.clip(0, None)]
+        with np.errstate(invalid='ignore'):
+            diff_b_a = b - a
+            quantile = np.where(gamma >= 0.5, b - diff_b_a * (1 - gamma), a + diff_b_a * gamma)
+        stats[q] = np.where(has_values, quantile, np.nan)
+
+    return stats
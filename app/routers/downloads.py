@@ -0,0 +1,87 @@
+import os
+import re
+from typing import AsyncIterator, BinaryIO, Optional, Tuple
+import anyio
+from fastapi import HTTPException
+from fastapi.concurrency import run_in_threadpool
+from dotenv import load_dotenv
+
+#################################################
+# Streaming Downloads
+#################################################
+
+load_dotenv()
+
+# Size of the chunks `/load-data` streams to the client
+DOWNLOAD_CHUNK_SIZE = int(os.getenv("DOWNLOAD_CHUNK_SIZE", str(1024 * 1024)))
+
+_RANGE_PATTERN = re.compile(r"^bytes=(\d*)-(\d*)$")
+
+
+def etag_matches(if_none_match: str, etag: str) -> bool:
+    """Returns True if an `If-None-Match` header matches `etag` (weak comparison)."""
+    if if_none_match.strip() == "*":
+        return True
+    strip_weak = lambda tag: tag.strip()[2:] if tag.strip().startswith("W/") else tag.strip()
+    return strip_weak(etag) in {strip_weak(tag) for tag in if_none_match.split(",")}
+
+
+def parse_range(range_header: str, size: int) -> Optional[Tuple[int, int]]:
+    """
+    Returns the first and last byte (inclusive) requested by a single
+    `Range: bytes=...` header. Headers that can't be parsed, or that ask
+    for several ranges, return None so the whole object is sent.
+
+    Raises:
+        HTTPException: 416 if the range starts past the end of the object.
+    """
+    match = _RANGE_PATTERN.match(range_header.strip())
+    if match is None or match.group(1) == match.group(2) == "":
+        return None
+
+    first, last = match.group(1), match.group(2)
+    if first == "":
+        # Suffix range: the last N bytes
+        start, end = max(size - int(last), 0), size - 1
+        if int(last) == 0:
+            start = size
+    else:
+        start = int(first)
+        end = min(int(last), size - 1) if last else size - 1
+        if last and int(last) < start:
+            return None
+
+    if start >= size:
+        raise HTTPException(
+            status_code=416,
+            detail="Requested range not satisfiable.",
+            headers={"Content-Range": f"bytes */{size}"},
+        )
+    return start, end
+
+
+async def iter_file(file: BinaryIO, start: int, length: int, chunk_size: Optional[int] = None) -> AsyncIterator[bytes]:
+    """Yields `length` bytes of an open local file from `start`, in chunks, then closes it."""
+    chunk_size = chunk_size or DOWNLOAD_CHUNK_SIZE
+    async with anyio.wrap_file(file) as f:
+        await f.seek(start)
+        remaining = length
+        while remaining > 0:
+            chunk = await f.read(min(chunk_size, remaining))
+            if not chunk:
+                break
+            remaining -= len(chunk)
+            yield chunk
+
+
+async def iter_body(body, chunk_size: Optional[int] = None) -> AsyncIterator[bytes]:
+    """Yields an S3 streaming body in chunks, reading it in the thread pool."""
+    chunk_size = chunk_size or DOWNLOAD_CHUNK_SIZE
+    try:
+        while True:
+            chunk = await run_in_threadpool(body.read, chunk_size)
+            if not chunk:
+                break
+            yield chunk
+    finally:
+        body.close()
@@ -0,0 +1,219 @@
+import logging
+import multiprocessing
+import os
+import threading
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor, TimeoutError
+from typing import Any, Callable, Dict, Optional, Tuple
+import pandas as pd
+from dotenv import load_dotenv
+from fastapi import HTTPException
+from app.routers.dataset_registry import DatasetSnapshot
+from app.routers.dataset_store import read_frame
+from app.routers.profiling import add_backend_profile, is_profiling, run_profiled
+
+#################################################
+# Execution Backend
+#################################################
+
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+# Where the CPU-bound computations (descriptive stats, forecasts) run:
+# "thread" for a pool of threads of the worker process, or "process" for a
+# pool of processes that don't share the worker's GIL
+EXECUTION_BACKEND = os.getenv("EXECUTION_BACKEND", "thread")
+
+# Computations running at the same time
+EXECUTION_WORKERS = int(os.getenv("EXECUTION_WORKERS", str(os.cpu_count() or 1)))
+
+# Computations allowed to wait for a free worker; beyond that requests get a 503
+EXECUTION_QUEUE_LIMIT = int(os.getenv("EXECUTION_QUEUE_LIMIT", "32"))
+
+# Seconds a request waits for its computation before getting a 504 (0 disables it)
+EXECUTION_TIMEOUT_SECONDS = float(os.getenv("EXECUTION_TIMEOUT_SECONDS", "60"))
+
+# Niceness added to the processes of the "process" backend, so the worker
+# serving the requests gets the CPU first when the cores are all busy
+EXECUTION_NICE = int(os.getenv("EXECUTION_NICE", "0"))
+
+
+class SharedFrame:
+    """
+    A dataset frame passed to the process pool by the path of its Arrow
+    file in the dataset store rather than by value: the worker processes
+    memory-map the same file instead of unpickling a copy.
+    """
+
+    def __init__(self, dataset_id: str, path: str, frame: Optional[pd.DataFrame] = None):
+        self.dataset_id = dataset_id
+        self.path = path
+        self.frame = frame
+
+    def __reduce__(self):
+        # Only the path crosses the process boundary
+        return (SharedFrame, (self.dataset_id, self.path))
+
+
+def shared_frame(snapshot: DatasetSnapshot) -> Any:
+    """
+    Returns the argument passing the frame of `snapshot` to the execution
+    backend: a SharedFrame when it is mapped from the dataset store, the
+    frame itself otherwise.
+    """
+    if snapshot.path is not None:
+        return SharedFrame(snapshot.dataset_id, snapshot.path, snapshot.frame)
+    return snapshot.frame
+
+
+# Frames mapped by this process, by dataset id: (path, frame)
+_mapped_frames: Dict[str, Tuple[str, pd.DataFrame]] = {}
+
+
+def _resolve(arg: Any) -> Any:
+    if not isinstance(arg, SharedFrame):
+        return arg
+    if arg.frame is not None:
+        return arg.frame
+    mapped = _mapped_frames.get(arg.dataset_id)
+    if mapped is None or mapped[0] != arg.path:
+        # Drops the mapping of the previous version
+        mapped = _mapped_frames[arg.dataset_id] = (arg.path, read_frame(arg.path))
+    return mapped[1]
+
+
+def _run_task(fn: Callable[..., Any], args: Tuple[Any, ...], profile: bool = False) -> Any:
+    resolved = [_resolve(arg) for arg in args]
+    if profile:
+        # Profiled where it runs and sent back with the result
+        return run_profiled(fn, *resolved)
+    return fn(*resolved)
+
+
+def _init_process(nice: int) -> None:
+    if nice and hasattr(os, "nice"):
+        os.nice(nice)
+
+
+def _process_context():
+    # Forking a worker that runs threads (the data layer, the request pool)
+    # can deadlock the children, so start them clean
+    methods = multiprocessing.get_all_start_methods()
+    return multiprocessing.get_context("forkserver" if "forkserver" in methods else "spawn")
+
+
+class ExecutionBackend:
+    """
+    Runs the CPU-bound computations of the endpoints on a bounded pool,
+    so a few heavy requests can't take every request thread, and with the
+    "process" backend can't hold the GIL of the worker that serves every
+    other request.
+
+    At most `workers + queue_limit` computations are accepted at once;
+    `run()` rejects the others with a 503 right away instead of queueing
+    them without bound. A request that waited `timeout` seconds gets a
+    504. Running computations can't be interrupted, so one that timed out
+    keeps its slot until it finishes.
+
+    With the "process" backend, the arguments and results are pickled.
+    Pass the frames of registered datasets through `shared_frame()` so
+    the processes map them from the dataset store instead.
+    """
+
+    def __init__(
+        self,
+        kind: str = EXECUTION_BACKEND,
+        workers: int = EXECUTION_WORKERS,
+        queue_limit: int = EXECUTION_QUEUE_LIMIT,
+        timeout: float = EXECUTION_TIMEOUT_SECONDS,
+        nice: int = EXECUTION_NICE,
+    ):
+        if kind not in ("thread", "process"):
+            raise ValueError(f"Unknown execution backend '{kind}', expected 'thread' or 'process'")
+        self.kind = kind
+        self.workers = max(workers, 1)
+        self.queue_limit = max(queue_limit, 0)
+        self.timeout = timeout
+        self.nice = nice
+        self._slots = threading.BoundedSemaphore(self.workers + self.queue_limit)
+        self._executor: Optional[Executor] = None
+        self._lock = threading.Lock()
+        self.rejected = 0
+        self.timed_out = 0
+
+    def _get_executor(self) -> Executor:
+        # Created on first use so importing the app doesn't start any process
+        with self._lock:
+            if self._executor is None:
+                if self.kind == "process":
+                    self._executor = ProcessPoolExecutor(
+                        max_workers=self.workers,
+                        mp_context=_process_context(),
+                        initializer=_init_process,
+                        initargs=(self.nice,),
+                    )
+                else:
+                    self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="execution")
+                logger.info(f"Started the {self.kind} execution backend with {self.workers} workers")
+            return self._executor
+
+    def run(self, fn: Callable[..., Any], *args: Any) -> Any:
+        """
+        Runs `fn(*args)` on the pool and returns its result. `fn` must be a
+        module-level function for the "process" backend.
+
+        Raises:
+            HTTPException: 503 if the queue is full, 504 on timeout.
+        """
+        if not self._slots.acquire(blocking=False):
+            self.rejected += 1
+            raise HTTPException(
+                status_code=503,
+                detail="Too many computations in progress, retry later.",
+                headers={"Retry-After": "1"},
+            )
+        profile = is_profiling()
+        try:
+            future = self._get_executor().submit(_run_task, fn, args, profile)
+        except BaseException:
+            self._slots.release()
+            raise
+        future.add_done_callback(lambda _: self._slots.release())
+
+        try:
+            result = future.result(timeout=self.timeout or None)
+        except TimeoutError:
+            self.timed_out += 1
+            future.cancel()
+            raise HTTPException(status_code=504, detail=f"The computation took more than {self.timeout:g} seconds.")
+        except FileNotFoundError:
+            # The store file of a shared frame was replaced by a newer version
+            # before the process mapped it: send the frame itself
+            if not any(isinstance(arg, SharedFrame) for arg in args):
+                raise
+            return self.run(fn, *[arg.frame if isinstance(arg, SharedFrame) else arg for arg in args])
+        if profile:
+            result, stats, peak_memory = result
+            add_backend_profile(stats, peak_memory)
+        return result
+
+    def info(self) -> Dict[str, Any]:
+        """Backend kind, limits and rejection counters."""
+        return {
+            "backend": self.kind,
+            "workers": self.workers,
+            "queue_limit": self.queue_limit,
+            "timeout": self.timeout,
+            "rejected": self.rejected,
+            "timed_out": self.timed_out,
+        }
+
+    def shutdown(self) -> None:
+        """Stops the pool, without waiting for the computations still running."""
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+
+execution_backend = ExecutionBackend()
@@ -0,0 +1,206 @@
+import json
+import os
+from typing import Any, Dict, List, Optional
+import numpy as np
+import pandas as pd
+from dotenv import load_dotenv
+
+#################################################
+# Categorical Filter Index
+#################################################
+
+load_dotenv()
+
+# Opt-in switch: when enabled, registered datasets are filtered through a
+# CategoricalIndex instead of `filter_dataframe`
+USE_FILTER_INDEX = os.getenv("USE_FILTER_INDEX", "false").lower() == "true"
+
+# Low-cardinality columns the dashboard filters on
+INDEXED_COLUMNS = [
+    'Client Industry',
+    'Facebook Page Category',
+    'Ads Objective',
+    'Result Type',
+    'Country',
+    'Start Year',
+]
+
+# Key under which the rows holding a missing value are stored
+_MISSING = object()
+
+_EMPTY = np.array([], dtype=np.intp)
+
+# Filter value standing for a string that isn't a date
+_INVALID_DATE = object()
+
+
+def _is_missing(value: Any) -> bool:
+    return value is None or value is pd.NA or value is pd.NaT or (isinstance(value, (float, np.floating)) and np.isnan(value))
+
+
+def _is_hashable_filter(value: Any) -> bool:
+    items = value if isinstance(value, list) else [value]
+    try:
+        for item in items:
+            hash(item)
+    except TypeError:
+        return False
+    return True
+
+
+class CategoricalIndex:
+    """
+    Dictionary-encodes the low-cardinality columns of a DataFrame once and
+    keeps, for every distinct value, the sorted array of row positions
+    holding it. Filtering then becomes a set intersection of position
+    arrays instead of one full column scan (and copy) per filter key.
+
+    `filter` returns the same rows, in the same order, as
+    `filter_dataframe(df, options)`: scalar values match with `==` (so a
+    missing scalar matches nothing), list values match like `isin` (so
+    None/NaN in a list matches missing rows) and unknown columns are
+    ignored. Columns that aren't indexed fall back to a boolean mask over
+    the rows that are left.
+    """
+
+    def __init__(self, df: pd.DataFrame, columns: List[str] = INDEXED_COLUMNS):
+        self.df = df
+        self._positions: Dict[str, Dict[Any, np.ndarray]] = {}
+        for column in columns:
+            if column in df.columns:
+                self._positions[column] = self._encode(df[column])
+
+    @staticmethod
+    def _encode(series: pd.Series) -> Dict[Any, np.ndarray]:
+        codes, uniques = pd.factorize(series)
+        # A stable sort keeps the positions of each value in ascending order
+        order = np.argsort(codes, kind='stable')
+        bounds = np.searchsorted(codes[order], np.arange(-1, len(uniques) + 1))
+
+        positions = {}
+        if bounds[1] > bounds[0]:
+            positions[_MISSING] = order[bounds[0]:bounds[1]]
+        for code, value in enumerate(uniques):
+            positions[value] = order[bounds[code + 1]:bounds[code + 2]]
+        return positions
+
+    @property
+    def columns(self) -> List[str]:
+        return list(self._positions)
+
+    def _lookup(self, column: str, value: Any) -> np.ndarray:
+        positions = self._positions[column]
+        if isinstance(value, list):
+            matches = []
+            for item in value:
+                if _is_missing(item):
+                    matches.append(positions.get(_MISSING, _EMPTY))
+                else:
+                    matches.append(positions.get(item, _EMPTY))
+            if not matches:
+                return _EMPTY
+            return np.unique(np.concatenate(matches))
+        if _is_missing(value):
+            return _EMPTY
+        return positions.get(value, _EMPTY)
+
+    def filter_positions(self, options: Dict[str, Any]) -> Optional[np.ndarray]:
+        """
+        Returns the sorted row positions matching the indexed filters in
+        `options`, or None if none of the filter keys is indexed.
+        """
+        candidates = []
+        for column, value in options.items():
+            if column in self._positions and _is_hashable_filter(value):
+                candidates.append(self._lookup(column, value))
+
+        if not candidates:
+            return None
+
+        # Intersect the smallest sets first to keep the work proportional to the result
+        candidates.sort(key=len)
+        result = candidates[0]
+        for positions in candidates[1:]:
+            if len(result) == 0:
+                break
+            result = np.intersect1d(result, positions, assume_unique=True)
+        return result
+
+    def positions(self, options: Dict[str, Any]) -> np.ndarray:
+        """Returns the sorted row positions matching every filter in `options`."""
+        positions = self.filter_positions(options)
+        if positions is None:
+            positions = np.arange(len(self.df))
+
+        # Filters the index can't answer are applied to the remaining rows only
+        remaining = {
+            column: value for column, value in options.items()
+            if not (column in self._positions and _is_hashable_filter(value))
+        }
+        return scan_positions(self.df, remaining, positions)
+
+    def filter(self, options: Dict[str, Any]) -> pd.DataFrame:
+        """Filters the indexed DataFrame with the same semantics as `filter_dataframe`."""
+        return self.df.iloc[self.positions(options)]
+
+
+def coerce_filter_value(series: pd.Series, value: Any) -> Any:
+    """
+    Converts the date strings of a filter on a datetime column to
+    Timestamps, so dates are matched the way the responses show them
+    ('YYYY-MM-DD'). Strings that aren't dates match nothing. Filters on
+    other columns are returned as they are.
+    """
+    if not pd.api.types.is_datetime64_any_dtype(series.dtype):
+        return value
+
+    def to_timestamp(item: Any) -> Any:
+        if not isinstance(item, str):
+            return item
+        try:
+            return pd.Timestamp(item)
+        except ValueError:
+            return _INVALID_DATE
+
+    if isinstance(value, list):
+        return [item for item in map(to_timestamp, value) if item is not _INVALID_DATE]
+    timestamp = to_timestamp(value)
+    # An invalid date compares unequal to every row
+    return value if timestamp is _INVALID_DATE else timestamp
+
+
+def scan_positions(df: pd.DataFrame, options: Dict[str, Any], positions: Optional[np.ndarray] = None) -> np.ndarray:
+    """
+    Returns the row positions of `df` kept by `filter_dataframe(df, options)`,
+    optionally starting from a subset of `positions`. Unknown columns are
+    ignored.
+    """
+    if positions is None:
+        positions = np.arange(len(df))
+    for column, value in options.items():
+        if column not in df.columns or len(positions) == 0:
+            continue
+        values = df[column].iloc[positions]
+        value = coerce_filter_value(values, value)
+        if isinstance(value, list):
+            mask = values.isin(value)
+        else:
+            mask = values == value
+        positions = positions[mask.to_numpy(dtype=bool)]
+    return positions
+
+
+def filter_signature(options: Dict[str, Any]) -> str:
+    """
+    Returns a canonical string for `options`, so equivalent filter
+    combinations (different key order, list values in a different order
+    or repeated) map to the same cache entries.
+    """
+    normalized = {}
+    for column, value in options.items():
+        if isinstance(value, list):
+            value = sorted({json.dumps(item, default=str) for item in value})
+            normalized[column] = ["list", value]
+        else:
+            normalized[column] = ["value", json.dumps(value, default=str)]
+    return json.dumps(normalized, sort_keys=True)
@@ -1,77 +1,323 @@
+import logging
 import os
 import re
+import threading
+import numpy as np
 import pandas as pd
+import pyarrow.parquet as pq
 import boto3
 from botocore.client import Config
 from botocore.exceptions import NoCredentialsError
-from io import BytesIO
+from io import BytesIO, RawIOBase, SEEK_SET, SEEK_CUR, SEEK_END
 from dotenv import load_dotenv
 from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+from app.routers.s3_disk_cache import S3DiskCache, S3_CACHE_DIR
+from app.routers.s3_transfer import S3_MAX_POOL_CONNECTIONS, download_bytes
 
 # Load environment variables from .env file
 load_dotenv()
 
+logger = logging.getLogger(__name__)
+
 
 def get_storage_config():
     return {
         "aws_access_key_id": os.getenv("AWS_ACCESS_KEY_ID"),
         "aws_secret_access_key": os.getenv("AWS_SECRET_ACCESS_KEY"),
-        "bucket_name": os.getenv("BUCKET_NAME")
+        "bucket_name": os.getenv("BUCKET_NAME"),
+        "endpoint_url": os.getenv("S3_ENDPOINT_URL"),
+        "cache_dir": S3_CACHE_DIR,
     }
 
+class S3ObjectFile(RawIOBase):
+    """
+    Read-only, seekable file over an S3 object where every read is a ranged
+    GET. Readers that seek, like pyarrow's parquet reader, then download only
+    the byte ranges they need. It is deliberately unbuffered: pyarrow already
+    coalesces its reads, and a buffer would turn small ones into large GETs.
+    All reads are pinned to the ETag seen when the file was opened.
+    """
+    def __init__(self, s3_client, bucket_name, key):
+        self.s3_client = s3_client
+        self.bucket_name = bucket_name
+        self.key = key
+        head = s3_client.head_object(Bucket=bucket_name, Key=key)
+        self.size = head['ContentLength']
+        self.etag = head['ETag']
+        self._position = 0
+
+    def readable(self):
+        return True
+
+    def seekable(self):
+        return True
+
+    def tell(self):
+        return self._position
+
+    def seek(self, offset, whence=SEEK_SET):
+        if whence == SEEK_CUR:
+            offset += self._position
+        elif whence == SEEK_END:
+            offset += self.size
+        if offset < 0:
+            raise ValueError("Negative seek position.")
+        self._position = offset
+        return self._position
+
+    def read(self, size=-1):
+        end = self.size if size is None or size < 0 else min(self._position + size, self.size)
+        if end <= self._position:
+            return b''
+        obj = self.s3_client.get_object(
+            Bucket=self.bucket_name,
+            Key=self.key,
+            Range=f'bytes={self._position}-{end - 1}',
+            IfMatch=self.etag,
+        )
+        data = obj['Body'].read()
+        self._position += len(data)
+        return data
+
+    def readinto(self, b):
+        data = self.read(len(b))
+        b[:len(data)] = data
+        return len(data)
+
 class ImportDataS3:
     """Class to load data from AWS S3"""
-    def __init__(self, aws_access_key_id, aws_secret_access_key, bucket_name):
+    def __init__(self, aws_access_key_id, aws_secret_access_key, bucket_name, endpoint_url=None, cache: Optional[S3DiskCache] = None):
         if not aws_access_key_id or not aws_secret_access_key:
             raise NoCredentialsError()
         self.s3_client = boto3.client(
             's3',
             aws_access_key_id=aws_access_key_id,
             aws_secret_access_key=aws_secret_access_key,
-            config=Config(signature_version='s3v4')
+            endpoint_url=endpoint_url,
+            config=Config(signature_version='s3v4', max_pool_connections=S3_MAX_POOL_CONNECTIONS)
         )
         self.bucket_name = bucket_name
+        self.cache = cache
 
-    def load_df(self, key):
-        """Loads data in either .CSV or .parquet format."""
+    def load_df(self, key, columns=None, filters=None):
+        """
+        Loads data in either .CSV or .parquet format.
+
+        `columns` restricts the columns read (names missing from the file are
+        skipped). `filters` (parquet only, in pyarrow's format, e.g.
+        `[('Result Type', 'in', ['Link Click'])]`) skips the row groups whose
+        statistics rule them out and drops the other non-matching rows.
+        Without the disk cache, parquet objects are read with ranged GETs, so
+        only the footer and the column chunks needed are downloaded. With
+        it, the whole object is downloaded once per ETag and both only cut
+        the parsing.
+        """
         try:
-            obj = self.s3_client.get_object(Bucket=self.bucket_name, Key=key)
-            if key.endswith('.csv'):
-                return pd.read_csv(BytesIO(obj['Body'].read()))
+            if self.cache is not None:
+                # Up-to-date copy on disk, downloaded only if the ETag changed
+                source, _ = self.cache.open(self.s3_client, self.bucket_name, key)
             elif key.endswith('.parquet'):
-                return pd.read_parquet(BytesIO(obj['Body'].read()))
+                source = self.open_object_file(key)
             else:
-                raise ValueError("Unsupported file type.")
+                source = BytesIO(download_bytes(self.s3_client, self.bucket_name, key))
+            with source:
+                if key.endswith('.csv'):
+                    if filters is not None:
+                        raise ValueError("Filters are only supported for parquet files.")
+                    usecols = None if columns is None else set(columns).__contains__
+                    return pd.read_csv(source, usecols=usecols)
+                elif key.endswith('.parquet'):
+                    if columns is not None:
+                        available = set(pq.read_schema(source).names)
+                        columns = [column for column in columns if column in available]
+                    return pd.read_parquet(source, columns=columns, filters=filters)
+                else:
+                    raise ValueError("Unsupported file type.")
         except NoCredentialsError:
             raise
         except Exception as e:
             raise Exception(f"Failed to load data from S3: {str(e)}") from e
 
-# Load AWS credentials from environment variables
-aws_access_key_id = os.getenv("AWS_ACCESS_KEY_ID")
-aws_secret_access_key = os.getenv("AWS_SECRET_ACCESS_KEY")
-bucket_name = os.getenv("BUCKET_NAME")
+    def open_object_file(self, key):
+        """Returns a seekable, read-only file over an object, read with ranged GETs."""
+        return S3ObjectFile(self.s3_client, self.bucket_name, key)
+
+    def get_etag(self, key):
+        """Returns the ETag of an object, which changes whenever the object is rewritten."""
+        try:
+            return self.s3_client.head_object(Bucket=self.bucket_name, Key=key)['ETag']
+        except NoCredentialsError:
+            raise
+        except Exception as e:
+            raise Exception(f"Failed to read object metadata from S3: {str(e)}") from e
+
+    def get_object_info(self, key):
+        """Returns the ETag and size in bytes of an object."""
+        head = self.s3_client.head_object(Bucket=self.bucket_name, Key=key)
+        return head['ETag'], head['ContentLength']
+
+    def open_object(self, key, etag=None, start=None, end=None):
+        """
+        Returns the streaming body of an object, or of its bytes `start` to
+        `end` (inclusive). With `etag`, S3 refuses to serve any other version.
+        """
+        request = {'Bucket': self.bucket_name, 'Key': key}
+        if etag is not None:
+            request['IfMatch'] = etag
+        if start is not None:
+            request['Range'] = f'bytes={start}-{end}'
+        return self.s3_client.get_object(**request)['Body']
+
+    def fetch_file(self, key):
+        """
+        Returns an up-to-date copy of an object in the disk cache, opened
+        for reading (it stays readable if a newer version replaces it), and
+        its ETag. The caller closes the file.
+        """
+        return self.cache.open(self.s3_client, self.bucket_name, key)
+
+_s3_storage = None
+_s3_storage_lock = threading.Lock()
 
-# Initialize the ImportDataS3 instance
-decoris_dl = ImportDataS3(aws_access_key_id, aws_secret_access_key, bucket_name)
+def get_s3_storage() -> ImportDataS3:
+    """
+    Returns the ImportDataS3 instance shared by every loader in the process.
+    It is created on first use rather than at import, so importing the app
+    never waits on (or fails because of) S3.
+    """
+    global _s3_storage
+    if _s3_storage is None:
+        with _s3_storage_lock:
+            if _s3_storage is None:
+                storage_config = get_storage_config()
+                cache = S3DiskCache(storage_config['cache_dir']) if storage_config['cache_dir'] else None
+                _s3_storage = ImportDataS3(
+                    storage_config['aws_access_key_id'],
+                    storage_config['aws_secret_access_key'],
+                    storage_config['bucket_name'],
+                    endpoint_url=storage_config['endpoint_url'],
+                    cache=cache,
+                )
+    return _s3_storage
 
 def load_clients_df() -> pd.DataFrame:
     """Loads the clients dataframe."""
-    return decoris_dl.load_df('clients_data_final.parquet')
+    return get_s3_storage().load_df('clients_data_final.parquet')
 
 def load_roas_df() -> pd.DataFrame:
     """Loads the ROAS dataframe."""
-    df = decoris_dl.load_df('roas_final.csv')
+    df = get_s3_storage().load_df('roas_final.csv')
     df['Campaign ID'] = df['Campaign ID'].astype('string')
     df['Start Date'] = pd.to_datetime(df['Start Date'], format='%Y-%m-%d')
     df['Stop Date'] = pd.to_datetime(df['Stop Date'], format='%Y-%m-%d')
     return df.sort_values(['Start Date'], ascending=False)
 
 
-def load_campaigns_df() -> pd.DataFrame:
-    """Loads the Campaigns dataframe."""
-    df = decoris_dl.load_df('campaign_final.parquet')
-    df['Campaign ID'] = df['Campaign ID'].astype('string')
+# Columns the dashboard reads from each table; the rest is never downloaded
+CAMPAIGN_COLUMNS = [
+    'Start Date',
+    'Stop Date',
+    'Client Industry',
+    'Facebook Page Category',
+    'Ads Objective',
+    'Facebook Page Name',
+    'Amount Spent',
+    'Impressions',
+    'Reach',
+    'Result Type',
+    'Total Results',
+    'Cost per Result',
+    'Cost per Mile',
+    'Campaign Name',
+    'Campaign ID',
+    'Account ID',
+    'Company Name',
+    'Country',
+    'Start Year',
+    'Start Month',
+    'Median CPR',
+]
+
+ADSETS_COLUMNS = [
+    'Client Industry',
+    'Facebook Page Name',
+    'Facebook Page Category',
+    'Adset Name',
+    'Result Type',
+    'Total Results',
+    'Age Range',
+    'Gender',
+    'Country',
+    'Psychographic',
+    'Custom Audiences',
+    'Campaign Name',
+    'Campaign ID',
+    'Adset ID',
+    'Start Date',
+    'End Date'
+]
+
+# In-memory dtypes of the campaign columns. Low-cardinality text is
+# categorical, unique text is Arrow-backed, and dates stay datetime64:
+# they are formatted as 'YYYY-MM-DD' when a response is serialized.
+# Measures stay float64, since they reach the responses and the stats.
+CAMPAIGN_SCHEMA = {
+    'Start Date': 'datetime64[ns]',
+    'Stop Date': 'datetime64[ns]',
+    'Client Industry': 'category',
+    'Facebook Page Category': 'category',
+    'Ads Objective': 'category',
+    'Facebook Page Name': 'category',
+    'Impressions': 'int64',
+    'Reach': 'int64',
+    'Result Type': 'category',
+    'Total Results': 'int64',
+    'Campaign Name': 'string[pyarrow]',
+    'Campaign ID': 'string[pyarrow]',
+    'Account ID': 'category',
+    'Company Name': 'category',
+    'Country': 'category',
+    'Start Year': 'int16',
+    'Start Month': 'category',
+}
+
+def apply_schema(df: pd.DataFrame, schema: Dict[str, str]) -> pd.DataFrame:
+    """
+    Casts the columns of `df` to the dtypes in `schema`, in place. Missing
+    columns are skipped, and so are integer casts that would lose values
+    (missing, fractional or out of range ones).
+
+    Args:
+        df (pd.DataFrame): The DataFrame to cast.
+        schema (Dict[str, str]): The dtype of each column.
+
+    Returns:
+        pd.DataFrame: `df`, with its columns cast.
+    """
+    for column, dtype in schema.items():
+        if column not in df.columns or df[column].dtype == dtype:
+            continue
+        try:
+            values = df[column].astype(dtype)
+        except (TypeError, ValueError):
+            logger.warning(f"Column '{column}' kept as {df[column].dtype}: it can't be cast to {dtype}")
+            continue
+        if pd.api.types.is_integer_dtype(values.dtype) and not (values == df[column]).all():
+            logger.warning(f"Column '{column}' kept as {df[column].dtype}: casting it to {dtype} would change its values")
+            continue
+        df[column] = values
+    return df
+
+def load_campaigns_df(filters: Optional[List[Tuple[str, str, Any]]] = None) -> pd.DataFrame:
+    """
+    Loads the Campaigns dataframe, with the dtypes of CAMPAIGN_SCHEMA.
+
+    `filters` is pushed down to the parquet reader (see
+    `ImportDataS3.load_df`), so it applies to the stored values, e.g.
+    `[('Result Type', 'in', ['link_click'])]` before the title casing.
+    """
+    df = get_s3_storage().load_df('campaign_final.parquet', columns=CAMPAIGN_COLUMNS, filters=filters)
     df['Result Type'] = df['Result Type'].str.replace('_', ' ').str.title()
     df['Ads Objective'] = df['Ads Objective'].str.replace('_', ' ').str.title()
     
@@ -80,12 +326,8 @@ def load_campaigns_df() -> pd.DataFrame:
     df['Stop Date'] = pd.to_datetime(df['Stop Date'], format='%Y-%m-%d', errors='coerce', dayfirst=True)
 
     # Fill NaT with default dates
-    df['Start Date'] = df['Start Date'].fillna('2019-01-01')
-    df['Stop Date'] = df['Stop Date'].fillna(datetime.today().strftime('%Y-%m-%d'))
-    
-    # Ensure dates are in a format that is JSON serializable
-    df['Start Date'] = df['Start Date'].dt.strftime('%Y-%m-%d')
-    df['Stop Date'] = df['Stop Date'].dt.strftime('%Y-%m-%d')
+    df['Start Date'] = df['Start Date'].fillna(pd.Timestamp('2019-01-01'))
+    df['Stop Date'] = df['Stop Date'].fillna(pd.Timestamp(datetime.today().date()))
 
     # Convert 'Cost per Result' and 'Cost per Mile' to numeric
     df['Cost per Result'] = pd.to_numeric(df['Cost per Result'], errors='coerce')
@@ -95,49 +337,69 @@ def load_campaigns_df() -> pd.DataFrame:
     if 'Median CPR' not in df.columns:
         df['Median CPR'] = 0  # or some default value
 
-    return df.sort_values(['Start Date'], ascending=False)
+    return apply_schema(df, CAMPAIGN_SCHEMA).sort_values(['Start Date'], ascending=False)
+
+
+
+# One "LABEL: items" group of the Psychographic targeting text
+PSYCHOGRAPHIC_PATTERN = r'(?P<label>\b[A-Z]+\b):[ \t]+(?P<items>.*?)(?=[A-Z]+:|$)'
+
+def format_psychographic(psychographic: pd.Series) -> pd.Series:
+    """
+    Rewrites the Psychographic targeting text as one "LABEL:\nitem, item"
+    block per label. A label repeated in the text keeps its first position
+    and its last items. Missing values are left as they are.
 
+    Many adsets share the same targeting, so only the unique values are
+    formatted, with vectorized string operations, and then mapped back
+    to the rows.
 
+    Args:
+        psychographic (pd.Series): The raw Psychographic column.
 
-def load_adsets_df() -> pd.DataFrame:
-    """Loads the Adsets dataframe."""
-    df = decoris_dl.load_df('adsets_final.parquet')
+    Returns:
+        pd.Series: The formatted column, aligned with `psychographic`.
+    """
+    codes, uniques = pd.factorize(psychographic)
+    text = pd.Series(uniques, dtype=object)
+    text = text.str.replace('"', " ", regex=False).str.replace(":,", ": ", regex=False)
+
+    matches = text.str.extractall(PSYCHOGRAPHIC_PATTERN, flags=re.MULTILINE)
+    formatted = pd.Series("", index=text.index, dtype=object)
+    if len(matches):
+        matches = matches.reset_index(names=['value', 'match'])
+        # extractall reports groups that matched an empty string as missing
+        matches['items'] = matches['items'].fillna("")
+        groups = matches.groupby(['value', 'label'], sort=False).agg(position=('match', 'first'), items=('items', 'last'))
+        groups = groups.reset_index().sort_values(['value', 'position'], kind='stable')
+        # Same as stripping each comma separated item and joining them back with ", "
+        items = groups['items'].str.strip().str.replace(r'\s*,\s*', ', ', regex=True)
+        blocks = (groups['label'] + ":\n" + items).to_numpy()
+        # Join the blocks of each value with newlines: concatenate the runs of
+        # consecutive rows, with a newline after every block but the last
+        values = groups['value'].to_numpy()
+        starts = np.flatnonzero(np.r_[True, values[1:] != values[:-1]])
+        last = np.r_[starts[1:] - 1, len(values) - 1]
+        separators = np.full(len(blocks), "\n", dtype=object)
+        separators[last] = ""
+        formatted.iloc[values[starts]] = np.add.reduceat(blocks + separators, starts)
+
+    values = pd.api.extensions.take(formatted.to_numpy(), codes, allow_fill=True)
+    result = pd.Series(values, index=psychographic.index, name=psychographic.name, dtype=object)
+    return result.where(codes >= 0, psychographic)
+
+def load_adsets_df(filters: Optional[List[Tuple[str, str, Any]]] = None) -> pd.DataFrame:
+    """
+    Loads the Adsets dataframe. `filters` is pushed down to the parquet
+    reader, on the stored values, like in `load_campaigns_df`.
+    """
+    df = get_s3_storage().load_df('adsets_final.parquet', columns=ADSETS_COLUMNS, filters=filters)
     df['Result Type'] = df['Result Type'].str.replace('_', ' ').str.title()
     df[['Adset ID', 'Campaign ID']] = df[['Adset ID', 'Campaign ID']].astype('string')
 
-    pattern = r'(\b[A-Z]+\b):[ \t]+(.*?)(?=[A-Z]+:|$)'
-
-    def format_text(text):
-        matches = re.findall(pattern, text, re.MULTILINE)
-        formatted_data = {label: items.split(",") for label, items in matches}
-
-        temp = []
-        for label, items in formatted_data.items():
-            temp.append(f"{label}:\n{', '.join(map(str.strip, items))}")
-
-        final_data = "\n".join(temp)
-        return final_data
-
-    df['Psychographic'] = df['Psychographic'].str.replace('"', " ").str.replace(":,", ": ").apply(format_text)
-
-    return df[[
-        'Client Industry',
-        'Facebook Page Name',
-        'Facebook Page Category',
-        'Adset Name',
-        'Result Type',
-        'Total Results',
-        'Age Range',
-        'Gender',
-        'Country',
-        'Psychographic',
-        'Custom Audiences',
-        'Campaign Name',
-        'Campaign ID',
-        'Adset ID',
-        'Start Date',
-        'End Date'
-    ]]
+    df['Psychographic'] = format_psychographic(df['Psychographic'])
+
+    return df[ADSETS_COLUMNS]
 
 def convert_df(df: pd.DataFrame):
     """Converts a pandas dataframe to CSV for download."""
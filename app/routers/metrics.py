@@ -0,0 +1,235 @@
+import bisect
+import os
+import threading
+import time
+from contextlib import nullcontext
+from contextvars import ContextVar
+from typing import Any, Callable, Coroutine, Dict, List, Optional, Sequence, Tuple
+from dotenv import load_dotenv
+from fastapi import Request, Response
+from fastapi.routing import APIRoute
+from pydantic import BaseModel, model_validator
+
+#################################################
+# Request Metrics
+#################################################
+
+load_dotenv()
+
+# Set to false to drop the middleware and make every stage timer a no-op
+METRICS_ENABLED = os.getenv("METRICS_ENABLED", "true").lower() == "true"
+
+# Content type of the Prometheus text exposition format
+METRICS_MEDIA_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+DURATION_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+ROW_BUCKETS = (1, 10, 100, 1_000, 10_000, 100_000, 1_000_000, 10_000_000)
+BYTE_BUCKETS = (1_024, 16_384, 131_072, 1_048_576, 8_388_608, 67_108_864, 536_870_912)
+
+
+class Histogram:
+    """
+    Prometheus-style histogram with one series per combination of label
+    values. Observing a value costs a bisect and a few increments under a
+    lock; buckets are only made cumulative when the metrics are rendered.
+    """
+
+    def __init__(self, name: str, documentation: str, label_names: Sequence[str], buckets: Sequence[float]):
+        self.name = name
+        self.documentation = documentation
+        self.label_names = tuple(label_names)
+        self.buckets = tuple(buckets)
+        # label values -> [count of each bucket, then of +Inf, sum]
+        self._series: Dict[Tuple[str, ...], List[float]] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, *labels: str) -> None:
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(labels)
+            if series is None:
+                series = self._series[labels] = [0] * (len(self.buckets) + 1) + [0.0]
+            series[index] += 1
+            series[-1] += value
+
+    def clear(self) -> None:
+        with self._lock:
+            self._series.clear()
+
+    def render(self) -> List[str]:
+        """Returns the lines of the histogram in the Prometheus text format."""
+        with self._lock:
+            series = {labels: list(values) for labels, values in self._series.items()}
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} histogram"]
+        for labels, values in sorted(series.items()):
+            label_text = ",".join(f'{name}="{_escape(value)}"' for name, value in zip(self.label_names, labels))
+            prefix = label_text + "," if label_text else ""
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), values[:-1]):
+                cumulative += count
+                le = "+Inf" if bound == float("inf") else f"{bound:g}"
+                lines.append(f'{self.name}_bucket{{{prefix}le="{le}"}} {cumulative}')
+            lines.append(f"{self.name}_sum{{{label_text}}} {values[-1]}")
+            lines.append(f"{self.name}_count{{{label_text}}} {cumulative}")
+        return lines
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+REQUEST_DURATION = Histogram(
+    "roas_request_duration_seconds", "Time to answer a request.", ("endpoint", "method", "status"), DURATION_BUCKETS
+)
+REQUEST_BYTES = Histogram("roas_request_body_bytes", "Size of the request bodies.", ("endpoint",), BYTE_BUCKETS)
+RESPONSE_BYTES = Histogram("roas_response_body_bytes", "Size of the response bodies.", ("endpoint",), BYTE_BUCKETS)
+STAGE_DURATION = Histogram(
+    "roas_stage_duration_seconds", "Time spent in each stage of a request.", ("endpoint", "stage"), DURATION_BUCKETS
+)
+PAYLOAD_ROWS = Histogram(
+    "roas_payload_rows", "Rows received (in) and returned (out) by the DataFrame endpoints.", ("endpoint", "direction"), ROW_BUCKETS
+)
+HISTOGRAMS = [REQUEST_DURATION, REQUEST_BYTES, RESPONSE_BYTES, STAGE_DURATION, PAYLOAD_ROWS]
+
+
+def render_metrics() -> str:
+    """Returns every metric in the Prometheus text format."""
+    return "\n".join(line for histogram in HISTOGRAMS for line in histogram.render()) + "\n"
+
+
+#################################################
+# Stage Timers
+#################################################
+
+# Path of the route handling the current request, set by TimedRoute
+_endpoint: ContextVar[Optional[str]] = ContextVar("metrics_endpoint", default=None)
+
+_NO_STAGE = nullcontext()
+
+
+class _Stage:
+    __slots__ = ("endpoint", "name", "start")
+
+    def __init__(self, endpoint: str, name: str):
+        self.endpoint = endpoint
+        self.name = name
+
+    def __enter__(self) -> None:
+        self.start = time.perf_counter()
+
+    def __exit__(self, *exc_info: Any) -> None:
+        STAGE_DURATION.observe(time.perf_counter() - self.start, self.endpoint, self.name)
+
+
+def stage(name: str):
+    """
+    Context manager timing a stage of the current request (e.g. "filter")
+    into `roas_stage_duration_seconds`. Outside a TimedRoute request, or
+    with METRICS_ENABLED off, it does nothing.
+    """
+    endpoint = _endpoint.get()
+    if endpoint is None:
+        return _NO_STAGE
+    return _Stage(endpoint, name)
+
+
+def observe_rows(direction: str, rows: int) -> None:
+    """Records the rows received ("in") or returned ("out") by the current request."""
+    endpoint = _endpoint.get()
+    if endpoint is not None:
+        PAYLOAD_ROWS.observe(rows, endpoint, direction)
+
+
+class TimedRoute(APIRoute):
+    """
+    Route whose requests can be timed with `stage()`. The whole route
+    handler is recorded as the "total" stage, and decoding a JSON body as
+    "decode".
+    """
+
+    def get_route_handler(self) -> Callable[[Request], Coroutine[Any, Any, Response]]:
+        handler = super().get_route_handler()
+        if not METRICS_ENABLED:
+            return handler
+        endpoint = self.path
+
+        async def timed_handler(request: Request) -> Response:
+            token = _endpoint.set(endpoint)
+            try:
+                with stage("total"):
+                    if request.headers.get("content-type", "").startswith("application/json"):
+                        with stage("decode"):
+                            try:
+                                # Cached on the request, so FastAPI doesn't decode it again
+                                await request.json()
+                            except ValueError:
+                                # Left for FastAPI to report
+                                pass
+                    return await handler(request)
+            finally:
+                _endpoint.reset(token)
+
+        return timed_handler
+
+
+class TimedModel(BaseModel):
+    """Request model whose validation is recorded as the "validate" stage."""
+
+    @model_validator(mode="wrap")
+    @classmethod
+    def _time_validation(cls, data: Any, handler: Callable[[Any], Any]) -> Any:
+        with stage("validate"):
+            return handler(data)
+
+
+#################################################
+# Metrics Middleware
+#################################################
+
+class MetricsMiddleware:
+    """
+    ASGI middleware recording the duration, status and body sizes of
+    every HTTP request, labelled with the path of the matched route.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        start = time.perf_counter()
+        received = sent = 0
+        status = 500
+
+        async def counting_receive():
+            nonlocal received
+            message = await receive()
+            if message["type"] == "http.request":
+                received += len(message.get("body", b""))
+            return message
+
+        async def counting_send(message):
+            nonlocal sent, status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            elif message["type"] == "http.response.body":
+                sent += len(message.get("body", b""))
+            await send(message)
+
+        try:
+            await self.app(scope, counting_receive, counting_send)
+        finally:
+            route = scope.get("route")
+            if route is not None:
+                endpoint = route.path
+            elif scope.get("endpoint") is not None:
+                endpoint = scope["path"]
+            else:
+                # Keeps unknown paths from creating a series each
+                endpoint = "unmatched"
+            REQUEST_DURATION.observe(time.perf_counter() - start, endpoint, scope["method"], str(status))
+            REQUEST_BYTES.observe(received, endpoint)
+            RESPONSE_BYTES.observe(sent, endpoint)
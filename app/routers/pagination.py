@@ -0,0 +1,77 @@
+import hashlib
+import os
+import threading
+from dataclasses import dataclass
+from typing import Any, Dict, Optional
+import numpy as np
+from cachetools import TTLCache
+from dotenv import load_dotenv
+from app.routers.filter_engine import filter_signature
+
+#################################################
+# Cursor Pagination
+#################################################
+
+load_dotenv()
+
+RESULT_SET_CACHE_SIZE = int(os.getenv("RESULT_SET_CACHE_SIZE", "128"))
+RESULT_SET_CACHE_TTL = int(os.getenv("RESULT_SET_CACHE_TTL", "600"))
+
+
+@dataclass(frozen=True)
+class ResultSet:
+    """Row positions of a version of a registered dataset matching one filter combination."""
+    dataset_id: str
+    positions: np.ndarray
+    version: Optional[str] = None
+
+    @property
+    def total_rows(self) -> int:
+        return len(self.positions)
+
+    def total_pages(self, size: int) -> int:
+        return -(-self.total_rows // size) if size > 0 else 0
+
+    def page_positions(self, page: int, size: int) -> np.ndarray:
+        start = (page - 1) * size
+        return self.positions[max(start, 0):max(start + size, 0)]
+
+
+class ResultSetCache:
+    """
+    Size-bounded TTL cache of filtered result sets. Each entry is keyed
+    by an opaque cursor derived from the dataset id and the filter
+    combination, so every page after the first one slices the cached
+    row positions instead of filtering the whole dataset again.
+    """
+
+    def __init__(self, maxsize: int = RESULT_SET_CACHE_SIZE, ttl: int = RESULT_SET_CACHE_TTL):
+        self._cache: TTLCache = TTLCache(maxsize=maxsize, ttl=ttl)
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def cursor_for(dataset_id: str, filter_options: Dict[str, Any]) -> str:
+        """Returns the cursor identifying `filter_options` applied to `dataset_id`."""
+        signature = f"{dataset_id}\n{filter_signature(filter_options)}"
+        return hashlib.sha256(signature.encode("utf-8")).hexdigest()[:32]
+
+    def get(self, cursor: str) -> Optional[ResultSet]:
+        with self._lock:
+            return self._cache.get(cursor)
+
+    def put(self, cursor: str, result_set: ResultSet) -> None:
+        with self._lock:
+            self._cache[cursor] = result_set
+
+    def invalidate_dataset(self, dataset_id: str) -> None:
+        """Drops every result set of `dataset_id`, whose row positions no longer apply."""
+        with self._lock:
+            for cursor in [cursor for cursor, result_set in self._cache.items() if result_set.dataset_id == dataset_id]:
+                del self._cache[cursor]
+
+    def clear(self) -> None:
+        with self._lock:
+            self._cache.clear()
+
+
+result_set_cache = ResultSetCache()
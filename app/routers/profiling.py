@@ -0,0 +1,345 @@
+import asyncio
+import cProfile
+import functools
+import hmac
+import io
+import logging
+import marshal
+import os
+import pstats
+import random
+import threading
+import time
+import tracemalloc
+import uuid
+from collections import deque
+from contextvars import ContextVar
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from typing import Any, Callable, Coroutine, Deque, Dict, List, Optional, Tuple
+from dotenv import load_dotenv
+from fastapi import APIRouter, Depends, Header, HTTPException, Request, Response
+from fastapi.responses import PlainTextResponse
+from fastapi.routing import APIRoute
+
+#################################################
+# Request Profiling
+#################################################
+
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+# Fraction of the requests profiled at random (0 disables sampling)
+PROFILE_SAMPLE_RATE = float(os.getenv("PROFILE_SAMPLE_RATE", "0"))
+
+# Sampled profiles are only kept for requests slower than this; requests
+# asking for a profile with the header always keep theirs
+PROFILE_THRESHOLD_SECONDS = float(os.getenv("PROFILE_THRESHOLD_SECONDS", "1.0"))
+
+# Number of profiles kept, the oldest being dropped first
+PROFILE_BUFFER_SIZE = int(os.getenv("PROFILE_BUFFER_SIZE", "20"))
+
+# Token enabling the profile header (which must carry it) and the profile
+# endpoints (in their X-Profile-Token header). Unset, both are disabled and
+# only sampling profiles requests.
+PROFILE_TOKEN = os.getenv("PROFILE_TOKEN", "")
+
+# Functions listed in the text report of a profile
+PROFILE_TOP_FUNCTIONS = int(os.getenv("PROFILE_TOP_FUNCTIONS", "40"))
+
+# Request header asking for a profile of the request (carrying PROFILE_TOKEN)
+PROFILE_HEADER = "X-Profile"
+
+# Response header carrying the id of the profile kept for the request
+PROFILE_ID_HEADER = "X-Profile-Id"
+
+
+@dataclass(frozen=True)
+class RequestProfile:
+    """
+    Profile of one request: the cProfile statistics of the request (its
+    event loop part, its endpoint thread and its execution backend tasks,
+    merged) and the peak of memory traced by tracemalloc meanwhile.
+    """
+    id: str
+    endpoint: str
+    method: str
+    trigger: str
+    started_at: str
+    duration: float
+    status_code: int
+    peak_memory: int
+    backend_peak_memory: Optional[int]
+    report: str
+    stats: bytes
+
+    def summary(self) -> Dict[str, Any]:
+        return {
+            "id": self.id,
+            "endpoint": self.endpoint,
+            "method": self.method,
+            "trigger": self.trigger,
+            "started_at": self.started_at,
+            "duration": round(self.duration, 6),
+            "status_code": self.status_code,
+            "peak_memory": self.peak_memory,
+            "backend_peak_memory": self.backend_peak_memory,
+        }
+
+
+class ProfileStore:
+    """Ring buffer of the last `maxsize` request profiles."""
+
+    def __init__(self, maxsize: int = PROFILE_BUFFER_SIZE):
+        self._profiles: Deque[RequestProfile] = deque(maxlen=max(maxsize, 1))
+        self._lock = threading.Lock()
+
+    def add(self, profile: RequestProfile) -> None:
+        with self._lock:
+            self._profiles.append(profile)
+
+    def list(self) -> List[RequestProfile]:
+        """Returns the stored profiles, newest first."""
+        with self._lock:
+            return list(reversed(self._profiles))
+
+    def get(self, profile_id: str) -> Optional[RequestProfile]:
+        with self._lock:
+            return next((profile for profile in self._profiles if profile.id == profile_id), None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._profiles.clear()
+
+
+profile_store = ProfileStore()
+
+
+#################################################
+# Profiling Sessions
+#################################################
+
+class _RawStats:
+    """cProfile statistics received from another process, in the shape pstats.Stats.add() takes."""
+
+    def __init__(self, stats: Dict):
+        self.stats = stats
+
+    def create_stats(self) -> None:
+        pass
+
+
+class _Session:
+    """Profiles collected for one request, from every thread and process it ran on."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.sources: List[Any] = []
+        self.backend_peak_memory: Optional[int] = None
+
+    def add(self, source: Any, peak_memory: Optional[int] = None) -> None:
+        with self._lock:
+            self.sources.append(source)
+            if peak_memory is not None:
+                self.backend_peak_memory = max(self.backend_peak_memory or 0, peak_memory)
+
+
+_session: ContextVar[Optional[_Session]] = ContextVar("profiling_session", default=None)
+
+# tracemalloc is process-wide: one request is profiled at a time
+_profiling_lock = threading.Lock()
+
+
+def is_profiling() -> bool:
+    """Returns True if the current request is being profiled."""
+    return _session.get() is not None
+
+
+def add_backend_profile(stats: Dict, peak_memory: Optional[int]) -> None:
+    """Adds the statistics of an execution backend task to the current request's profile."""
+    session = _session.get()
+    if session is not None:
+        session.add(_RawStats(stats), peak_memory)
+
+
+def run_profiled(fn: Callable[..., Any], *args: Any) -> Tuple[Any, Dict, Optional[int]]:
+    """
+    Runs `fn(*args)` under cProfile, for the execution backend. Returns its
+    result, the profile statistics and, if this process wasn't tracing
+    memory already, the peak of memory traced during the call.
+    """
+    profiler = cProfile.Profile()
+    trace = not tracemalloc.is_tracing()
+    if trace:
+        tracemalloc.start()
+    profiler.enable()
+    try:
+        result = fn(*args)
+    finally:
+        profiler.disable()
+        peak = tracemalloc.get_traced_memory()[1] if trace else None
+        if trace:
+            tracemalloc.stop()
+    profiler.create_stats()
+    return result, profiler.stats, peak
+
+
+def _profiled_call(call: Callable[..., Any]) -> Callable[..., Any]:
+    # Sync endpoints run on a pool thread, which the request's profiler
+    # doesn't see: profile the call there
+    @functools.wraps(call)
+    def profiled(*args: Any, **kwargs: Any) -> Any:
+        session = _session.get()
+        if session is None:
+            return call(*args, **kwargs)
+        profiler = cProfile.Profile()
+        profiler.enable()
+        try:
+            return call(*args, **kwargs)
+        finally:
+            profiler.disable()
+            session.add(profiler)
+
+    return profiled
+
+
+def _trigger(request: Request) -> Optional[str]:
+    value = request.headers.get(PROFILE_HEADER)
+    if value is not None and PROFILE_TOKEN and hmac.compare_digest(value, PROFILE_TOKEN):
+        return "header"
+    if PROFILE_SAMPLE_RATE > 0 and random.random() < PROFILE_SAMPLE_RATE:
+        return "sample"
+    return None
+
+
+def _build_profile(
+    session: _Session, request: Request, endpoint: str, trigger: str, started_at: float, duration: float, status_code: int, peak: int
+) -> RequestProfile:
+    stats = pstats.Stats(*session.sources)
+    report = io.StringIO()
+    stats.stream = report
+    stats.sort_stats("cumulative").print_stats(PROFILE_TOP_FUNCTIONS)
+    return RequestProfile(
+        id=uuid.uuid4().hex,
+        endpoint=endpoint,
+        method=request.method,
+        trigger=trigger,
+        started_at=datetime.fromtimestamp(started_at, timezone.utc).isoformat(),
+        duration=duration,
+        status_code=status_code,
+        peak_memory=peak,
+        backend_peak_memory=session.backend_peak_memory,
+        report=report.getvalue(),
+        stats=marshal.dumps(stats.stats),
+    )
+
+
+class ProfiledRoute(APIRoute):
+    """
+    Route whose requests can be profiled: those sent with `X-Profile`
+    carrying the PROFILE_TOKEN (when set), and a PROFILE_SAMPLE_RATE
+    fraction of the others, kept if slower than PROFILE_THRESHOLD_SECONDS. Kept profiles
+    go to `profile_store` and their id is returned in `X-Profile-Id`.
+
+    The profile covers the async part of the request (body decoding and
+    validation, on the event loop, where other requests' coroutines can
+    show up too), the sync endpoint on its pool thread and the tasks it
+    runs on the execution backend. Memory is traced process-wide, so a
+    request is only profiled while no other one is.
+    """
+
+    def __init__(self, path: str, endpoint: Callable[..., Any], **kwargs: Any):
+        super().__init__(path, endpoint, **kwargs)
+        # The request handler calls `dependant.call` on each request
+        if not asyncio.iscoroutinefunction(self.dependant.call):
+            self.dependant.call = _profiled_call(self.dependant.call)
+
+    def get_route_handler(self) -> Callable[[Request], Coroutine[Any, Any, Response]]:
+        handler = super().get_route_handler()
+        endpoint = self.path
+
+        async def profiled_handler(request: Request) -> Response:
+            trigger = _trigger(request)
+            if trigger is None or not _profiling_lock.acquire(blocking=False):
+                return await handler(request)
+
+            session = _Session()
+            token = _session.set(session)
+            was_tracing = tracemalloc.is_tracing()
+            if was_tracing:
+                tracemalloc.reset_peak()
+            else:
+                tracemalloc.start()
+            profiler = cProfile.Profile()
+            started_at, start = time.time(), time.perf_counter()
+            status_code = 500
+            response = None
+            profiler.enable()
+            try:
+                response = await handler(request)
+                status_code = response.status_code
+            finally:
+                profiler.disable()
+                duration = time.perf_counter() - start
+                peak = tracemalloc.get_traced_memory()[1]
+                if not was_tracing:
+                    tracemalloc.stop()
+                _session.reset(token)
+                _profiling_lock.release()
+
+                if trigger == "header" or duration >= PROFILE_THRESHOLD_SECONDS:
+                    session.add(profiler)
+                    profile = _build_profile(session, request, endpoint, trigger, started_at, duration, status_code, peak)
+                    profile_store.add(profile)
+                    logger.info(f"Profiled {request.method} {endpoint} in {duration:.3f} s (profile {profile.id})")
+                    if response is not None:
+                        response.headers[PROFILE_ID_HEADER] = profile.id
+            return response
+
+        return profiled_handler
+
+
+#################################################
+# Profile Endpoints
+#################################################
+
+def require_profile_token(x_profile_token: Optional[str] = Header(None)) -> None:
+    """
+    Checks the X-Profile-Token header. The profile endpoints don't exist
+    (404) until PROFILE_TOKEN is set.
+    """
+    if not PROFILE_TOKEN:
+        raise HTTPException(status_code=404, detail="Not Found")
+    if not hmac.compare_digest(x_profile_token or "", PROFILE_TOKEN):
+        raise HTTPException(status_code=403, detail="Invalid or missing X-Profile-Token.")
+
+profiling_router = APIRouter(dependencies=[Depends(require_profile_token)])
+
+def _get_profile(profile_id: str) -> RequestProfile:
+    profile = profile_store.get(profile_id)
+    if profile is None:
+        raise HTTPException(status_code=404, detail=f"Profile '{profile_id}' not found.")
+    return profile
+
+@profiling_router.get("/profiles", response_model=List[Dict[str, Any]])
+def list_profiles():
+    """Summaries of the stored profiles, newest first."""
+    return [profile.summary() for profile in profile_store.list()]
+
+@profiling_router.get("/profiles/{profile_id}", response_class=PlainTextResponse)
+def get_profile_report(profile_id: str):
+    """Text report of a profile: its summary and the functions with the most cumulative time."""
+    profile = _get_profile(profile_id)
+    header = "\n".join(f"{key}: {value}" for key, value in profile.summary().items())
+    return PlainTextResponse(f"{header}\n\n{profile.report}")
+
+@profiling_router.get("/profiles/{profile_id}/download")
+def download_profile(profile_id: str):
+    """The cProfile statistics of a profile, to open with `pstats.Stats(path)` or snakeviz."""
+    profile = _get_profile(profile_id)
+    return Response(
+        content=profile.stats,
+        media_type="application/octet-stream",
+        headers={"Content-Disposition": f'attachment; filename="{profile.id}.prof"'},
+    )
@@ -0,0 +1,138 @@
+import hashlib
+import logging
+import os
+import tempfile
+import threading
+from typing import BinaryIO, Optional, Tuple
+from dotenv import load_dotenv
+from app.routers.s3_transfer import download_object
+
+#################################################
+# S3 Disk Cache
+#################################################
+
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+# Directory holding downloaded S3 objects (empty disables the cache)
+S3_CACHE_DIR = os.getenv("S3_CACHE_DIR", os.path.join(tempfile.gettempdir(), "roas_s3_cache"))
+
+
+class S3DiskCache:
+    """
+    Keeps a local copy of downloaded S3 objects, keyed by bucket, key
+    and ETag, so restarted or newly scaled-out containers sharing the
+    directory don't download the same objects again.
+
+    Every fetch still asks S3 whether the object changed, with a
+    conditional GET (`IfNoneMatch` set to the cached ETag): a 304 serves
+    the file on disk, anything else downloads the new version to disk
+    (in parallel ranged parts) and replaces the old one. Files are written under a temporary name and
+    renamed into place, so a reader never sees a partial download.
+
+    Storing a new version removes the ones it replaced, which a reader in
+    another thread or process may still be about to read: read through
+    `open`, whose file stays readable once removed, rather than the path.
+
+    Layout: `<directory>/<sha256(bucket/key)>/<sha256(etag)>` holds the
+    object and `<directory>/<sha256(bucket/key)>/current` its ETag.
+    """
+
+    def __init__(self, directory: str):
+        self.directory = directory
+        self._lock = threading.Lock()
+        self._locks = {}
+
+    def _object_dir(self, bucket: str, key: str) -> str:
+        return os.path.join(self.directory, hashlib.sha256(f"{bucket}/{key}".encode("utf-8")).hexdigest())
+
+    @staticmethod
+    def _data_name(etag: str) -> str:
+        return hashlib.sha256(etag.encode("utf-8")).hexdigest()
+
+    def _object_lock(self, object_dir: str) -> threading.Lock:
+        with self._lock:
+            return self._locks.setdefault(object_dir, threading.Lock())
+
+    def cached_etag(self, bucket: str, key: str) -> Optional[str]:
+        """Returns the ETag of the cached copy of an object, or None if there is no usable copy."""
+        object_dir = self._object_dir(bucket, key)
+        try:
+            with open(os.path.join(object_dir, "current"), encoding="utf-8") as f:
+                etag = f.read()
+        except FileNotFoundError:
+            return None
+        return etag if os.path.exists(os.path.join(object_dir, self._data_name(etag))) else None
+
+    def fetch(self, s3_client, bucket: str, key: str) -> Tuple[str, str]:
+        """
+        Returns the path and ETag of an up-to-date local copy of
+        `s3://bucket/key`, downloading it only if the cached copy is
+        missing or stale.
+        """
+        object_dir = self._object_dir(bucket, key)
+        # One download per object at a time; other objects aren't blocked
+        with self._object_lock(object_dir):
+            return self._fetch(s3_client, bucket, key, object_dir)
+
+    def open(self, s3_client, bucket: str, key: str, attempts: int = 3) -> Tuple[BinaryIO, str]:
+        """
+        Like `fetch`, but returns the local copy opened for reading. It is
+        opened before another thread of this process can replace it, and
+        fetched again if another process removed it in the meantime.
+        """
+        object_dir = self._object_dir(bucket, key)
+        for attempt in range(attempts):
+            with self._object_lock(object_dir):
+                path, etag = self._fetch(s3_client, bucket, key, object_dir)
+                try:
+                    return open(path, "rb"), etag
+                except FileNotFoundError:
+                    if attempt == attempts - 1:
+                        raise
+                    logger.info(f"Cached copy of s3://{bucket}/{key} was replaced while opening it, fetching again")
+
+    def _fetch(self, s3_client, bucket: str, key: str, object_dir: str) -> Tuple[str, str]:
+        # Called with the lock of `object_dir` held
+        etag = self.cached_etag(bucket, key)
+        os.makedirs(object_dir, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=object_dir, suffix=".part")
+        try:
+            # Parts are written straight to disk instead of being held in memory
+            with os.fdopen(fd, "wb") as f:
+                write_lock = threading.Lock()
+
+                def write_at(offset: int, data: bytes) -> None:
+                    with write_lock:
+                        f.seek(offset)
+                        f.write(data)
+
+                downloaded = download_object(s3_client, bucket, key, write_at, if_none_match=etag)
+            if downloaded is None:
+                os.unlink(tmp_path)
+                logger.info(f"Serving s3://{bucket}/{key} from the disk cache (ETag {etag})")
+                return os.path.join(object_dir, self._data_name(etag)), etag
+            return self._store(object_dir, tmp_path, downloaded[0])
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.unlink(tmp_path)
+            raise
+
+    def _store(self, object_dir: str, tmp_path: str, etag: str) -> Tuple[str, str]:
+        path = os.path.join(object_dir, self._data_name(etag))
+        os.replace(tmp_path, path)
+
+        fd, tmp_path = tempfile.mkstemp(dir=object_dir, suffix=".part")
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            f.write(etag)
+        os.replace(tmp_path, os.path.join(object_dir, "current"))
+
+        # Drop the versions this one replaced
+        for name in os.listdir(object_dir):
+            if name not in ("current", os.path.basename(path)) and not name.endswith(".part"):
+                try:
+                    os.unlink(os.path.join(object_dir, name))
+                except FileNotFoundError:
+                    pass
+        return path, etag
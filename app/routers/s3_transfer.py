@@ -0,0 +1,97 @@
+import os
+import re
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, Optional, Tuple
+from botocore.exceptions import ClientError
+from dotenv import load_dotenv
+
+#################################################
+# Parallel S3 Transfers
+#################################################
+
+load_dotenv()
+
+# HTTP connections kept open by the S3 client (botocore's default is 10)
+S3_MAX_POOL_CONNECTIONS = int(os.getenv("S3_MAX_POOL_CONNECTIONS", "32"))
+
+# Objects are downloaded in parts of this size, several parts at a time
+S3_PART_SIZE = int(os.getenv("S3_PART_SIZE", str(8 * 1024 * 1024)))
+S3_MAX_CONCURRENCY = int(os.getenv("S3_MAX_CONCURRENCY", "8"))
+
+_CONTENT_RANGE_PATTERN = re.compile(r"bytes \d+-\d+/(\d+)")
+
+
+def error_code(error: ClientError) -> str:
+    return str(error.response.get("Error", {}).get("Code"))
+
+
+def is_not_modified(error: ClientError) -> bool:
+    return (
+        error.response.get("ResponseMetadata", {}).get("HTTPStatusCode") == 304
+        or error_code(error) in ("304", "NotModified")
+    )
+
+
+def download_object(
+    s3_client,
+    bucket: str,
+    key: str,
+    write_at: Callable[[int, bytes], None],
+    if_none_match: Optional[str] = None,
+    part_size: Optional[int] = None,
+    max_concurrency: Optional[int] = None,
+) -> Optional[Tuple[str, int]]:
+    """
+    Downloads an object with ranged GETs, calling `write_at(offset, data)`
+    for each part. The first part doubles as the (conditional) request
+    that reveals the size and ETag; the remaining parts are fetched in
+    parallel, from several threads, and pinned to that ETag.
+
+    Returns:
+        The ETag and size of the object, or None if it matches `if_none_match`.
+    """
+    part_size = part_size or S3_PART_SIZE
+    max_concurrency = max_concurrency or S3_MAX_CONCURRENCY
+
+    request = {"Bucket": bucket, "Key": key, "Range": f"bytes=0-{part_size - 1}"}
+    if if_none_match is not None:
+        request["IfNoneMatch"] = if_none_match
+    try:
+        obj = s3_client.get_object(**request)
+    except ClientError as e:
+        if if_none_match is not None and is_not_modified(e):
+            return None
+        if error_code(e) != "InvalidRange":
+            raise
+        # Empty objects have no byte range to ask for
+        del request["Range"]
+        try:
+            obj = s3_client.get_object(**request)
+        except ClientError as e:
+            if if_none_match is not None and is_not_modified(e):
+                return None
+            raise
+
+    etag = obj["ETag"]
+    match = _CONTENT_RANGE_PATTERN.match(obj.get("ContentRange") or "")
+    size = int(match.group(1)) if match else obj["ContentLength"]
+    write_at(0, obj["Body"].read())
+
+    def download_part(start: int) -> None:
+        end = min(start + part_size, size) - 1
+        part = s3_client.get_object(Bucket=bucket, Key=key, Range=f"bytes={start}-{end}", IfMatch=etag)
+        write_at(start, part["Body"].read())
+
+    starts = range(part_size, size, part_size)
+    if starts:
+        with ThreadPoolExecutor(max_workers=min(max_concurrency, len(starts)), thread_name_prefix="s3-part") as pool:
+            for future in [pool.submit(download_part, start) for start in starts]:
+                future.result()
+    return etag, size
+
+
+def download_bytes(s3_client, bucket: str, key: str) -> bytes:
+    """Downloads a whole object into memory with parallel ranged GETs."""
+    parts: Dict[int, bytes] = {}
+    download_object(s3_client, bucket, key, parts.__setitem__)
+    return b"".join(parts[offset] for offset in sorted(parts))
@@ -0,0 +1,254 @@
+import os
+from typing import Any, Dict, List, Literal, Optional, Tuple
+import numpy as np
+import orjson
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+from dotenv import load_dotenv
+from fastapi import Response
+from fastapi.responses import ORJSONResponse
+from app.routers.metrics import observe_rows, stage
+
+#################################################
+# Response Serialization
+#################################################
+
+load_dotenv()
+
+# Format of the date columns in the responses
+DATE_FORMAT = "%Y-%m-%d"
+
+# Set to false to send the DataFrame endpoints' rows as they are, without
+# validating each one against the endpoint's response model
+VALIDATE_RESPONSES = os.getenv("VALIDATE_RESPONSES", "true").lower() == "true"
+
+# Payload of the DataFrame endpoints: a list of row objects, or one array per column
+ResponseFormat = Literal["records", "columnar"]
+
+# Media types the DataFrame endpoints can answer with, negotiated through the Accept header
+JSON_MEDIA_TYPE = "application/json"
+ARROW_STREAM_MEDIA_TYPE = "application/vnd.apache.arrow.stream"
+PARQUET_MEDIA_TYPE = "application/x-parquet"
+MEDIA_TYPES = [JSON_MEDIA_TYPE, ARROW_STREAM_MEDIA_TYPE, PARQUET_MEDIA_TYPE]
+
+# Headers carrying the fields of a cursor page in binary responses
+PAGE_HEADERS = {
+    "cursor": "X-Cursor",
+    "page": "X-Page",
+    "size": "X-Page-Size",
+    "total_rows": "X-Total-Rows",
+    "total_pages": "X-Total-Pages",
+}
+
+_ORJSON_OPTIONS = orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS
+
+
+def _json_values(series: pd.Series) -> np.ndarray:
+    """
+    Returns the values of `series` as the responses carry them: dates as
+    'YYYY-MM-DD' strings, categorical and Arrow-backed text as str, and
+    their missing values as None. Other columns keep their numpy values.
+    """
+    dtype = series.dtype
+    if pd.api.types.is_datetime64_any_dtype(dtype):
+        return series.dt.strftime(DATE_FORMAT).to_numpy(dtype=object, na_value=None)
+    if isinstance(dtype, pd.CategoricalDtype):
+        # Only look up the categories of the rows at hand: there can be
+        # many more of them (e.g. one per page name)
+        codes = series.cat.codes.to_numpy()
+        values = dtype.categories.take(np.maximum(codes, 0)).to_numpy(dtype=object)
+        values[codes < 0] = None
+        return values
+    if isinstance(dtype, pd.StringDtype):
+        return series.to_numpy(dtype=object, na_value=None)
+    return series.to_numpy()
+
+
+def to_columns(df: pd.DataFrame) -> Dict[str, List[Any]]:
+    """
+    Returns the values of each column of `df` as plain Python lists. Only
+    call it on the rows being returned: formatting is the expensive part.
+    """
+    return {column: _json_values(df[column]).tolist() for column in df.columns}
+
+
+def to_records(df: pd.DataFrame) -> List[Dict[str, Any]]:
+    """Serializes `df` to the list of row dicts returned by the endpoints."""
+    columns = to_columns(df)
+    if not columns:
+        return [{} for _ in range(len(df))]
+    return [dict(zip(columns, row)) for row in zip(*columns.values())]
+
+
+def to_columnar(df: pd.DataFrame) -> Dict[str, Any]:
+    """
+    Serializes `df` to one array per column. Numeric columns stay numpy
+    arrays, which orjson writes directly without building Python objects.
+    """
+    columns = {}
+    for column in df.columns:
+        values = _json_values(df[column])
+        if values.dtype.kind in "biuf":
+            columns[column] = np.ascontiguousarray(values)
+        else:
+            columns[column] = values.tolist()
+    return columns
+
+
+def to_payload(df: pd.DataFrame, response_format: ResponseFormat = "records") -> Any:
+    """Serializes `df` in the requested response format."""
+    return to_columnar(df) if response_format == "columnar" else to_records(df)
+
+
+def _default(obj: Any) -> Any:
+    # Values orjson doesn't handle natively
+    if isinstance(obj, np.ndarray):
+        return obj.tolist()
+    if isinstance(obj, np.generic):
+        return obj.item()
+    if obj is pd.NaT or obj is pd.NA:
+        return None
+    if isinstance(obj, pd.Timestamp):
+        return obj.isoformat()
+    raise TypeError(f"Type is not JSON serializable: {type(obj).__name__}")
+
+
+def dumps(content: Any) -> bytes:
+    """
+    Serializes `content` to JSON with orjson. numpy arrays and scalars are
+    supported, Timestamps are written in ISO 8601, and NaN, infinities,
+    NaT and NA are written as null.
+    """
+    return orjson.dumps(content, default=_default, option=_ORJSON_OPTIONS)
+
+
+class FrameJSONResponse(ORJSONResponse):
+    """JSON response rendered with `dumps`."""
+
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
+
+
+def negotiate_media_type(accept: Optional[str]) -> str:
+    """
+    Returns the media type of the DataFrame responses that best matches an
+    Accept header: JSON_MEDIA_TYPE, ARROW_STREAM_MEDIA_TYPE or
+    PARQUET_MEDIA_TYPE. Quality values and wildcards are honoured; JSON
+    wins ties and is returned when nothing matches.
+    """
+    if not accept:
+        return JSON_MEDIA_TYPE
+
+    # (specificity, quality) of the most specific entry matching each type
+    matches: Dict[str, Tuple[int, float]] = {}
+    for entry in accept.split(","):
+        media_range, *params = [part.strip() for part in entry.split(";")]
+        quality = 1.0
+        for param in params:
+            name, _, value = param.partition("=")
+            if name.strip().lower() == "q":
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        media_range = media_range.lower()
+        for media_type in MEDIA_TYPES:
+            if media_range == media_type:
+                specificity = 2
+            elif media_range == media_type.split("/")[0] + "/*":
+                specificity = 1
+            elif media_range == "*/*":
+                specificity = 0
+            else:
+                continue
+            if media_type not in matches or specificity > matches[media_type][0]:
+                matches[media_type] = (specificity, quality)
+
+    best, best_quality = JSON_MEDIA_TYPE, 0.0
+    for media_type in MEDIA_TYPES:
+        quality = matches.get(media_type, (0, 0.0))[1]
+        if quality > best_quality:
+            best, best_quality = media_type, quality
+    return best
+
+
+def to_arrow_table(df: pd.DataFrame) -> pa.Table:
+    """
+    Converts `df` to an Arrow table with its own types: dates stay
+    timestamps and categorical columns become dictionary arrays. Only the
+    categories used by the rows are kept, so a page doesn't carry the
+    whole dictionary of the dataset.
+    """
+    categorical = [column for column, dtype in df.dtypes.items() if isinstance(dtype, pd.CategoricalDtype)]
+    if categorical:
+        df = df.assign(**{column: df[column].cat.remove_unused_categories() for column in categorical})
+    return pa.Table.from_pandas(df, preserve_index=False)
+
+
+def to_arrow_stream(df: pd.DataFrame) -> bytes:
+    """Serializes `df` to an Arrow IPC stream."""
+    table = to_arrow_table(df)
+    sink = pa.BufferOutputStream()
+    with pa.ipc.new_stream(sink, table.schema) as writer:
+        writer.write_table(table)
+    return sink.getvalue().to_pybytes()
+
+
+def to_parquet_bytes(df: pd.DataFrame) -> bytes:
+    """Serializes `df` to a parquet file."""
+    sink = pa.BufferOutputStream()
+    pq.write_table(to_arrow_table(df), sink)
+    return sink.getvalue().to_pybytes()
+
+
+def dataframe_response(
+    df: pd.DataFrame,
+    response: Response,
+    response_format: ResponseFormat = "records",
+    accept: Optional[str] = None,
+    page: Optional[Dict[str, Any]] = None,
+) -> Any:
+    """
+    Returns the response of a DataFrame endpoint for `df`.
+
+    With an Accept header asking for Arrow or parquet, `df` is sent as an
+    Arrow IPC stream or a parquet file, and the `page` fields (the cursor
+    and totals of a cursor page) as `X-Cursor`, `X-Page`, `X-Page-Size`,
+    `X-Total-Rows` and `X-Total-Pages` headers.
+
+    Otherwise it is sent as JSON in `response_format`, with the `page`
+    fields around it as `items`. Row payloads are handed to FastAPI to be
+    validated against the endpoint's response model, unless
+    VALIDATE_RESPONSES is disabled; columnar payloads don't match the
+    model and always skip it. Skipped payloads are serialized here, with
+    the headers already set on `response`.
+    """
+    observe_rows("out", len(df))
+    with stage("serialize"):
+        return _dataframe_response(df, response, response_format, accept, page)
+
+
+def _dataframe_response(
+    df: pd.DataFrame,
+    response: Response,
+    response_format: ResponseFormat,
+    accept: Optional[str],
+    page: Optional[Dict[str, Any]],
+) -> Any:
+    response.headers["Vary"] = "Accept"
+    media_type = negotiate_media_type(accept)
+    if media_type != JSON_MEDIA_TYPE:
+        headers = dict(response.headers)
+        for field, value in (page or {}).items():
+            if field != "items":
+                headers[PAGE_HEADERS[field]] = str(value)
+        content = to_arrow_stream(df) if media_type == ARROW_STREAM_MEDIA_TYPE else to_parquet_bytes(df)
+        return Response(content, media_type=media_type, headers=headers)
+
+    content = to_payload(df, response_format)
+    if page is not None:
+        content = {"items": content, **page}
+    if response_format == "columnar" or not VALIDATE_RESPONSES:
+        return FrameJSONResponse(content, headers=dict(response.headers))
+    return content
@@ -0,0 +1,80 @@
+import hashlib
+import os
+import threading
+from typing import Any, Callable, Dict, Optional
+import pandas as pd
+from cachetools import TTLCache
+from dotenv import load_dotenv
+from app.routers.filter_engine import filter_signature
+
+#################################################
+# Descriptive Stats Cache
+#################################################
+
+load_dotenv()
+
+STATS_CACHE_SIZE = int(os.getenv("STATS_CACHE_SIZE", "256"))
+STATS_CACHE_TTL = int(os.getenv("STATS_CACHE_TTL", "3600"))
+
+
+class StatsCache:
+    """
+    Size-bounded LRU/TTL cache of `get_descriptive_stats` outputs for
+    registered datasets. Entries are keyed by a hash of the dataset id,
+    the dataset version (S3 ETag) and the normalized filter options, so
+    identical filter combinations are computed once across users and a
+    new dataset version never reads stale stats.
+
+    Cached DataFrames are shared between requests and must not be
+    modified in place.
+    """
+
+    def __init__(self, maxsize: int = STATS_CACHE_SIZE, ttl: int = STATS_CACHE_TTL):
+        self._cache: TTLCache = TTLCache(maxsize=maxsize, ttl=ttl)
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def key_for(dataset_id: str, version: Optional[str], filter_options: Dict[str, Any]) -> str:
+        signature = f"{dataset_id}\n{version}\n{filter_signature(filter_options)}"
+        return hashlib.sha256(signature.encode("utf-8")).hexdigest()
+
+    def get_or_compute(self, dataset_id: str, version: Optional[str], filter_options: Dict[str, Any], compute: Callable[[], pd.DataFrame]) -> pd.DataFrame:
+        """Returns the cached stats for the key, calling `compute()` on a miss."""
+        key = self.key_for(dataset_id, version, filter_options)
+        with self._lock:
+            entry = self._cache.get(key)
+            if entry is not None:
+                self.hits += 1
+                return entry[1]
+            self.misses += 1
+
+        # Computed outside the lock so one slow miss doesn't block every hit
+        stats = compute()
+        with self._lock:
+            self._cache[key] = (dataset_id, stats)
+        return stats
+
+    def invalidate_dataset(self, dataset_id: str) -> None:
+        """Drops every entry computed from `dataset_id`."""
+        with self._lock:
+            for key in [key for key, (entry_dataset_id, _) in self._cache.items() if entry_dataset_id == dataset_id]:
+                del self._cache[key]
+
+    def clear(self) -> None:
+        with self._lock:
+            self._cache.clear()
+
+    def info(self) -> Dict[str, int]:
+        """Returns the hit/miss counters and the current size of the cache."""
+        with self._lock:
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'size': len(self._cache),
+                'maxsize': int(self._cache.maxsize),
+            }
+
+
+stats_cache = StatsCache()
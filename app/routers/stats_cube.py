@@ -0,0 +1,245 @@
+import itertools
+import logging
+import os
+import threading
+import time
+from typing import Any, Dict, List, Optional, Tuple
+import numpy as np
+import pandas as pd
+from dotenv import load_dotenv
+from app.routers.descriptive_stats import _grouped_quantiles, get_descriptive_stats
+
+#################################################
+# Descriptive Stats Cube
+#################################################
+
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+# Largest number of dimensions filtered on at once the cube is built for
+# (0 disables it). Each extra level multiplies the build time.
+STATS_CUBE_DEPTH = int(os.getenv("STATS_CUBE_DEPTH", "2"))
+
+# Filter dimensions the dashboard combines most often
+CUBE_DIMENSIONS = [
+    'Client Industry',
+    'Facebook Page Category',
+    'Ads Objective',
+    'Country',
+    'Start Year',
+]
+
+_REQUIRED_COLUMNS = CUBE_DIMENSIONS + ['Result Type', 'Cost per Result', 'Cost per Mile']
+
+_STAT_COLUMNS = ['Min CPM', 'Median CPM', 'Max CPM', 'Min CPR', 'Median CPR', 'Max CPR']
+
+# Cell of the cube: the filtered dimensions (in CUBE_DIMENSIONS order) and the code of each value
+CellKey = Tuple[Tuple[str, ...], Tuple[int, ...]]
+
+
+class StatsCube:
+    """
+    `get_descriptive_stats` outputs precomputed for every combination of
+    values of up to `depth` of the CUBE_DIMENSIONS, so the most common
+    filters are answered with one dictionary lookup instead of a filter
+    and a sort of the matching rows.
+
+    Each combination of dimensions is computed in one pass over the
+    frame: every row is assigned to its (cell, result type) group and the
+    quantiles of all groups are read with the same kernel as
+    `get_descriptive_stats`, so a cell holds exactly the frame the live
+    computation returns for its filters (same rows, order, rounding and
+    dtypes).
+
+    `get` only answers filters it can answer exactly: up to `depth` cube
+    dimensions, each with a single non-missing value seen in the frame.
+    Anything else returns None and is computed live.
+    """
+
+    def __init__(self, df: pd.DataFrame, depth: int = STATS_CUBE_DEPTH):
+        started = time.perf_counter()
+        self.depth = min(depth, len(CUBE_DIMENSIONS))
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+        self._codes: Dict[str, np.ndarray] = {}
+        self._values: Dict[str, Dict[Any, int]] = {}
+        for dimension in CUBE_DIMENSIONS:
+            codes, uniques = pd.factorize(df[dimension])
+            self._codes[dimension] = codes
+            self._values[dimension] = {value: code for code, value in enumerate(uniques.tolist())}
+
+        result_types, _ = pd.factorize(df['Result Type'], use_na_sentinel=False)
+        cpr = df['Cost per Result']
+        cpm = df['Cost per Mile']
+        if cpr.dtype != 'float64':
+            cpr = pd.to_numeric(cpr, errors='coerce')
+        if cpm.dtype != 'float64':
+            cpm = pd.to_numeric(cpm, errors='coerce')
+        # Rows sorted by value once: the kernel then only has to (stably)
+        # sort the group codes of each combination of dimensions
+        metrics = []
+        for values in (cpr, cpm):
+            values = values.to_numpy(dtype='float64', na_value=np.nan)
+            order = np.argsort(values, kind='stable')
+            metrics.append((order, values[order]))
+        labels = np.asarray(df['Result Type'])
+        result_type_missing = np.asarray(pd.isna(df['Result Type']), dtype=bool)
+
+        # Rows of every cell, one row per result type
+        self._stats: Dict[str, np.ndarray] = {}
+        self._cells: Dict[CellKey, Tuple[int, int]] = {}
+        parts: List[Dict[str, np.ndarray]] = []
+        offset = 0
+        for size in range(self.depth + 1):
+            for dimensions in itertools.combinations(CUBE_DIMENSIONS, size):
+                part = self._build_cells(dimensions, result_types, result_type_missing, labels, metrics, offset)
+                parts.append(part)
+                offset += len(part['Result Type'])
+        for column in ['Result Type'] + _STAT_COLUMNS + ['No. of Campaigns']:
+            self._stats[column] = np.concatenate([part[column] for part in parts])
+
+        # Known values filtering out every row
+        self.empty = get_descriptive_stats(df.iloc[:0])
+        self.build_seconds = time.perf_counter() - started
+
+    def _build_cells(
+        self,
+        dimensions: Tuple[str, ...],
+        result_types: np.ndarray,
+        result_type_missing: np.ndarray,
+        labels: np.ndarray,
+        metrics: List[Tuple[np.ndarray, np.ndarray]],
+        offset: int,
+    ) -> Dict[str, np.ndarray]:
+        # Rows with a missing value in one of the dimensions belong to no cell
+        rows = np.arange(len(result_types))
+        for dimension in dimensions:
+            rows = rows[self._codes[dimension][rows] >= 0]
+
+        # Mixed-radix key of (cell, result type), then one group per distinct key
+        key = np.zeros(len(rows), dtype=np.int64)
+        n_keys = 1
+        for dimension in dimensions:
+            key = key * len(self._values[dimension]) + self._codes[dimension][rows]
+            n_keys *= len(self._values[dimension])
+        n_result_types = int(result_types.max()) + 1 if len(result_types) else 0
+        key = key * n_result_types + result_types[rows]
+        n_keys *= n_result_types
+        unique_keys, first, groups = _unique_keys(key, n_keys)
+        cell_of_group = unique_keys // max(n_result_types, 1)
+
+        # Rows of a missing result type (or outside every cell) are
+        # reported with no stats and 0 campaigns. Small codes sort faster.
+        n_groups = len(unique_keys)
+        stat_codes = np.full(len(result_types), -1, dtype=np.min_scalar_type(-max(n_groups, 1)))
+        stat_codes[rows] = np.where(result_type_missing[rows], -1, groups)
+        num_campaigns = np.bincount(stat_codes[stat_codes >= 0], minlength=n_groups)
+        cpr_stats, cpm_stats = (
+            _grouped_quantiles(stat_codes[value_order], n_groups, sorted_values)
+            for value_order, sorted_values in metrics
+        )
+
+        # Within a cell, result types in order of first appearance
+        order = np.lexsort((first, cell_of_group))
+        first_rows = rows[first[order]]
+        bounds = np.flatnonzero(np.diff(cell_of_group[order], prepend=-1, append=-1))
+        for start, stop in zip(bounds[:-1], bounds[1:]):
+            codes = tuple(int(self._codes[dimension][first_rows[start]]) for dimension in dimensions)
+            self._cells[(dimensions, codes)] = (offset + int(start), offset + int(stop))
+
+        return {
+            'Result Type': labels[first_rows],
+            'Min CPM': np.round(cpm_stats[0.25][order], 2),
+            'Median CPM': np.round(cpm_stats['median'][order], 2),
+            'Max CPM': np.round(cpm_stats[0.80][order], 2),
+            'Min CPR': np.round(cpr_stats[0.25][order], 2),
+            'Median CPR': np.round(cpr_stats['median'][order], 2),
+            'Max CPR': np.round(cpr_stats[0.80][order], 2),
+            'No. of Campaigns': num_campaigns[order].astype('int64'),
+        }
+
+    def _cell_key(self, filter_options: Dict[str, Any]) -> Optional[CellKey]:
+        """
+        Returns the key of the cell answering `filter_options`, or None if
+        the cube can't answer them. Known values that no row combines get
+        a key without a cell.
+        """
+        if len(filter_options) > self.depth:
+            return None
+        dimensions = tuple(dimension for dimension in CUBE_DIMENSIONS if dimension in filter_options)
+        if len(dimensions) != len(filter_options):
+            return None
+        codes = []
+        for dimension in dimensions:
+            value = filter_options[dimension]
+            if isinstance(value, list):
+                if len(value) != 1:
+                    return None
+                value = value[0]
+            try:
+                code = self._values[dimension].get(value)
+            except TypeError:
+                return None
+            if code is None:
+                return None
+            codes.append(code)
+        return dimensions, tuple(codes)
+
+    def get(self, filter_options: Dict[str, Any]) -> Optional[pd.DataFrame]:
+        """
+        Returns `get_descriptive_stats` of the rows matching
+        `filter_options`, or None if the cube doesn't hold them.
+        """
+        key = self._cell_key(filter_options)
+        with self._lock:
+            if key is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+        bounds = self._cells.get(key)
+        if bounds is None:
+            return self.empty
+        start, stop = bounds
+        return pd.DataFrame({column: values[start:stop] for column, values in self._stats.items()})
+
+    def info(self) -> Dict[str, Any]:
+        """Returns the size, depth and build time of the cube with its hit/miss counters."""
+        with self._lock:
+            return {
+                'depth': self.depth,
+                'cells': len(self._cells),
+                'build_seconds': round(self.build_seconds, 3),
+                'hits': self.hits,
+                'misses': self.misses,
+            }
+
+
+def _unique_keys(key: np.ndarray, n_keys: int) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    `np.unique(key, return_index=True, return_inverse=True)` for keys in
+    [0, n_keys), counted instead of sorted when that range is small.
+    """
+    if n_keys > 4 * len(key) + 1024:
+        return np.unique(key, return_index=True, return_inverse=True)
+    present = np.bincount(key, minlength=n_keys) > 0
+    unique_keys = np.flatnonzero(present)
+    groups = (np.cumsum(present) - 1)[key]
+    first = np.full(len(unique_keys), len(key))
+    np.minimum.at(first, groups, np.arange(len(key)))
+    return unique_keys, first, groups
+
+
+def build_stats_cube(df: pd.DataFrame, depth: int = STATS_CUBE_DEPTH) -> Optional[StatsCube]:
+    """Returns the StatsCube of `df`, or None if disabled or `df` lacks its columns."""
+    if depth <= 0 or any(column not in df.columns for column in _REQUIRED_COLUMNS):
+        return None
+    # The live stats report None and NaN result types as separate rows,
+    # which the cube groups together
+    result_types = df['Result Type']
+    if result_types.dtype == object and pd.isna(result_types.unique()).sum() > 1:
+        logger.info("Stats cube not built: 'Result Type' holds several kinds of missing values")
+        return None
+    return StatsCube(df, depth)
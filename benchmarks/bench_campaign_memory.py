@@ -0,0 +1,56 @@
+"""
+Compares the memory held by the campaigns frame with the previous dtypes
+(dates as strings, text as object, `Campaign ID` as python strings)
+against CAMPAIGN_SCHEMA, and the cost of moving the date formatting to
+serialization.
+
+    python -m benchmarks.bench_campaign_memory
+"""
+import time
+import pandas as pd
+from app.routers.load_exp_data_utils import CAMPAIGN_SCHEMA, apply_schema
+from app.routers.serialization import to_records
+from benchmarks.synthetic import make_campaigns
+
+N_ROWS = 1_000_000
+PAGE_SIZE = 100
+
+
+def mib(n_bytes: float) -> str:
+    return f"{n_bytes / 2**20:9.1f}"
+
+
+def main():
+    legacy = make_campaigns(N_ROWS)
+    typed = apply_schema(legacy.copy(), CAMPAIGN_SCHEMA)
+    before = legacy.memory_usage(deep=True, index=False)
+    after = typed.memory_usage(deep=True, index=False)
+
+    print(f"{N_ROWS} rows, MiB")
+    print(f"{'column':>24} {'before':>9} {'after':>9} {'dtype':>16}")
+    for column in legacy.columns:
+        print(f"{column:>24} {mib(before[column])} {mib(after[column])} {str(typed[column].dtype):>16}")
+    print(f"{'total':>24} {mib(before.sum())} {mib(after.sum())} {before.sum() / after.sum():>15.1f}x")
+
+    # Date range filtering: string comparison before, datetime64 after
+    start = time.perf_counter()
+    legacy['Start Date'].between('2021-01-01', '2021-12-31')
+    string_range = time.perf_counter() - start
+    start = time.perf_counter()
+    typed['Start Date'].between(pd.Timestamp('2021-01-01'), pd.Timestamp('2021-12-31'))
+    datetime_range = time.perf_counter() - start
+    print(f"date range filter: {string_range * 1000:.1f} ms -> {datetime_range * 1000:.1f} ms")
+
+    # Dates are now formatted per response, on the rows being returned
+    timings = []
+    for serialize, frame in [(lambda page: page.to_dict(orient='records'), legacy), (to_records, typed)]:
+        page = frame.iloc[:PAGE_SIZE]
+        start = time.perf_counter()
+        for _ in range(100):
+            serialize(page)
+        timings.append((time.perf_counter() - start) * 10)
+    print(f"serializing a page of {PAGE_SIZE} rows: {timings[0]:.2f} ms -> {timings[1]:.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
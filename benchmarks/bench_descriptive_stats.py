@@ -0,0 +1,74 @@
+"""
+Compares `get_descriptive_stats` against the previous per-result-type loop.
+
+    python -m benchmarks.bench_descriptive_stats
+"""
+import logging
+import time
+import pandas as pd
+from app.routers.Autoforecaster_module import get_descriptive_stats
+from benchmarks.synthetic import make_campaigns
+
+SIZES = [10_000, 100_000, 1_000_000]
+
+
+def legacy_get_descriptive_stats(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    The per-result-type implementation `get_descriptive_stats` replaced,
+    kept as the reference of tests/descriptive_stats_test.py as well.
+    """
+    df = df.copy()
+    if df['Cost per Result'].dtype != 'float64':
+        df['Cost per Result'] = pd.to_numeric(df['Cost per Result'], errors='coerce')
+    if df['Cost per Mile'].dtype != 'float64':
+        df['Cost per Mile'] = pd.to_numeric(df['Cost per Mile'], errors='coerce')
+
+    best_campaign_sets = []
+    for result_types in df['Result Type'].unique():
+        median_cpr = df.loc[df['Result Type'] == result_types, 'Cost per Result'].median(skipna=True)
+        median_cpm = df.loc[df['Result Type'] == result_types, 'Cost per Mile'].median(skipna=True)
+        min_cpr = df.loc[df['Result Type'] == result_types, 'Cost per Result'].quantile(q=0.25, interpolation='midpoint')
+        min_cpm = df.loc[df['Result Type'] == result_types, 'Cost per Mile'].quantile(q=0.25, interpolation='midpoint')
+        max_cpr = df.loc[df['Result Type'] == result_types, 'Cost per Result'].quantile(q=0.80, interpolation='midpoint')
+        max_cpm = df.loc[df['Result Type'] == result_types, 'Cost per Mile'].quantile(q=0.80, interpolation='midpoint')
+        num_campaigns = len(df.loc[df['Result Type'] == result_types])
+        metrics = {
+            'Result Type': result_types,
+            'Min CPM': round(min_cpm, 2),
+            'Median CPM': round(median_cpm, 2),
+            'Max CPM': round(max_cpm, 2),
+            'Min CPR': round(min_cpr, 2),
+            'Median CPR': round(median_cpr, 2),
+            'Max CPR': round(max_cpr, 2),
+            'No. of Campaigns': num_campaigns,
+        }
+        best_campaign_sets.append(pd.DataFrame(metrics, index=[0]))
+    return pd.concat(best_campaign_sets)
+
+
+def best_of(fn, repeat: int) -> float:
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+def main():
+    logging.disable(logging.INFO)
+
+    print(f"{'rows':>10} {'legacy (s)':>12} {'vectorized (s)':>15} {'speedup':>8}")
+    for n_rows in SIZES:
+        df = make_campaigns(n_rows)
+        expected = legacy_get_descriptive_stats(df).reset_index(drop=True)
+        pd.testing.assert_frame_equal(get_descriptive_stats(df), expected, check_exact=True)
+
+        repeat = 5 if n_rows < 1_000_000 else 3
+        legacy = best_of(lambda: legacy_get_descriptive_stats(df), repeat)
+        vectorized = best_of(lambda: get_descriptive_stats(df), repeat)
+        print(f"{n_rows:>10} {legacy:>12.4f} {vectorized:>15.4f} {legacy / vectorized:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,73 @@
+"""
+Compares uploading campaigns to the ingestion endpoints as JSON records
+(validated row by row against `List[Dict[str, Any]]` and turned into a
+DataFrame with `pd.DataFrame(data)`) against an Arrow IPC stream and a
+parquet body, read in place into a DataFrame. The encode column is the
+time a pandas client takes to build the body.
+
+    python -m benchmarks.bench_frame_uploads
+
+Requests go to `/main` (first page of 100 rows, one country) and to
+`/get_descriptive_stats` through the router mounted on a bare app.
+"""
+import json
+import logging
+import time
+from io import BytesIO
+import pandas as pd
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from app.routers.Autoforecaster_module import router
+from app.routers.serialization import ARROW_STREAM_MEDIA_TYPE, PARQUET_MEDIA_TYPE, to_arrow_stream
+from benchmarks.synthetic import make_campaigns
+
+ROW_COUNTS = [10_000, 50_000]
+REPEAT = 3
+PARAMS = {
+    "/main": {"filter_options": {"Country": "Malaysia"}, "pagination": {"page": 1, "size": 100}},
+    "/get_descriptive_stats": {},
+}
+
+
+def encode_json(df: pd.DataFrame, params: dict) -> dict:
+    return {"content": json.dumps({"data": df.to_dict(orient='records'), **params}), "headers": {"Content-Type": "application/json"}}
+
+
+def encode_arrow(df: pd.DataFrame, params: dict) -> dict:
+    return {"content": to_arrow_stream(df), "params": {"params": json.dumps(params)}, "headers": {"Content-Type": ARROW_STREAM_MEDIA_TYPE}}
+
+
+def encode_parquet(df: pd.DataFrame, params: dict) -> dict:
+    buffer = BytesIO()
+    df.to_parquet(buffer, index=False)
+    return {"content": buffer.getvalue(), "params": {"params": json.dumps(params)}, "headers": {"Content-Type": PARQUET_MEDIA_TYPE}}
+
+
+def main():
+    logging.disable(logging.INFO)
+    app = FastAPI()
+    app.include_router(router)
+    client = TestClient(app)
+    encoders = {"json": encode_json, "arrow stream": encode_arrow, "parquet": encode_parquet}
+
+    print(f"{'rows':>7} {'endpoint':>22} {'body':>13} {'time (ms)':>10} {'encode (ms)':>12} {'size (KiB)':>11}")
+    for n_rows in ROW_COUNTS:
+        # JSON can't carry NaN costs
+        df = make_campaigns(n_rows).fillna({'Cost per Result': 0.0, 'Cost per Mile': 0.0})
+        for url, params in PARAMS.items():
+            for name, encode in encoders.items():
+                timings, encodings = [], []
+                for _ in range(REPEAT):
+                    start = time.perf_counter()
+                    request = encode(df, params)
+                    encodings.append(time.perf_counter() - start)
+                    start = time.perf_counter()
+                    response = client.post(url, **request)
+                    timings.append(time.perf_counter() - start)
+                    assert response.status_code == 200, response.text
+                size = len(request["content"]) / 1024
+                print(f"{n_rows:>7} {url:>22} {name:>13} {min(timings) * 1000:>10.1f} {min(encodings) * 1000:>12.1f} {size:>11.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,106 @@
+"""
+Compares the time and size of a page of campaigns sent the previous way
+(`to_dict(orient='records')` on the previous dtypes, validated against a
+`List[Dict]` response model and encoded by the stock JSONResponse) against
+the current response layer: JSON records (validated or not), columnar
+JSON, an Arrow IPC stream and parquet. The decode column is the time a
+pandas client takes to turn the body back into a DataFrame.
+
+    python -m benchmarks.bench_json_responses
+
+Each mode is an endpoint that only serializes a ready-made page, so the
+timings leave out the loading and filtering shared by all of them.
+"""
+import logging
+import time
+from io import BytesIO
+from typing import Any, Dict, List, Optional, Union
+import pandas as pd
+import pyarrow as pa
+from fastapi import FastAPI, Header, Query, Response
+from fastapi.testclient import TestClient
+from app.routers import serialization
+from app.routers.load_exp_data_utils import CAMPAIGN_SCHEMA, apply_schema
+from app.routers.serialization import (
+    ARROW_STREAM_MEDIA_TYPE, PARQUET_MEDIA_TYPE, FrameJSONResponse, ResponseFormat, dataframe_response,
+)
+from benchmarks.synthetic import make_campaigns
+
+PAGE_SIZES = [100, 1_000, 10_000]
+REPEAT = 5
+
+
+def make_app(legacy: pd.DataFrame, typed: pd.DataFrame) -> FastAPI:
+    app = FastAPI()
+
+    @app.post("/previous", response_model=List[Dict])
+    def previous(size: int):
+        return legacy.iloc[:size].to_dict(orient='records')
+
+    @app.post("/current", response_model=Union[List[Dict], Dict[str, List[Any]]], response_class=FrameJSONResponse)
+    def current(
+        size: int,
+        response: Response,
+        response_format: ResponseFormat = Query("records", alias="format"),
+        accept: Optional[str] = Header(None),
+    ):
+        return dataframe_response(typed.iloc[:size], response, response_format, accept)
+
+    return app
+
+
+def decode(response) -> pd.DataFrame:
+    content_type = response.headers["content-type"]
+    if content_type == ARROW_STREAM_MEDIA_TYPE:
+        return pa.ipc.open_stream(response.content).read_pandas()
+    if content_type == PARQUET_MEDIA_TYPE:
+        return pd.read_parquet(BytesIO(response.content))
+    payload = response.json()
+    return pd.DataFrame(payload) if isinstance(payload, dict) else pd.DataFrame.from_records(payload)
+
+
+def best_of(send) -> tuple:
+    timings, decodings = [], []
+    for _ in range(REPEAT):
+        start = time.perf_counter()
+        response = send()
+        timings.append(time.perf_counter() - start)
+        assert response.status_code == 200, response.text
+        start = time.perf_counter()
+        decode(response)
+        decodings.append(time.perf_counter() - start)
+    return min(timings), min(decodings), len(response.content)
+
+
+def main():
+    logging.disable(logging.INFO)
+    # The previous encoder fails on NaN costs, so leave them out of the comparison
+    legacy = make_campaigns(max(PAGE_SIZES)).dropna(subset=['Cost per Result', 'Cost per Mile'])
+    typed = apply_schema(legacy.copy(), CAMPAIGN_SCHEMA)
+    client = TestClient(make_app(legacy, typed))
+
+    def send(size, response_format="records", validate=True, accept=None):
+        def post():
+            serialization.VALIDATE_RESPONSES = validate
+            headers = {"Accept": accept} if accept else {}
+            return client.post("/current", params={"size": size, "format": response_format}, headers=headers)
+        return post
+
+    modes = {
+        "previous": lambda size: lambda: client.post("/previous", params={"size": size}),
+        "records": lambda size: send(size),
+        "records, no validation": lambda size: send(size, validate=False),
+        "columnar": lambda size: send(size, "columnar"),
+        "arrow stream": lambda size: send(size, accept=ARROW_STREAM_MEDIA_TYPE),
+        "parquet": lambda size: send(size, accept=PARQUET_MEDIA_TYPE),
+    }
+    print(f"{'rows':>7} {'mode':>24} {'time (ms)':>10} {'decode (ms)':>12} {'size (KiB)':>11}")
+    for size in PAGE_SIZES:
+        for mode, make_send in modes.items():
+            seconds, decoding, n_bytes = best_of(make_send(size))
+            print(f"{size:>7} {mode:>24} {seconds * 1000:>10.1f} {decoding * 1000:>12.1f} {n_bytes / 1024:>11.1f}")
+    serialization.VALIDATE_RESPONSES = True
+
+
+if __name__ == "__main__":
+    main()
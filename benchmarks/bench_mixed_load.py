@@ -0,0 +1,156 @@
+"""
+Load test of the execution backends: light page requests (`/main` on the
+campaigns dataset) run concurrently with heavy uncached descriptive stats
+(`/get_descriptive_stats` on random filters), and the latency percentiles
+of each kind are reported for the "thread" backend, the "process" backend
+and the "process" backend with niced processes (EXECUTION_NICE), next to
+the light requests alone.
+
+    python -m benchmarks.bench_mixed_load
+
+Each backend is served by its own uvicorn worker (a subprocess, so the
+load generator doesn't compete for its GIL) on N_ROWS synthetic
+campaigns, kept in a temporary dataset store that the process pool maps.
+The stats cache is disabled so every stats request is computed.
+"""
+import argparse
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import httpx
+import numpy as np
+
+N_ROWS = 500_000
+DURATION_SECONDS = 20
+HEAVY_CLIENTS = 4
+LIGHT_CLIENTS = 8
+PORT = 8765
+COUNTRIES = ['Malaysia', 'Singapore', 'Indonesia', 'Thailand', 'Philippines']
+
+
+def serve(backend: str, nice: int, port: int, store_dir: str) -> None:
+    import logging
+    import uvicorn
+    from fastapi import FastAPI
+    from app.routers import Autoforecaster_module as router_module
+    from app.routers.dataset_registry import DatasetRegistry
+    from app.routers.dataset_store import ArrowDatasetStore
+    from app.routers.execution import ExecutionBackend
+    from app.routers.load_exp_data_utils import CAMPAIGN_SCHEMA, apply_schema
+    from app.routers.stats_cache import StatsCache
+    from benchmarks.synthetic import make_campaigns
+
+    class UncachedStats(StatsCache):
+        def get_or_compute(self, dataset_id, version, filter_options, compute):
+            return compute()
+
+    logging.disable(logging.INFO)
+    campaigns = apply_schema(make_campaigns(N_ROWS), CAMPAIGN_SCHEMA)
+    registry = DatasetRegistry({"campaigns": lambda: campaigns}, versions=lambda dataset_id: '"bench"', store=ArrowDatasetStore(store_dir))
+    registry.load_all()
+    router_module.dataset_registry = registry
+    router_module.stats_cache = UncachedStats()
+    router_module.execution_backend = ExecutionBackend(backend, nice=nice)
+
+    app = FastAPI()
+    app.include_router(router_module.router)
+
+    @app.get("/health")
+    def health():
+        return {"status": "ok"}
+
+    uvicorn.run(app, host="127.0.0.1", port=port, log_level="warning")
+
+
+def heavy_request(client: httpx.Client, rng: random.Random) -> httpx.Response:
+    filters = {"Country": rng.sample(COUNTRIES, rng.randint(2, 4))}
+    return client.post("/get_descriptive_stats", json={"dataset_id": "campaigns", "filter_options": filters})
+
+
+def light_request(client: httpx.Client, rng: random.Random) -> httpx.Response:
+    body = {"dataset_id": "campaigns", "filter_options": {"Country": rng.choice(COUNTRIES)}, "pagination": {"page": rng.randint(1, 20), "size": 50}}
+    return client.post("/main", json=body)
+
+
+def drive(base_url: str, heavy_clients: int) -> dict:
+    latencies = {"heavy": [], "light": []}
+    statuses = {"heavy": {}, "light": {}}
+    deadline = time.perf_counter() + DURATION_SECONDS
+    lock = threading.Lock()
+
+    def client_loop(kind, send, seed):
+        rng = random.Random(seed)
+        with httpx.Client(base_url=base_url, timeout=120) as client:
+            while time.perf_counter() < deadline:
+                start = time.perf_counter()
+                status = send(client, rng).status_code
+                elapsed = time.perf_counter() - start
+                with lock:
+                    latencies[kind].append(elapsed)
+                    statuses[kind][status] = statuses[kind].get(status, 0) + 1
+
+    threads = [threading.Thread(target=client_loop, args=("heavy", heavy_request, i)) for i in range(heavy_clients)]
+    threads += [threading.Thread(target=client_loop, args=("light", light_request, 100 + i)) for i in range(LIGHT_CLIENTS)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return {kind: (np.array(latencies[kind]), statuses[kind]) for kind in latencies}
+
+
+def run_backend(backend: str, nice: int = 0, heavy_clients: int = HEAVY_CLIENTS) -> dict:
+    with tempfile.TemporaryDirectory() as store_dir:
+        server = subprocess.Popen(
+            [sys.executable, "-m", "benchmarks.bench_mixed_load", "--serve", backend, "--nice", str(nice), "--store", store_dir],
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.DEVNULL,
+        )
+        base_url = f"http://127.0.0.1:{PORT}"
+        try:
+            for _ in range(600):
+                try:
+                    if httpx.get(f"{base_url}/health").status_code == 200:
+                        break
+                except httpx.TransportError:
+                    time.sleep(0.5)
+            # Warm-up: starts the pool and maps the dataset in its processes
+            with httpx.Client(base_url=base_url, timeout=120) as client:
+                for i in range(4):
+                    heavy_request(client, random.Random(i))
+            return drive(base_url, heavy_clients)
+        finally:
+            server.terminate()
+            server.wait()
+
+
+def main():
+    print(f"{N_ROWS} rows, {HEAVY_CLIENTS} heavy and {LIGHT_CLIENTS} light clients for {DURATION_SECONDS} s, {os.cpu_count()} CPUs")
+    print(f"{'run':>16} {'kind':>6} {'requests':>9} {'p50 (ms)':>9} {'p99 (ms)':>9} {'max (ms)':>9}  statuses")
+    runs = {
+        "light only": lambda: run_backend("thread", heavy_clients=0),
+        "thread": lambda: run_backend("thread"),
+        "process": lambda: run_backend("process"),
+        "process, nice 10": lambda: run_backend("process", nice=10),
+    }
+    for name, run in runs.items():
+        for kind, (latencies, statuses) in run().items():
+            if len(latencies) == 0:
+                continue
+            p50, p99 = np.percentile(latencies, [50, 99]) * 1000
+            print(f"{name:>16} {kind:>6} {len(latencies):>9} {p50:>9.1f} {p99:>9.1f} {latencies.max() * 1000:>9.1f}  {statuses}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--serve", choices=["thread", "process"])
+    parser.add_argument("--nice", type=int, default=0)
+    parser.add_argument("--store")
+    args = parser.parse_args()
+    if args.serve:
+        serve(args.serve, args.nice, PORT, args.store)
+    else:
+        main()
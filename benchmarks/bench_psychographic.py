@@ -0,0 +1,57 @@
+"""
+Compares `format_psychographic` against the previous per-row formatting of
+the Psychographic column in `load_adsets_df`.
+
+    python -m benchmarks.bench_psychographic
+"""
+import re
+import time
+import pandas as pd
+from app.routers.load_exp_data_utils import format_psychographic
+from benchmarks.synthetic import make_psychographic
+
+N_ROWS = 500_000
+# Distinct targeting texts shared by the adsets
+UNIQUE_COUNTS = [500, 5_000, 50_000]
+
+
+def legacy_format_psychographic(psychographic: pd.Series) -> pd.Series:
+    """The per-row formatting `format_psychographic` replaced."""
+    pattern = r'(\b[A-Z]+\b):[ \t]+(.*?)(?=[A-Z]+:|$)'
+
+    def format_text(text):
+        matches = re.findall(pattern, text, re.MULTILINE)
+        formatted_data = {label: items.split(",") for label, items in matches}
+
+        temp = []
+        for label, items in formatted_data.items():
+            temp.append(f"{label}:\n{', '.join(map(str.strip, items))}")
+
+        final_data = "\n".join(temp)
+        return final_data
+
+    return psychographic.str.replace('"', " ").str.replace(":,", ": ").apply(format_text)
+
+
+def best_of(fn, repeat: int) -> float:
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+def main():
+    print(f"{'rows':>10} {'unique':>8} {'legacy (s)':>12} {'vectorized (s)':>15} {'speedup':>8}")
+    for n_unique in UNIQUE_COUNTS:
+        psychographic = make_psychographic(N_ROWS, n_unique)
+        pd.testing.assert_series_equal(format_psychographic(psychographic), legacy_format_psychographic(psychographic), check_exact=True)
+
+        legacy = best_of(lambda: legacy_format_psychographic(psychographic), 3)
+        vectorized = best_of(lambda: format_psychographic(psychographic), 3)
+        print(f"{N_ROWS:>10} {n_unique:>8} {legacy:>12.4f} {vectorized:>15.4f} {legacy / vectorized:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
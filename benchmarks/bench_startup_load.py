@@ -0,0 +1,93 @@
+"""
+Compares the wall-clock time to load the four dashboard objects with the
+previous sequential loaders (one plain GET per object, one object after
+the other) against the concurrent registry load with parallel ranged GETs.
+
+    python -m benchmarks.bench_startup_load
+
+S3 is an in-process moto bucket. Every request is delayed by
+LATENCY_SECONDS plus its body size over CONNECTION_BANDWIDTH, which models
+S3's per-connection throughput: what parallel connections win back.
+"""
+import logging
+import tempfile
+import time
+from io import BytesIO
+import boto3
+import pandas as pd
+from moto import mock_aws
+from app.routers.dataset_registry import DatasetRegistry
+from app.routers.load_exp_data_utils import ImportDataS3
+from app.routers.s3_disk_cache import S3DiskCache
+from benchmarks.synthetic import make_campaigns
+
+BUCKET = "roas-dashboard-bench"
+LATENCY_SECONDS = 0.03
+CONNECTION_BANDWIDTH = 50 * 1024 * 1024
+
+# Stand-ins for the four dashboard objects, in rows
+OBJECTS = {
+    "campaign_final.parquet": 1_000_000,
+    "adsets_final.parquet": 500_000,
+    "roas_final.csv": 200_000,
+    "clients_data_final.parquet": 5_000,
+}
+
+
+def simulate_network(parsed, **kwargs):
+    time.sleep(LATENCY_SECONDS + parsed.get("ContentLength", 0) / CONNECTION_BANDWIDTH)
+
+
+def upload(s3):
+    sizes = {}
+    for key, n_rows in OBJECTS.items():
+        df = make_campaigns(n_rows)
+        buffer = BytesIO()
+        if key.endswith(".csv"):
+            df.to_csv(buffer, index=False)
+        else:
+            df.to_parquet(buffer, index=False)
+        s3.put_object(Bucket=BUCKET, Key=key, Body=buffer.getvalue())
+        sizes[key] = len(buffer.getvalue())
+    return sizes
+
+
+def load_sequential(s3):
+    """The previous `ImportDataS3.load_df`, called by each loader in turn."""
+    for key in OBJECTS:
+        body = BytesIO(s3.get_object(Bucket=BUCKET, Key=key)["Body"].read())
+        pd.read_csv(body) if key.endswith(".csv") else pd.read_parquet(body)
+
+
+def load_concurrent(storage):
+    loaders = {key: (lambda key=key: storage.load_df(key)) for key in OBJECTS}
+    DatasetRegistry(loaders).load_all()
+
+
+def main():
+    logging.disable(logging.INFO)
+    with mock_aws():
+        s3 = boto3.client("s3", region_name="us-east-1", aws_access_key_id="testing", aws_secret_access_key="testing")
+        s3.create_bucket(Bucket=BUCKET)
+        sizes = upload(s3)
+        print(f"objects: {', '.join(f'{key} {size / 2**20:.1f} MiB' for key, size in sizes.items())}")
+
+        storage = ImportDataS3("testing", "testing", BUCKET)
+        storage.s3_client.meta.events.register("after-call.s3", simulate_network)
+        s3.meta.events.register("after-call.s3", simulate_network)
+
+        def timed(label, run):
+            start = time.perf_counter()
+            run()
+            print(f"{label:>28}: {time.perf_counter() - start:6.2f} s")
+
+        timed("sequential", lambda: load_sequential(s3))
+        timed("concurrent, no disk cache", lambda: load_concurrent(storage))
+        with tempfile.TemporaryDirectory() as directory:
+            storage.cache = S3DiskCache(directory)
+            timed("concurrent, cold disk cache", lambda: load_concurrent(storage))
+            timed("concurrent, warm disk cache", lambda: load_concurrent(storage))
+
+
+if __name__ == "__main__":
+    main()
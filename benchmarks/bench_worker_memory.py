@@ -0,0 +1,83 @@
+"""
+Compares the memory held by N worker processes when each one parses its
+own copy of the campaigns (and keeps the parquet bytes `/load-data` used
+to hold) against memory-mapping the shared Arrow file of the dataset store.
+
+    python -m benchmarks.bench_worker_memory
+
+RSS counts shared pages in every process; PSS splits them between the
+processes mapping them, so the PSS total is what the host actually pays.
+Reads /proc, so it runs on Linux only.
+"""
+import multiprocessing
+import os
+import tempfile
+from io import BytesIO
+import pandas as pd
+from app.routers.dataset_store import ArrowDatasetStore
+from benchmarks.synthetic import make_campaigns
+
+N_ROWS = 1_000_000
+WORKERS = [1, 2, 4]
+
+
+def memory_usage():
+    """Returns the RSS and PSS of the current process, in MiB."""
+    usage = {}
+    with open("/proc/self/smaps_rollup") as f:
+        for line in f:
+            name, _, value = line.partition(":")
+            if name in ("Rss", "Pss"):
+                usage[name] = int(value.split()[0]) / 1024
+    return usage
+
+
+def worker(mode, source, store_dir, barrier, results):
+    if mode == "before":
+        df = pd.read_parquet(source)
+        buffer = BytesIO()
+        df.to_parquet(buffer, index=False)
+    elif mode == "after":
+        df = ArrowDatasetStore(store_dir).load("campaigns", '"v1"', lambda: pd.read_parquet(source))
+    if mode != "baseline":
+        # Touch every numeric column, as the stats and forecasts do
+        df.select_dtypes("number").sum()
+
+    # Measure while every worker holds its data
+    barrier.wait()
+    results.put(memory_usage())
+    barrier.wait()
+
+
+def run(mode, n_workers, source, store_dir):
+    context = multiprocessing.get_context("spawn")
+    barrier = context.Barrier(n_workers)
+    results = context.Queue()
+    processes = [context.Process(target=worker, args=(mode, source, store_dir, barrier, results)) for _ in range(n_workers)]
+    for process in processes:
+        process.start()
+    usages = [results.get() for _ in processes]
+    for process in processes:
+        process.join()
+    return usages
+
+
+def main():
+    with tempfile.TemporaryDirectory() as directory:
+        source = os.path.join(directory, "campaign_final.parquet")
+        make_campaigns(N_ROWS).to_parquet(source)
+        store_dir = os.path.join(directory, "store")
+
+        baseline = run("baseline", 1, source, store_dir)[0]
+        print(f"{N_ROWS} rows, interpreter baseline RSS {baseline['Rss']:.0f} MiB")
+        print(f"{'mode':>8} {'workers':>8} {'RSS/worker':>11} {'PSS/worker':>11} {'PSS total':>10}")
+        for mode in ["before", "after"]:
+            for n_workers in WORKERS:
+                usages = run(mode, n_workers, source, store_dir)
+                rss = sum(usage["Rss"] for usage in usages) / n_workers
+                pss = sum(usage["Pss"] for usage in usages)
+                print(f"{mode:>8} {n_workers:>8} {rss:>11.0f} {pss / n_workers:>11.0f} {pss:>10.0f}")
+
+
+if __name__ == "__main__":
+    main()
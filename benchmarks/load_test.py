@@ -0,0 +1,369 @@
+"""
+HTTP load test of the app as deployed: uvicorn with several workers,
+loading synthetic `campaign_final.parquet` and `adsets_final.parquet`
+from a local S3 stand-in (benchmarks.s3_stub) instead of the bucket, and
+driven by concurrent clients mixing the dashboard's traffic:
+
+- chain: a page of `/main`, the descriptive stats of the same filters,
+  then a forecast from those stats
+- scan: a cursor pagination scan through several pages of `/main`
+- download: a ranged, a conditional (304) or a full `/load-data` of the
+  campaigns parquet file
+
+It reports the requests per second and the latency percentiles of each
+kind of request, and the peak RSS and PSS of each worker (PSS splits the
+pages shared by the workers, such as the memory-mapped dataset store).
+
+    python -m benchmarks.load_test --workers 2 --concurrency 16 --duration 60
+    python -m benchmarks.load_test --rows 1000000 --mix chain=1,scan=1 --output load.json
+
+The app's own settings (EXECUTION_BACKEND, USE_FILTER_INDEX, ...) are
+taken from the environment. Memory is read from /proc, so it is only
+reported on Linux.
+"""
+import argparse
+import json
+import logging
+import os
+import random
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from io import BytesIO
+from typing import Any, Callable, Dict, List, Optional, Tuple
+import httpx
+import numpy as np
+from benchmarks.s3_stub import S3Stub
+from benchmarks.synthetic import ADS_OBJECTIVES, COUNTRIES, make_adsets, make_campaigns
+
+BUCKET = "roas-dashboard-load-test"
+API_PREFIX = "api"
+CAMPAIGNS_KEY = "campaign_final.parquet"
+ADSETS_KEY = "adsets_final.parquet"
+DEFAULT_MIX = "chain=5,scan=3,download=2"
+READY_TIMEOUT_SECONDS = 600
+
+
+#################################################
+# Traffic
+#################################################
+
+class Recorder:
+    """Latency and status of every request, by kind of request."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.latencies: Dict[str, List[float]] = {}
+        self.statuses: Dict[str, Dict[str, int]] = {}
+
+    def request(self, client: httpx.Client, label: str, method: str, url: str, **kwargs) -> Optional[httpx.Response]:
+        start = time.perf_counter()
+        try:
+            response = client.request(method, url, **kwargs)
+            status = str(response.status_code)
+        except httpx.HTTPError as e:
+            response, status = None, type(e).__name__
+        elapsed = time.perf_counter() - start
+        with self._lock:
+            self.latencies.setdefault(label, []).append(elapsed)
+            statuses = self.statuses.setdefault(label, {})
+            statuses[status] = statuses.get(status, 0) + 1
+        return response
+
+
+def random_filters(rng: random.Random) -> Dict[str, Any]:
+    filters: Dict[str, Any] = {"Country": rng.sample([country for country in COUNTRIES if country], rng.randint(1, 3))}
+    if rng.random() < 0.5:
+        filters["Ads Objective"] = rng.choice(ADS_OBJECTIVES)
+    return filters
+
+
+def chain(client: httpx.Client, recorder: Recorder, rng: random.Random, context: Dict[str, Any]) -> None:
+    filters = random_filters(rng)
+    page = {"dataset_id": "campaigns", "filter_options": filters, "pagination": {"page": 1, "size": 50}}
+    recorder.request(client, "POST /main", "POST", f"/{API_PREFIX}/main", json=page)
+
+    stats = {"dataset_id": "campaigns", "filter_options": filters}
+    response = recorder.request(client, "POST /get_descriptive_stats", "POST", f"/{API_PREFIX}/get_descriptive_stats", json=stats)
+    if response is None or response.status_code != 200 or not response.json():
+        return
+    rows = response.json()
+    top = sorted(rows, key=lambda row: row["No. of Campaigns"], reverse=True)[:4]
+    forecast = {"data": rows, "budget": rng.choice([1_000, 10_000, 50_000]), "distribution": {row["Result Type"]: 25 for row in top}}
+    recorder.request(client, "POST /get_forecast_by_value", "POST", f"/{API_PREFIX}/get_forecast_by_value", json=forecast)
+
+
+def scan(client: httpx.Client, recorder: Recorder, rng: random.Random, context: Dict[str, Any]) -> None:
+    body = {"dataset_id": "campaigns", "filter_options": random_filters(rng), "pagination": {"page": 1, "size": 100, "use_cursor": True}}
+    for page in range(1, rng.randint(3, 10) + 1):
+        body["pagination"]["page"] = page
+        response = recorder.request(client, "POST /main (cursor)", "POST", f"/{API_PREFIX}/main", json=body)
+        if response is None or response.status_code != 200:
+            return
+        result = response.json()
+        body["pagination"]["cursor"] = result["cursor"]
+        if page >= result["total_pages"]:
+            return
+
+
+def download(client: httpx.Client, recorder: Recorder, rng: random.Random, context: Dict[str, Any]) -> None:
+    url = f"/{API_PREFIX}/load-data/{CAMPAIGNS_KEY}"
+    kind = rng.random()
+    if kind < 0.4:
+        start = rng.randrange(0, max(context["campaigns_size"] - 1_048_576, 1))
+        recorder.request(client, "GET /load-data (range)", "GET", url, headers={"Range": f"bytes={start}-{start + 1_048_575}"})
+    elif kind < 0.8:
+        recorder.request(client, "GET /load-data (304)", "GET", url, headers={"If-None-Match": context["campaigns_etag"]})
+    else:
+        recorder.request(client, "GET /load-data (full)", "GET", url)
+
+
+SCENARIOS: Dict[str, Callable[..., None]] = {"chain": chain, "scan": scan, "download": download}
+
+
+def drive(base_url: str, concurrency: int, duration: float, mix: Dict[str, float], context: Dict[str, Any]) -> Tuple[Recorder, float]:
+    """Runs `concurrency` clients picking scenarios by their `mix` weights for `duration` seconds."""
+    recorder = Recorder()
+    names, weights = list(mix), list(mix.values())
+    deadline = time.perf_counter() + duration
+
+    def client_loop(seed: int) -> None:
+        rng = random.Random(seed)
+        with httpx.Client(base_url=base_url, timeout=120) as client:
+            while time.perf_counter() < deadline:
+                SCENARIOS[rng.choices(names, weights)[0]](client, recorder, rng, context)
+
+    threads = [threading.Thread(target=client_loop, args=(seed,)) for seed in range(concurrency)]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return recorder, time.perf_counter() - start
+
+
+#################################################
+# Server
+#################################################
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def worker_pids(master_pid: int) -> List[int]:
+    """The uvicorn workers: the children of the master running multiprocessing's spawn_main, or the master itself."""
+    pids = []
+    try:
+        with open(f"/proc/{master_pid}/task/{master_pid}/children") as f:
+            children = [int(pid) for pid in f.read().split()]
+    except OSError:
+        return [master_pid]
+    for pid in children:
+        try:
+            with open(f"/proc/{pid}/cmdline", "rb") as f:
+                if b"spawn_main" in f.read():
+                    pids.append(pid)
+        except OSError:
+            continue
+    return pids or [master_pid]
+
+
+def memory_usage(pid: int) -> Dict[str, float]:
+    """RSS and PSS of a process, in MiB (empty if /proc can't tell)."""
+    usage = {}
+    try:
+        with open(f"/proc/{pid}/smaps_rollup") as f:
+            for line in f:
+                name, _, value = line.partition(":")
+                if name in ("Rss", "Pss"):
+                    usage[name.lower()] = int(value.split()[0]) / 1024
+    except OSError:
+        pass
+    return usage
+
+
+class MemorySampler(threading.Thread):
+    """Samples the memory of the workers every `interval` seconds and keeps each one's peak."""
+
+    def __init__(self, pids: List[int], interval: float = 1.0):
+        super().__init__(daemon=True)
+        self.pids = pids
+        self.interval = interval
+        self.peaks: Dict[int, Dict[str, float]] = {pid: {} for pid in pids}
+        self._done = threading.Event()
+
+    def sample(self) -> None:
+        for pid in self.pids:
+            for name, value in memory_usage(pid).items():
+                self.peaks[pid][name] = max(self.peaks[pid].get(name, 0.0), value)
+
+    def run(self) -> None:
+        while not self._done.wait(self.interval):
+            self.sample()
+
+    def stop(self) -> None:
+        self._done.set()
+        self.join()
+        self.sample()
+
+
+def start_server(workers: int, port: int, s3: S3Stub, work_dir: str, log_file) -> subprocess.Popen:
+    env = {
+        **os.environ,
+        "AWS_ACCESS_KEY_ID": "load-test",
+        "AWS_SECRET_ACCESS_KEY": "load-test",
+        "BUCKET_NAME": BUCKET,
+        "S3_ENDPOINT_URL": s3.endpoint_url,
+        "API_ROUTER_PREFIX": API_PREFIX,
+        "PRELOAD_DATASETS": "campaigns,adsets",
+        "S3_CACHE_DIR": os.path.join(work_dir, "s3_cache"),
+        "DATASET_STORE_DIR": os.path.join(work_dir, "datasets"),
+    }
+    command = [
+        sys.executable, "-m", "uvicorn", "app.main:app",
+        "--host", "127.0.0.1", "--port", str(port), "--workers", str(workers), "--log-level", "warning",
+    ]
+    return subprocess.Popen(command, env=env, stdout=log_file, stderr=subprocess.STDOUT)
+
+
+def wait_ready(base_url: str, workers: int, server: subprocess.Popen) -> None:
+    """Waits until /ready answers 200 on enough new connections to have reached every worker, most likely."""
+    deadline = time.perf_counter() + READY_TIMEOUT_SECONDS
+    consecutive = 0
+    while consecutive < 4 * workers:
+        if server.poll() is not None:
+            raise RuntimeError(f"The server exited with status {server.returncode}")
+        if time.perf_counter() > deadline:
+            raise RuntimeError(f"The workers weren't ready after {READY_TIMEOUT_SECONDS} s")
+        try:
+            ready = httpx.get(f"{base_url}/ready", timeout=5).status_code == 200
+        except httpx.HTTPError:
+            ready = False
+        consecutive = consecutive + 1 if ready else 0
+        if not ready:
+            time.sleep(0.5)
+
+
+#################################################
+# Report
+#################################################
+
+def summarize(recorder: Recorder, elapsed: float) -> List[Dict[str, Any]]:
+    rows = []
+    for label in sorted(recorder.latencies):
+        latencies = np.array(recorder.latencies[label])
+        statuses = recorder.statuses[label]
+        errors = sum(count for status, count in statuses.items() if not status.isdigit() or int(status) >= 400)
+        p50, p95, p99 = np.percentile(latencies, [50, 95, 99])
+        rows.append({
+            "request": label,
+            "count": len(latencies),
+            "rps": len(latencies) / elapsed,
+            "p50_seconds": float(p50),
+            "p95_seconds": float(p95),
+            "p99_seconds": float(p99),
+            "max_seconds": float(latencies.max()),
+            "errors": errors,
+            "statuses": statuses,
+        })
+    return rows
+
+
+def print_report(requests: List[Dict[str, Any]], memory: Dict[int, Dict[str, float]], elapsed: float) -> None:
+    print(f"\n{'request':>30} {'count':>7} {'rps':>7} {'p50 (ms)':>9} {'p95 (ms)':>9} {'p99 (ms)':>9} {'max (ms)':>9} {'errors':>7}")
+    for row in requests:
+        print(
+            f"{row['request']:>30} {row['count']:>7} {row['rps']:>7.1f} {row['p50_seconds'] * 1000:>9.1f} "
+            f"{row['p95_seconds'] * 1000:>9.1f} {row['p99_seconds'] * 1000:>9.1f} {row['max_seconds'] * 1000:>9.1f} {row['errors']:>7}"
+        )
+    total = sum(row["count"] for row in requests)
+    print(f"{'total':>30} {total:>7} {total / elapsed:>7.1f}")
+
+    print(f"\n{'worker pid':>10} {'peak RSS (MiB)':>15} {'peak PSS (MiB)':>15}")
+    for pid, usage in memory.items():
+        print(f"{pid:>10} {usage.get('rss', float('nan')):>15.1f} {usage.get('pss', float('nan')):>15.1f}")
+
+
+def parse_mix(mix: str) -> Dict[str, float]:
+    weights = {}
+    for item in mix.split(","):
+        name, _, weight = item.partition("=")
+        if name not in SCENARIOS:
+            raise ValueError(f"Unknown scenario '{name}', expected one of {', '.join(SCENARIOS)}")
+        weights[name] = float(weight or 1)
+    return weights
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--workers", type=int, default=2, help="uvicorn workers")
+    parser.add_argument("--concurrency", type=int, default=16, help="concurrent clients")
+    parser.add_argument("--duration", type=float, default=60, help="seconds of traffic")
+    parser.add_argument("--rows", type=int, default=200_000, help="synthetic campaigns (adsets: half as many)")
+    parser.add_argument("--mix", default=DEFAULT_MIX, help="scenario weights, e.g. chain=5,scan=3,download=2")
+    parser.add_argument("--output", help="also write the results to this JSON file")
+    args = parser.parse_args(argv)
+    try:
+        mix = parse_mix(args.mix)
+    except ValueError as e:
+        parser.error(str(e))
+
+    logging.disable(logging.INFO)
+    with tempfile.TemporaryDirectory(prefix="roas_load_test_") as work_dir, S3Stub(BUCKET) as s3:
+        context = {}
+        for key, df in ((CAMPAIGNS_KEY, make_campaigns(args.rows)), (ADSETS_KEY, make_adsets(args.rows // 2))):
+            buffer = BytesIO()
+            df.to_parquet(buffer, index=False)
+            etag = s3.put(key, buffer.getvalue())
+            if key == CAMPAIGNS_KEY:
+                context = {"campaigns_etag": etag, "campaigns_size": len(buffer.getvalue())}
+        print(f"{args.rows} campaigns ({context['campaigns_size'] / 2**20:.1f} MiB of parquet) served by the S3 stub at {s3.endpoint_url}")
+
+        port = free_port()
+        base_url = f"http://127.0.0.1:{port}"
+        log_path = os.path.join(work_dir, "server.log")
+        with open(log_path, "w") as log_file:
+            server = start_server(args.workers, port, s3, work_dir, log_file)
+            try:
+                started = time.perf_counter()
+                try:
+                    wait_ready(base_url, args.workers, server)
+                except RuntimeError:
+                    with open(log_path) as f:
+                        sys.stderr.write(f.read())
+                    raise
+                print(f"{args.workers} workers ready in {time.perf_counter() - started:.1f} s, "
+                      f"{args.concurrency} clients for {args.duration:g} s, mix {args.mix}, {os.cpu_count()} CPUs")
+
+                sampler = MemorySampler(worker_pids(server.pid))
+                sampler.start()
+                recorder, elapsed = drive(base_url, args.concurrency, args.duration, mix, context)
+                sampler.stop()
+            finally:
+                server.terminate()
+                server.wait()
+
+    requests = summarize(recorder, elapsed)
+    print_report(requests, sampler.peaks, elapsed)
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump({
+                "workers": args.workers,
+                "concurrency": args.concurrency,
+                "duration": elapsed,
+                "rows": args.rows,
+                "mix": mix,
+                "cpu_count": os.cpu_count(),
+                "requests": requests,
+                "workers_memory_mib": {str(pid): usage for pid, usage in sampler.peaks.items()},
+            }, f, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
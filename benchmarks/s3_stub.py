@@ -0,0 +1,150 @@
+"""
+A local stand-in for S3, serving objects from a directory over HTTP with
+the subset of the S3 API the app uses: HEAD and GET of an object, with a
+byte `Range`, `If-Match` and `If-None-Match`. Requests aren't
+authenticated. Point the app at it with `S3_ENDPOINT_URL`, which makes
+boto3 address the bucket in the path (`/<bucket>/<key>`).
+
+    with S3Stub("roas-dashboard") as s3:
+        s3.put("campaign_final.parquet", data)
+        os.environ["S3_ENDPOINT_URL"] = s3.endpoint_url
+"""
+import hashlib
+import os
+import re
+import shutil
+import tempfile
+import threading
+from email.utils import formatdate
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, Optional, Tuple
+from urllib.parse import unquote, urlsplit
+
+_RANGE_PATTERN = re.compile(r"^bytes=(\d*)-(\d*)$")
+CHUNK_SIZE = 1024 * 1024
+
+
+class S3Stub:
+    """Serves the objects `put` in `bucket` on 127.0.0.1, from a thread of this process."""
+
+    def __init__(self, bucket: str, port: int = 0, directory: Optional[str] = None):
+        self.bucket = bucket
+        self._own_directory = directory is None
+        self.directory = directory or tempfile.mkdtemp(prefix="s3_stub_")
+        # key -> (path, ETag, Last-Modified)
+        self.objects: Dict[str, Tuple[str, str, str]] = {}
+        self._server = ThreadingHTTPServer(("127.0.0.1", port), _handler(self))
+        self._server.daemon_threads = True
+        self._thread = threading.Thread(target=self._server.serve_forever, name="s3-stub", daemon=True)
+
+    @property
+    def endpoint_url(self) -> str:
+        return f"http://127.0.0.1:{self._server.server_address[1]}"
+
+    def put(self, key: str, data: bytes) -> str:
+        """Stores an object and returns its ETag."""
+        path = os.path.join(self.directory, hashlib.sha1(key.encode()).hexdigest())
+        with open(path, "wb") as f:
+            f.write(data)
+        etag = f'"{hashlib.md5(data).hexdigest()}"'
+        self.objects[key] = (path, etag, formatdate(usegmt=True))
+        return etag
+
+    def start(self) -> "S3Stub":
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._server.shutdown()
+        self._server.server_close()
+        if self._own_directory:
+            shutil.rmtree(self.directory, ignore_errors=True)
+
+    def __enter__(self) -> "S3Stub":
+        return self.start()
+
+    def __exit__(self, *exc_info) -> None:
+        self.stop()
+
+
+def _handler(stub: S3Stub):
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def log_message(self, format, *args):
+            pass
+
+        def do_HEAD(self):
+            self._serve(body=False)
+
+        def do_GET(self):
+            self._serve(body=True)
+
+        def _error(self, status: int, code: str, message: str, body: bool) -> None:
+            payload = (
+                '<?xml version="1.0" encoding="UTF-8"?>'
+                f"<Error><Code>{code}</Code><Message>{message}</Message></Error>"
+            ).encode()
+            self.send_response(status)
+            self.send_header("Content-Type", "application/xml")
+            self.send_header("Content-Length", str(len(payload) if body else 0))
+            self.end_headers()
+            if body:
+                self.wfile.write(payload)
+
+        def _serve(self, body: bool) -> None:
+            bucket, _, key = unquote(urlsplit(self.path).path).lstrip("/").partition("/")
+            obj = stub.objects.get(key) if bucket == stub.bucket else None
+            if obj is None:
+                self._error(404, "NoSuchKey", "The specified key does not exist.", body)
+                return
+            path, etag, last_modified = obj
+            size = os.path.getsize(path)
+
+            if_match = self.headers.get("If-Match")
+            if if_match is not None and if_match not in ("*", etag):
+                self._error(412, "PreconditionFailed", "At least one of the preconditions you specified did not hold.", body)
+                return
+            if_none_match = self.headers.get("If-None-Match")
+            if if_none_match is not None and if_none_match in ("*", etag):
+                self.send_response(304)
+                self.send_header("ETag", etag)
+                self.end_headers()
+                return
+
+            start, end = 0, size - 1
+            partial = False
+            match = _RANGE_PATTERN.match(self.headers.get("Range", ""))
+            if match and (match.group(1) or match.group(2)):
+                if match.group(1):
+                    start = int(match.group(1))
+                    end = min(int(match.group(2)), size - 1) if match.group(2) else size - 1
+                else:
+                    start = max(size - int(match.group(2)), 0)
+                if start >= size:
+                    self._error(416, "InvalidRange", "The requested range is not satisfiable.", body)
+                    return
+                partial = True
+
+            self.send_response(206 if partial else 200)
+            self.send_header("ETag", etag)
+            self.send_header("Last-Modified", last_modified)
+            self.send_header("Accept-Ranges", "bytes")
+            self.send_header("Content-Type", "application/octet-stream")
+            self.send_header("Content-Length", str(end - start + 1))
+            if partial:
+                self.send_header("Content-Range", f"bytes {start}-{end}/{size}")
+            self.end_headers()
+            if not body:
+                return
+            with open(path, "rb") as f:
+                f.seek(start)
+                remaining = end - start + 1
+                while remaining > 0:
+                    chunk = f.read(min(CHUNK_SIZE, remaining))
+                    if not chunk:
+                        break
+                    self.wfile.write(chunk)
+                    remaining -= len(chunk)
+
+    return Handler
@@ -0,0 +1,348 @@
+"""
+Benchmark suite of the Autoforecaster endpoints: the filter, stats and
+forecast functions, the parquet loaders and end-to-end requests through
+the app, on synthetic campaigns of each size. For every case and size it
+records the throughput, the p50/p99 latency and the peak of memory
+allocated, and writes them to a JSON file named after the commit.
+
+    python -m benchmarks.suite                        # 1k, 100k and 1M rows
+    python -m benchmarks.suite --sizes 1000,100000 --cases stats,e2e_stats
+    python -m benchmarks.suite --compare benchmarks/results/<commit>.json
+
+`--compare` prints the p50 change of every case against an earlier
+results file and exits with status 1 if one slowed down by more than
+`--threshold`.
+
+Each case runs until it has taken MIN_SECONDS (and at least
+MIN_ITERATIONS times), after one warm-up call. The memory peak is
+measured by tracemalloc on one more call, which counts the allocations
+of Python and numpy but not of Arrow buffers. The loaders read from an
+in-process moto bucket, so their timings exclude the network. The
+end-to-end cases post to the app with the TestClient, referencing the
+dataset by `dataset_id`, with the stats and result-set caches cleared
+before each request so every one is computed (`e2e_stats_cube` filters
+on a single country, which is answered by the stats cube instead).
+"""
+import argparse
+import json
+import logging
+import os
+import platform
+import subprocess
+import sys
+import time
+import tracemalloc
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from functools import lru_cache
+from io import BytesIO
+from typing import Any, Callable, Dict, Iterator, List, Optional
+import numpy as np
+import pandas as pd
+from benchmarks.synthetic import make_adsets, make_campaigns
+
+SIZES = [1_000, 100_000, 1_000_000]
+MIN_SECONDS = 2.0
+MIN_ITERATIONS = 5
+MAX_ITERATIONS = 1_000
+RESULTS_DIR = os.path.join(os.path.dirname(__file__), "results")
+
+BUCKET = "roas-dashboard-bench"
+DATASET_ID = "campaigns"
+FILTER_OPTIONS = {"Country": ["Malaysia", "Singapore"]}
+CUBE_FILTER_OPTIONS = {"Country": "Malaysia"}
+BUDGET = 10_000.0
+
+
+#################################################
+# Cases
+#################################################
+
+@lru_cache(maxsize=1)
+def campaigns(n_rows: int) -> pd.DataFrame:
+    """The synthetic campaigns with the dtypes `load_campaigns_df()` returns."""
+    from app.routers.load_exp_data_utils import CAMPAIGN_SCHEMA, apply_schema
+
+    return apply_schema(make_campaigns(n_rows), CAMPAIGN_SCHEMA)
+
+
+def distribution(stats: pd.DataFrame) -> Dict[str, int]:
+    """Spreads the budget over the five most common result types."""
+    top = stats.sort_values('No. of Campaigns', ascending=False)['Result Type'].head(5)
+    return {result_type: 20 for result_type in top}
+
+
+@contextmanager
+def filter_case(n_rows: int) -> Iterator[Callable[[], Any]]:
+    from app.routers.Autoforecaster_module import filter_dataframe
+
+    df = campaigns(n_rows)
+    yield lambda: filter_dataframe(df, FILTER_OPTIONS)
+
+
+@contextmanager
+def stats_case(n_rows: int) -> Iterator[Callable[[], Any]]:
+    from app.routers.Autoforecaster_module import get_descriptive_stats
+
+    df = campaigns(n_rows)
+    yield lambda: get_descriptive_stats(df)
+
+
+@contextmanager
+def forecast_case(n_rows: int) -> Iterator[Callable[[], Any]]:
+    from app.routers.Autoforecaster_module import get_descriptive_stats, get_forecast_by_value
+
+    stats = get_descriptive_stats(campaigns(n_rows))
+    split = distribution(stats)
+    yield lambda: get_forecast_by_value(stats, BUDGET, split)
+
+
+@contextmanager
+def s3_objects(objects: Dict[str, pd.DataFrame]) -> Iterator[None]:
+    """Serves `objects` as parquet files from a moto bucket to the shared ImportDataS3."""
+    import boto3
+    from moto import mock_aws
+    from app.routers import load_exp_data_utils
+    from app.routers.load_exp_data_utils import ImportDataS3
+
+    with mock_aws():
+        s3 = boto3.client("s3", region_name="us-east-1", aws_access_key_id="testing", aws_secret_access_key="testing")
+        s3.create_bucket(Bucket=BUCKET)
+        for key, df in objects.items():
+            buffer = BytesIO()
+            df.to_parquet(buffer, index=False)
+            s3.put_object(Bucket=BUCKET, Key=key, Body=buffer.getvalue())
+        previous = load_exp_data_utils._s3_storage
+        load_exp_data_utils._s3_storage = ImportDataS3("testing", "testing", BUCKET)
+        try:
+            yield
+        finally:
+            load_exp_data_utils._s3_storage = previous
+
+
+@contextmanager
+def load_campaigns_case(n_rows: int) -> Iterator[Callable[[], Any]]:
+    from app.routers.load_exp_data_utils import load_campaigns_df
+
+    with s3_objects({"campaign_final.parquet": make_campaigns(n_rows)}):
+        yield load_campaigns_df
+
+
+@contextmanager
+def load_adsets_case(n_rows: int) -> Iterator[Callable[[], Any]]:
+    from app.routers.load_exp_data_utils import load_adsets_df
+
+    with s3_objects({"adsets_final.parquet": make_adsets(n_rows)}):
+        yield load_adsets_df
+
+
+@contextmanager
+def app_client(n_rows: int) -> Iterator[Callable[[str, Dict[str, Any]], None]]:
+    """
+    Yields a function posting a body to an endpoint of the app, with the
+    campaigns registered as DATASET_ID and the caches cleared first.
+    """
+    from fastapi.testclient import TestClient
+    from app.main import API_ROUTER_PREFIX, app
+    from app.routers import Autoforecaster_module as router_module
+    from app.routers.dataset_registry import DatasetRegistry
+
+    df = campaigns(n_rows)
+    registry = DatasetRegistry({DATASET_ID: lambda: df}, versions=lambda dataset_id: '"bench"')
+    registry.load_all()
+    previous = router_module.dataset_registry
+    router_module.dataset_registry = registry
+    client = TestClient(app)
+
+    def post(path: str, body: Dict[str, Any]) -> None:
+        router_module.stats_cache.clear()
+        router_module.result_set_cache.clear()
+        response = client.post(f"/{API_ROUTER_PREFIX}{path}", json=body)
+        if response.status_code != 200:
+            raise RuntimeError(f"POST {path} returned {response.status_code}: {response.text[:200]}")
+
+    try:
+        yield post
+    finally:
+        router_module.dataset_registry = previous
+
+
+@contextmanager
+def e2e_filter_case(n_rows: int) -> Iterator[Callable[[], Any]]:
+    body = {"dataset_id": DATASET_ID, "filter_options": FILTER_OPTIONS, "pagination": {"page": 1, "size": 50}}
+    with app_client(n_rows) as post:
+        yield lambda: post("/filter_dataframe", body)
+
+
+@contextmanager
+def e2e_main_case(n_rows: int) -> Iterator[Callable[[], Any]]:
+    body = {"dataset_id": DATASET_ID, "filter_options": FILTER_OPTIONS, "pagination": {"page": 2, "size": 50}}
+    with app_client(n_rows) as post:
+        yield lambda: post("/main", body)
+
+
+@contextmanager
+def e2e_stats_case(n_rows: int) -> Iterator[Callable[[], Any]]:
+    body = {"dataset_id": DATASET_ID, "filter_options": FILTER_OPTIONS}
+    with app_client(n_rows) as post:
+        yield lambda: post("/get_descriptive_stats", body)
+
+
+@contextmanager
+def e2e_stats_cube_case(n_rows: int) -> Iterator[Callable[[], Any]]:
+    body = {"dataset_id": DATASET_ID, "filter_options": CUBE_FILTER_OPTIONS}
+    with app_client(n_rows) as post:
+        yield lambda: post("/get_descriptive_stats", body)
+
+
+@contextmanager
+def e2e_forecast_case(n_rows: int) -> Iterator[Callable[[], Any]]:
+    from app.routers.Autoforecaster_module import get_descriptive_stats
+
+    stats = get_descriptive_stats(campaigns(n_rows))
+    body = {"data": stats.to_dict(orient='records'), "budget": BUDGET, "distribution": distribution(stats)}
+    with app_client(n_rows) as post:
+        yield lambda: post("/get_forecast_by_value", body)
+
+
+CASES = {
+    "filter": filter_case,
+    "stats": stats_case,
+    "forecast": forecast_case,
+    "load_campaigns": load_campaigns_case,
+    "load_adsets": load_adsets_case,
+    "e2e_filter": e2e_filter_case,
+    "e2e_main": e2e_main_case,
+    "e2e_stats": e2e_stats_case,
+    "e2e_stats_cube": e2e_stats_cube_case,
+    "e2e_forecast": e2e_forecast_case,
+}
+
+
+#################################################
+# Runner
+#################################################
+
+def measure(fn: Callable[[], Any], min_seconds: float = MIN_SECONDS) -> Dict[str, Any]:
+    """Times `fn` (see the module docstring) and returns its statistics."""
+    fn()
+    timings: List[float] = []
+    deadline = time.perf_counter() + min_seconds
+    while len(timings) < MIN_ITERATIONS or (time.perf_counter() < deadline and len(timings) < MAX_ITERATIONS):
+        start = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - start)
+
+    tracemalloc.start()
+    try:
+        fn()
+        peak = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+    seconds = np.array(timings)
+    p50, p99 = np.percentile(seconds, [50, 99])
+    return {
+        "iterations": len(timings),
+        "mean_seconds": float(seconds.mean()),
+        "p50_seconds": float(p50),
+        "p99_seconds": float(p99),
+        "throughput_per_second": float(1 / seconds.mean()),
+        "peak_memory_bytes": peak,
+    }
+
+
+def run_suite(sizes: List[int], cases: List[str], min_seconds: float = MIN_SECONDS) -> List[Dict[str, Any]]:
+    results = []
+    for n_rows in sizes:
+        for name in cases:
+            with CASES[name](n_rows) as fn:
+                result = {"case": name, "rows": n_rows, **measure(fn, min_seconds)}
+            result["rows_per_second"] = n_rows / result["mean_seconds"]
+            results.append(result)
+            print(
+                f"{name:>15} {n_rows:>9} {result['iterations']:>6} {result['p50_seconds'] * 1000:>10.2f} "
+                f"{result['p99_seconds'] * 1000:>10.2f} {result['throughput_per_second']:>9.1f} "
+                f"{result['peak_memory_bytes'] / 2**20:>9.1f}",
+                flush=True,
+            )
+    return results
+
+
+def git_commit() -> Dict[str, Any]:
+    """The commit benchmarked, and whether the working tree had changes."""
+    def git(*args):
+        return subprocess.run(["git", *args], capture_output=True, text=True, cwd=os.path.dirname(__file__)).stdout.strip()
+
+    return {"commit": git("rev-parse", "--short", "HEAD") or "unknown", "dirty": bool(git("status", "--porcelain", "--untracked-files=no"))}
+
+
+def environment() -> Dict[str, Any]:
+    import fastapi
+    import pyarrow
+
+    return {
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "packages": {"pandas": pd.__version__, "numpy": np.__version__, "pyarrow": pyarrow.__version__, "fastapi": fastapi.__version__},
+    }
+
+
+def compare(results: List[Dict[str, Any]], baseline: List[Dict[str, Any]], threshold: float) -> bool:
+    """Prints the p50 change of each case against `baseline`; returns False if any regressed beyond `threshold`."""
+    previous = {(result["case"], result["rows"]): result for result in baseline}
+    ok = True
+    print(f"\n{'case':>15} {'rows':>9} {'before (ms)':>12} {'after (ms)':>11} {'change':>8}")
+    for result in results:
+        before = previous.get((result["case"], result["rows"]))
+        if before is None:
+            continue
+        change = result["p50_seconds"] / before["p50_seconds"] - 1
+        regressed = change > threshold
+        ok = ok and not regressed
+        print(
+            f"{result['case']:>15} {result['rows']:>9} {before['p50_seconds'] * 1000:>12.2f} "
+            f"{result['p50_seconds'] * 1000:>11.2f} {change:>+7.1%}{'  REGRESSION' if regressed else ''}"
+        )
+    return ok
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--sizes", default=",".join(map(str, SIZES)), help="comma separated row counts")
+    parser.add_argument("--cases", default=",".join(CASES), help=f"comma separated cases among {', '.join(CASES)}")
+    parser.add_argument("--min-seconds", type=float, default=MIN_SECONDS, help="time spent on each case")
+    parser.add_argument("--output", help="results file (default: benchmarks/results/<commit>.json)")
+    parser.add_argument("--compare", help="earlier results file to compare with")
+    parser.add_argument("--threshold", type=float, default=0.10, help="p50 slowdown reported as a regression")
+    args = parser.parse_args(argv)
+
+    sizes = [int(size) for size in args.sizes.split(",")]
+    cases = args.cases.split(",")
+    unknown = [name for name in cases if name not in CASES]
+    if unknown:
+        parser.error(f"unknown cases: {', '.join(unknown)}")
+
+    logging.disable(logging.INFO)
+    commit = git_commit()
+    print(f"commit {commit['commit']}{' (dirty)' if commit['dirty'] else ''}, {os.cpu_count()} CPUs")
+    print(f"{'case':>15} {'rows':>9} {'iters':>6} {'p50 (ms)':>10} {'p99 (ms)':>10} {'per sec':>9} {'peak MiB':>9}")
+    results = run_suite(sizes, cases, args.min_seconds)
+
+    output = args.output or os.path.join(RESULTS_DIR, f"{commit['commit']}{'-dirty' if commit['dirty'] else ''}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, "w") as f:
+        json.dump({**commit, "created_at": datetime.now(timezone.utc).isoformat(), **environment(), "results": results}, f, indent=2)
+    print(f"\nWrote {output}")
+
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        if not compare(results, baseline["results"], args.threshold):
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
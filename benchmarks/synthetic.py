@@ -0,0 +1,116 @@
+import numpy as np
+import pandas as pd
+
+#################################################
+# Synthetic Campaign Data
+#################################################
+
+CLIENT_INDUSTRIES = [
+    'Information, Tech & Telecommunications', 'Health & Wellness', 'Education', 'Retail',
+    'Food & Beverage', 'Finance', 'Property', 'Automotive', 'Travel & Hospitality', 'Government',
+]
+PAGE_CATEGORIES = ['Business', 'Medical', 'Education', 'Shopping & Retail', 'Restaurant', 'Bank', 'Real Estate', 'Cars']
+ADS_OBJECTIVES = ['Outcome Awareness', 'Outcome Engagement', 'Outcome Traffic', 'Outcome Leads', 'Outcome Sales']
+COUNTRIES = ['Malaysia', 'Singapore', 'Indonesia', 'Thailand', 'Philippines', None]
+
+
+def result_types(n_types: int):
+    base = ['Link Click', 'Post Engagement', 'Page Like', 'Lead', 'Purchase', 'Video View', 'Reach', 'Landing Page View']
+    return (base + [f'Custom Conversion {i}' for i in range(n_types)])[:n_types]
+
+
+def make_campaigns(n_rows: int, n_result_types: int = 40, seed: int = 0) -> pd.DataFrame:
+    """
+    Returns `n_rows` synthetic campaigns with the columns of
+    `load_campaigns_df()` and the dtypes it used to return (string dates,
+    object text), with skewed result type frequencies and a few missing
+    costs. `apply_schema(df, CAMPAIGN_SCHEMA)` gives the current dtypes.
+    """
+    rng = np.random.default_rng(seed)
+    types = result_types(n_result_types)
+    weights = rng.dirichlet(np.ones(len(types)) * 0.5)
+
+    start = pd.Timestamp('2019-01-01') + pd.to_timedelta(rng.integers(0, 5 * 365, n_rows), unit='D')
+    stop = start + pd.to_timedelta(rng.integers(1, 90, n_rows), unit='D')
+    amount_spent = np.round(rng.gamma(2.0, 400.0, n_rows), 2)
+    impressions = rng.integers(1_000, 2_000_000, n_rows)
+    total_results = rng.integers(1, 20_000, n_rows)
+
+    cost_per_result = np.round(amount_spent / total_results, 2)
+    cost_per_mile = np.round(amount_spent / impressions * 1000, 2)
+    cost_per_result[rng.random(n_rows) < 0.02] = np.nan
+    cost_per_mile[rng.random(n_rows) < 0.02] = np.nan
+
+    df = pd.DataFrame({
+        'Start Date': start.strftime('%Y-%m-%d'),
+        'Stop Date': stop.strftime('%Y-%m-%d'),
+        'Client Industry': rng.choice(CLIENT_INDUSTRIES, n_rows),
+        'Facebook Page Name': [f'Page {i}' for i in rng.integers(0, max(n_rows // 20, 1), n_rows)],
+        'Facebook Page Category': rng.choice(PAGE_CATEGORIES, n_rows),
+        'Ads Objective': rng.choice(ADS_OBJECTIVES, n_rows),
+        'Amount Spent': amount_spent,
+        'Impressions': impressions,
+        'Reach': (impressions * rng.uniform(0.3, 0.9, n_rows)).astype('int64'),
+        'Result Type': rng.choice(types, n_rows, p=weights),
+        'Total Results': total_results,
+        'Cost per Result': cost_per_result,
+        'Cost per Mile': cost_per_mile,
+        'Campaign Name': [f'Campaign {i}' for i in range(n_rows)],
+        'Campaign ID': pd.Series(rng.integers(10**14, 10**15, n_rows)).astype('string'),
+        'Account ID': [f'act_{i}' for i in rng.integers(0, 500, n_rows)],
+        'Company Name': [f'Company {i}' for i in rng.integers(0, 500, n_rows)],
+        'Country': rng.choice(np.array(COUNTRIES, dtype=object), n_rows),
+        'Start Year': start.year,
+        'Start Month': start.strftime('%B'),
+    })
+    return df.sort_values(['Start Date'], ascending=False)
+
+
+PSYCHOGRAPHIC_LABELS = ['INTERESTS', 'BEHAVIORS', 'DEMOGRAPHICS', 'WORK', 'EDUCATION']
+PSYCHOGRAPHIC_ITEMS = [
+    'Travel', 'Food', 'Online shopping', 'Frequent travelers', 'Parents (All)', 'Small business owners',
+    'Engaged shoppers', 'Fitness and wellness', 'Technology', 'Fashion', 'Cars', 'Real estate',
+]
+
+
+def make_psychographic(n_rows: int, n_unique: int, seed: int = 0) -> pd.Series:
+    """`n_rows` targeting texts drawn from `n_unique` distinct ones, shaped like the raw column."""
+    rng = np.random.default_rng(seed)
+    texts = []
+    for _ in range(n_unique):
+        labels = rng.choice(PSYCHOGRAPHIC_LABELS, int(rng.integers(1, 4)), replace=False)
+        texts.append(" ".join(
+            f'{label}: ' + ", ".join(f'"{item}"' for item in rng.choice(PSYCHOGRAPHIC_ITEMS, int(rng.integers(1, 6)), replace=False))
+            for label in labels
+        ))
+    return pd.Series(rng.choice(np.array(texts, dtype=object), n_rows), name='Psychographic')
+
+
+def make_adsets(n_rows: int, n_result_types: int = 40, seed: int = 0) -> pd.DataFrame:
+    """
+    Returns `n_rows` synthetic adsets with the raw columns of
+    `adsets_final.parquet` that `load_adsets_df()` reads (integer ids,
+    unformatted Psychographic targeting).
+    """
+    rng = np.random.default_rng(seed)
+    start = pd.Timestamp('2019-01-01') + pd.to_timedelta(rng.integers(0, 5 * 365, n_rows), unit='D')
+    end = start + pd.to_timedelta(rng.integers(1, 90, n_rows), unit='D')
+    campaign_ids = rng.integers(10**14, 10**15, max(n_rows // 3, 1))
+    return pd.DataFrame({
+        'Client Industry': rng.choice(CLIENT_INDUSTRIES, n_rows),
+        'Facebook Page Name': [f'Page {i}' for i in rng.integers(0, max(n_rows // 20, 1), n_rows)],
+        'Facebook Page Category': rng.choice(PAGE_CATEGORIES, n_rows),
+        'Adset Name': [f'Adset {i}' for i in range(n_rows)],
+        'Result Type': rng.choice(result_types(n_result_types), n_rows),
+        'Total Results': rng.integers(1, 20_000, n_rows),
+        'Age Range': rng.choice(['18-24', '25-34', '35-44', '45-54', '55-64', '65+'], n_rows),
+        'Gender': rng.choice(['All', 'Male', 'Female'], n_rows),
+        'Country': rng.choice(np.array(COUNTRIES, dtype=object), n_rows),
+        'Psychographic': make_psychographic(n_rows, max(n_rows // 100, 1), seed).to_numpy(),
+        'Custom Audiences': rng.choice(np.array([None, 'Website Visitors', 'Lookalike 1%', 'Customer List'], dtype=object), n_rows),
+        'Campaign Name': [f'Campaign {i}' for i in rng.integers(0, max(n_rows // 3, 1), n_rows)],
+        'Campaign ID': rng.choice(campaign_ids, n_rows),
+        'Adset ID': rng.integers(10**14, 10**15, n_rows),
+        'Start Date': start.strftime('%Y-%m-%d'),
+        'End Date': end.strftime('%Y-%m-%d'),
+    })
@@ -0,0 +1,72 @@
+from io import BytesIO
+import pandas as pd
+import pyarrow as pa
+import pytest
+from fastapi.testclient import TestClient
+from app.routers.dataset_registry import DatasetRegistry
+from app.routers.load_exp_data_utils import CAMPAIGN_SCHEMA, apply_schema
+from app.routers.serialization import (
+    ARROW_STREAM_MEDIA_TYPE, JSON_MEDIA_TYPE, PARQUET_MEDIA_TYPE, negotiate_media_type, to_arrow_stream,
+)
+
+@pytest.fixture
+def typed_campaigns_df(campaigns_df):
+    return apply_schema(campaigns_df.copy(), CAMPAIGN_SCHEMA)
+
+@pytest.fixture
+def client(router_module, app_module, typed_campaigns_df, monkeypatch):
+    registry = DatasetRegistry({"campaigns": lambda: typed_campaigns_df}, versions=lambda dataset_id: '"v1"')
+    monkeypatch.setattr(router_module, "dataset_registry", registry)
+    return TestClient(app_module.app)
+
+def read_arrow(content: bytes) -> pd.DataFrame:
+    with pd.option_context("mode.string_storage", "pyarrow"):
+        return pa.ipc.open_stream(content).read_pandas()
+
+@pytest.mark.parametrize("accept, expected", [
+    (None, JSON_MEDIA_TYPE),
+    ("*/*", JSON_MEDIA_TYPE),
+    ("text/html", JSON_MEDIA_TYPE),
+    (ARROW_STREAM_MEDIA_TYPE, ARROW_STREAM_MEDIA_TYPE),
+    ("application/x-parquet, application/json;q=0.5", PARQUET_MEDIA_TYPE),
+    ("application/json;q=0.2, application/vnd.apache.arrow.stream;q=0.9, */*;q=0.1", ARROW_STREAM_MEDIA_TYPE),
+    ("application/*, application/vnd.apache.arrow.stream;q=0", JSON_MEDIA_TYPE),
+])
+def test_negotiate_media_type(accept, expected):
+    assert negotiate_media_type(accept) == expected
+
+def test_main_endpoint_arrow_stream(client, api_prefix, typed_campaigns_df):
+    body = {"dataset_id": "campaigns", "filter_options": {"Country": "USA"}, "pagination": {"page": 1, "size": 2}}
+    response = client.post(f"{api_prefix}/main", json=body, headers={"Accept": ARROW_STREAM_MEDIA_TYPE})
+    assert response.status_code == 200
+    assert response.headers["content-type"] == ARROW_STREAM_MEDIA_TYPE
+    assert response.headers["X-Dataset-Version"] == '"v1"'
+    assert response.headers["Vary"] == "Accept"
+
+    expected = typed_campaigns_df[typed_campaigns_df['Country'] == 'USA'].iloc[:2].reset_index(drop=True)
+    frame = read_arrow(response.content)
+    pd.testing.assert_frame_equal(frame, expected, check_categorical=False)
+    # Only the categories of the page are sent
+    assert frame['Result Type'].cat.categories.tolist() == ['Likes']
+
+def test_main_endpoint_parquet_cursor_page(client, api_prefix, typed_campaigns_df):
+    body = {"dataset_id": "campaigns", "filter_options": {"Result Type": ["Likes", "Sales"]}, "pagination": {"page": 2, "size": 2, "use_cursor": True}}
+    response = client.post(f"{api_prefix}/main", json=body, headers={"Accept": PARQUET_MEDIA_TYPE})
+    assert response.status_code == 200
+    assert response.headers["content-type"] == PARQUET_MEDIA_TYPE
+    assert pd.read_parquet(BytesIO(response.content))['Campaign ID'].tolist() == ["3", "5"]
+    assert (response.headers["X-Page"], response.headers["X-Page-Size"]) == ("2", "2")
+    assert (response.headers["X-Total-Rows"], response.headers["X-Total-Pages"]) == ("5", "3")
+
+    json_page = client.post(f"{api_prefix}/main", json=body).json()
+    assert response.headers["X-Cursor"] == json_page["cursor"]
+
+def test_descriptive_stats_arrow_stream(client, api_prefix):
+    response = client.post(f"{api_prefix}/get_descriptive_stats", json={"dataset_id": "campaigns"}, headers={"Accept": ARROW_STREAM_MEDIA_TYPE})
+    assert response.status_code == 200
+    stats = read_arrow(response.content)
+    assert stats['Result Type'].tolist() == ['Likes', 'Sales', 'Comments']
+    assert stats.to_dict(orient='records') == client.post(f"{api_prefix}/get_descriptive_stats", json={"dataset_id": "campaigns"}).json()
+
+def test_empty_page(typed_campaigns_df):
+    assert read_arrow(to_arrow_stream(typed_campaigns_df.iloc[:0])).columns.tolist() == typed_campaigns_df.columns.tolist()
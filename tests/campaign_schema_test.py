@@ -0,0 +1,88 @@
+import pandas as pd
+import pytest
+from fastapi.testclient import TestClient
+from app.routers import load_exp_data_utils
+from app.routers.dataset_registry import DatasetRegistry
+from app.routers.dataset_store import ArrowDatasetStore
+from app.routers.filter_engine import CategoricalIndex, scan_positions
+from app.routers.load_exp_data_utils import CAMPAIGN_SCHEMA, apply_schema
+from app.routers.serialization import to_records
+
+@pytest.fixture
+def typed_campaigns_df(campaigns_df):
+    return apply_schema(campaigns_df.copy(), CAMPAIGN_SCHEMA)
+
+def test_apply_schema(typed_campaigns_df):
+    dtypes = typed_campaigns_df.dtypes
+    assert dtypes['Start Date'] == 'datetime64[ns]'
+    assert isinstance(dtypes['Result Type'], pd.CategoricalDtype)
+    assert dtypes['Campaign ID'] == 'string[pyarrow]'
+    assert dtypes['Start Year'] == 'int16'
+    assert dtypes['Amount Spent'] == 'float64'
+
+def test_apply_schema_keeps_columns_it_cannot_cast_losslessly(campaigns_df):
+    campaigns_df['Total Results'] = [100, 25.5, 60, 20, 30, 50]
+    campaigns_df['Impressions'] = [10000, None, 9000, 3000, 15000, 4000]
+    campaigns_df['Start Year'] = [2023, 2023, 2023, 2022, 2022, 70000]
+    df = apply_schema(campaigns_df, CAMPAIGN_SCHEMA)
+    assert (df['Total Results'].dtype, df['Impressions'].dtype, df['Start Year'].dtype) == ('float64', 'float64', 'int64')
+
+def test_records_are_formatted_like_the_legacy_frame(campaigns_df, typed_campaigns_df):
+    expected = campaigns_df.where(campaigns_df.notna(), None).to_dict(orient='records')
+    assert to_records(typed_campaigns_df) == expected
+    assert to_records(campaigns_df) == campaigns_df.to_dict(orient='records')
+
+def test_load_campaigns_df_applies_the_schema(campaigns_df, monkeypatch):
+    raw = campaigns_df.assign(**{
+        'Start Date': ['2023-03-01', 'not a date', '2023-01-15', '2022-12-01', '2022-11-01', '2022-10-01'],
+        'Result Type': ['likes', 'sales', 'likes', 'comments', 'sales', 'likes'],
+        'Campaign Name': [f'Campaign {i}' for i in range(6)],
+        'Account ID': ['act_1'] * 6,
+        'Company Name': ['Company'] * 6,
+        'Impressions': campaigns_df['Impressions'].astype('float64'),
+        'Reach': [1000] * 6,
+        'Start Month': ['March'] * 6,
+    })
+
+    class Storage:
+        def load_df(self, key, columns=None, filters=None):
+            return raw[[column for column in columns if column in raw.columns]].copy()
+
+    monkeypatch.setattr(load_exp_data_utils, "get_s3_storage", lambda: Storage())
+    df = load_exp_data_utils.load_campaigns_df()
+    assert [column for column, dtype in CAMPAIGN_SCHEMA.items() if df[column].dtype != dtype] == []
+    assert df['Start Date'].is_monotonic_decreasing
+    assert df['Start Date'].iloc[-1] == pd.Timestamp('2019-01-01')
+    assert df['Result Type'].cat.categories.tolist() == ['Comments', 'Likes', 'Sales']
+
+def test_filters_match_on_typed_columns(campaigns_df, typed_campaigns_df):
+    for options in [
+        {"Result Type": ["Likes", "Sales"], "Country": "USA"},
+        {"Client Industry": [None, "Education"]},
+        {"Client Industry": None},
+        {"Start Date": "2023-01-15"},
+        {"Start Date": ["2023-03-01", "2022-12-01", "not a date", None]},
+        {"Start Date": "not a date"},
+        {"Start Year": 2022, "Result Type": "Unknown"},
+    ]:
+        expected = scan_positions(campaigns_df, options)
+        assert scan_positions(typed_campaigns_df, options).tolist() == expected.tolist()
+        assert CategoricalIndex(typed_campaigns_df).positions(options).tolist() == expected.tolist()
+
+def test_store_keeps_the_schema(tmp_path, typed_campaigns_df):
+    frame = ArrowDatasetStore(str(tmp_path)).load("campaigns", '"etag-1"', lambda: typed_campaigns_df)
+    pd.testing.assert_frame_equal(frame, typed_campaigns_df)
+
+def test_main_endpoint_serializes_the_typed_frame(router_module, app_module, api_prefix, campaigns_df, typed_campaigns_df, monkeypatch):
+    client = TestClient(app_module.app)
+    for cursor in (False, True):
+        body = {"filter_options": {"Start Date": ["2023-03-01", "2023-01-15"]}, "pagination": {"page": 1, "size": 10, "use_cursor": cursor}}
+        responses = []
+        for frame in (campaigns_df, typed_campaigns_df):
+            monkeypatch.setattr(router_module, "dataset_registry", DatasetRegistry({"campaigns": lambda frame=frame: frame}))
+            response = client.post(f"{api_prefix}/main", json={**body, "dataset_id": "campaigns"})
+            assert response.status_code == 200
+            responses.append(response.json())
+        assert responses[0] == responses[1]
+        items = responses[1]["items"] if cursor else responses[1]
+        assert [row["Start Date"] for row in items] == ["2023-03-01", "2023-01-15"]
@@ -0,0 +1,41 @@
+import importlib
+import pandas as pd
+import pytest
+from dotenv import load_dotenv
+
+# Load environment variables from .env file
+load_dotenv()
+
+@pytest.fixture(scope="session")
+def app_module():
+    return importlib.import_module("app.main")
+
+@pytest.fixture(scope="session")
+def router_module(app_module):
+    return importlib.import_module("app.routers.Autoforecaster_module")
+
+@pytest.fixture(scope="session")
+def api_prefix(app_module):
+    return f"/{app_module.API_ROUTER_PREFIX}"
+
+@pytest.fixture
+def campaigns_df():
+    """A few rows shaped like the output of `load_campaigns_df()`."""
+    data = {
+        'Start Date': ['2023-03-01', '2023-02-01', '2023-01-15', '2022-12-01', '2022-11-01', '2022-10-01'],
+        'Stop Date': ['2023-03-31', '2023-02-28', '2023-01-31', '2022-12-31', '2022-11-30', '2022-10-31'],
+        'Client Industry': ['Tech', 'Health', 'Tech', 'Education', 'Tech', None],
+        'Facebook Page Name': ['TechPage', 'HealthPage', 'TechPage', 'EduPage', 'TechPage2', 'OtherPage'],
+        'Facebook Page Category': ['Business', 'Medical', 'Business', 'Education', 'Business', 'Other'],
+        'Ads Objective': ['Awareness', 'Conversion', 'Awareness', 'Engagement', 'Conversion', 'Awareness'],
+        'Amount Spent': [100.0, 250.0, 80.0, 40.0, 120.0, 60.0],
+        'Impressions': [10000, 20000, 9000, 3000, 15000, 4000],
+        'Result Type': ['Likes', 'Sales', 'Likes', 'Comments', 'Sales', 'Likes'],
+        'Total Results': [100, 25, 60, 20, 30, 50],
+        'Cost per Result': [1.0, 10.0, 1.33, 2.0, 4.0, 1.2],
+        'Cost per Mile': [10.0, 12.5, 8.89, 13.33, 8.0, 15.0],
+        'Campaign ID': ['1', '2', '3', '4', '5', '6'],
+        'Country': ['USA', 'Canada', 'USA', 'UK', 'USA', 'UK'],
+        'Start Year': [2023, 2023, 2023, 2022, 2022, 2022],
+    }
+    return pd.DataFrame(data)
@@ -0,0 +1,106 @@
+import threading
+import time
+import pytest
+from fastapi.testclient import TestClient
+from app.routers.data_layer import DataLayer
+from app.routers.dataset_registry import DatasetRegistry
+
+@pytest.fixture
+def gated_registry(campaigns_df):
+    """A registry whose 'campaigns' load blocks until `release` is set."""
+    release = threading.Event()
+
+    def load_campaigns():
+        release.wait(5)
+        return campaigns_df
+
+    def load_roas():
+        raise Exception("Failed to load data from S3: access denied")
+
+    registry = DatasetRegistry({"campaigns": load_campaigns, "roas": load_roas})
+    registry.release = release
+    return registry
+
+def test_data_layer_loads_in_the_background(gated_registry):
+    layer = DataLayer(gated_registry, ["campaigns"])
+    assert layer.status() == {"ready": False, "datasets": {"campaigns": "pending"}}
+
+    layer.start()
+    assert not layer.ready
+    assert layer.status()["datasets"]["campaigns"] == "loading"
+
+    gated_registry.release.set()
+    assert layer.wait(5)
+    assert layer.status() == {"ready": True, "datasets": {"campaigns": "loaded"}}
+
+def test_data_layer_reports_failed_datasets(gated_registry):
+    gated_registry.release.set()
+    layer = DataLayer(gated_registry, ["roas", "campaigns"])
+    layer.start()
+    assert layer.wait(5)
+
+    status = layer.status()
+    assert not status["ready"]
+    assert status["datasets"]["campaigns"] == "loaded"
+    assert status["datasets"]["roas"].startswith("failed: ")
+
+def test_health_and_ready_endpoints(app_module, monkeypatch, gated_registry):
+    layer = DataLayer(gated_registry, ["campaigns"])
+    monkeypatch.setattr(app_module, "data_layer", layer)
+    client = TestClient(app_module.app)
+
+    assert client.get("/health").json() == {"status": "ok"}
+
+    # The lifespan starts the load without waiting for it
+    with client:
+        response = client.get("/ready")
+        assert response.status_code == 503
+        assert response.json()["datasets"] == {"campaigns": "loading"}
+
+        gated_registry.release.set()
+        assert layer.wait(5)
+        response = client.get("/ready")
+        assert response.status_code == 200
+        assert response.json() == {"ready": True, "datasets": {"campaigns": "loaded"}}
+
+def test_importing_the_app_does_not_read_s3(router_module):
+    # Nothing reads S3 until a dataset is requested
+    assert not any(router_module.dataset_registry.is_loaded(dataset_id) for dataset_id in router_module.dataset_registry.dataset_ids())
+
+def test_data_layer_refreshes_changed_datasets(campaigns_df):
+    etags = {"campaigns": '"v1"'}
+    registry = DatasetRegistry({"campaigns": lambda: campaigns_df}, versions=etags.get)
+    refreshed = threading.Event()
+    registry.add_invalidation_listener(lambda dataset_id: refreshed.set())
+
+    layer = DataLayer(registry, ["campaigns"], refresh_seconds=0.01)
+    layer.start()
+    try:
+        assert layer.wait(5)
+        etags["campaigns"] = '"v2"'
+        assert refreshed.wait(5)
+        assert registry.version("campaigns") == '"v2"'
+    finally:
+        layer.stop()
+
+def test_data_layer_retries_failed_datasets(campaigns_df):
+    attempts = []
+
+    def load_campaigns():
+        attempts.append(len(attempts))
+        if len(attempts) == 1:
+            raise Exception("Failed to load data from S3: connection timed out")
+        return campaigns_df
+
+    registry = DatasetRegistry({"campaigns": load_campaigns})
+    layer = DataLayer(registry, ["campaigns"], refresh_seconds=0, retry_seconds=0.01)
+    layer.start()
+    try:
+        assert layer.wait(5)
+        deadline = time.monotonic() + 5
+        while not layer.ready and time.monotonic() < deadline:
+            time.sleep(0.01)
+        assert layer.status() == {"ready": True, "datasets": {"campaigns": "loaded"}}
+        assert len(attempts) == 2
+    finally:
+        layer.stop()
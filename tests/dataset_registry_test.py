@@ -0,0 +1,136 @@
+import pytest
+from fastapi.testclient import TestClient
+from app.routers.dataset_registry import DatasetRegistry, DATASET_LOADERS
+
+@pytest.fixture
+def registry(campaigns_df):
+    calls = []
+
+    def load_campaigns():
+        calls.append("campaigns")
+        return campaigns_df
+
+    registry = DatasetRegistry({"campaigns": load_campaigns})
+    registry.calls = calls
+    return registry
+
+def test_registry_knows_the_dashboard_datasets():
+    assert set(DATASET_LOADERS) == {"campaigns", "roas", "adsets", "clients"}
+
+def test_registry_loads_each_dataset_once(registry, campaigns_df):
+    assert not registry.is_loaded("campaigns")
+    first = registry.get("campaigns")
+    second = registry.get("campaigns")
+    assert first is second is campaigns_df
+    assert registry.calls == ["campaigns"]
+    assert registry.is_loaded("campaigns")
+
+def test_registry_unknown_dataset(registry):
+    with pytest.raises(KeyError):
+        registry.get("unknown")
+
+def test_main_endpoint_with_dataset_id(router_module, app_module, api_prefix, registry, monkeypatch):
+    monkeypatch.setattr(router_module, "dataset_registry", registry)
+    client = TestClient(app_module.app)
+
+    response = client.post(f"{api_prefix}/main", json={
+        "dataset_id": "campaigns",
+        "filter_options": {"Client Industry": "Tech", "Country": ["USA"]},
+        "pagination": {"page": 1, "size": 2},
+    })
+    assert response.status_code == 200
+    result = response.json()
+    assert [row["Campaign ID"] for row in result] == ["1", "3"]
+
+    # The registered frame is shared and must come back untouched
+    assert len(registry.get("campaigns")) == 6
+
+def test_main_endpoint_dataset_id_errors(router_module, app_module, api_prefix, registry, monkeypatch):
+    monkeypatch.setattr(router_module, "dataset_registry", registry)
+    client = TestClient(app_module.app)
+    body = {"filter_options": {}, "pagination": {"page": 1, "size": 10}}
+
+    assert client.post(f"{api_prefix}/main", json={**body, "dataset_id": "unknown"}).status_code == 404
+    assert client.post(f"{api_prefix}/main", json=body).status_code == 422
+
+def test_filter_dataframe_endpoint_with_dataset_id(router_module, app_module, api_prefix, campaigns_df, monkeypatch):
+    # Every `FilteredItem` field, with the spaced names of the registered datasets
+    df = campaigns_df.assign(**{
+        'Reach': [8000, 15000, 7000, 2500, 12000, 3000],
+        'Campaign Name': [f'Campaign {i}' for i in range(6)],
+        'Account ID': ['act_1'] * 6,
+        'Company Name': ['Company'] * 6,
+        'Start Month': ['March'] * 6,
+    })
+    monkeypatch.setattr(router_module, "dataset_registry", DatasetRegistry({"campaigns": lambda: df}))
+    client = TestClient(app_module.app)
+
+    for use_cursor in (False, True):
+        response = client.post(f"{api_prefix}/filter_dataframe", json={
+            "dataset_id": "campaigns",
+            "filter_options": {"Client Industry": "Tech", "Country": ["USA"]},
+            "pagination": {"page": 1, "size": 2, "use_cursor": use_cursor},
+        })
+        assert response.status_code == 200
+        items = response.json()["items"] if use_cursor else response.json()
+        assert [row["Campaign_ID"] for row in items] == [1.0, 3.0]
+        assert [row["Facebook_Page_Name"] for row in items] == ["TechPage", "TechPage"]
+
+    # The registered frame keeps its spaced column names
+    assert "Facebook Page Name" in df.columns
+
+def test_main_endpoint_inline_data_still_supported(app_module, api_prefix, campaigns_df):
+    client = TestClient(app_module.app)
+    response = client.post(f"{api_prefix}/main", json={
+        "data": campaigns_df.where(campaigns_df.notna(), None).to_dict(orient='records'),
+        "filter_options": {"Ads Objective": "Conversion"},
+        "pagination": {"page": 1, "size": 10},
+    })
+    assert response.status_code == 200
+    assert [row["Campaign ID"] for row in response.json()] == ["2", "5"]
+
+@pytest.fixture
+def versioned_registry(campaigns_df):
+    etags = {"campaigns": '"v1"'}
+
+    def load_campaigns():
+        return campaigns_df.assign(Version=etags["campaigns"])
+
+    registry = DatasetRegistry({"campaigns": load_campaigns}, versions=etags.get)
+    registry.etags = etags
+    return registry
+
+def test_refresh_swaps_in_the_new_version(versioned_registry):
+    invalidated = []
+    versioned_registry.add_invalidation_listener(invalidated.append)
+    old = versioned_registry.snapshot("campaigns")
+
+    assert not versioned_registry.refresh("campaigns")
+    versioned_registry.etags["campaigns"] = '"v2"'
+    assert versioned_registry.refresh_all() == ["campaigns"]
+
+    new = versioned_registry.snapshot("campaigns")
+    assert (new.version, new.frame["Version"].iloc[0]) == ('"v2"', '"v2"')
+    # Requests holding the old snapshot keep a consistent view of it
+    assert (old.version, old.frame["Version"].iloc[0]) == ('"v1"', '"v1"')
+    assert invalidated == ["campaigns"]
+
+def test_refresh_keeps_serving_when_s3_is_unreachable(versioned_registry):
+    snapshot = versioned_registry.snapshot("campaigns")
+    versioned_registry._versions = lambda dataset_id: 1 / 0
+    assert not versioned_registry.refresh("campaigns")
+    assert versioned_registry.snapshot("campaigns") is snapshot
+
+def test_responses_carry_the_dataset_version(router_module, app_module, api_prefix, versioned_registry, monkeypatch):
+    monkeypatch.setattr(router_module, "dataset_registry", versioned_registry)
+    client = TestClient(app_module.app)
+    body = {"dataset_id": "campaigns", "filter_options": {}, "pagination": {"page": 1, "size": 2}}
+
+    assert client.post(f"{api_prefix}/main", json=body).headers["X-Dataset-Version"] == '"v1"'
+    versioned_registry.etags["campaigns"] = '"v2"'
+    versioned_registry.refresh("campaigns")
+    response = client.post(f"{api_prefix}/get_descriptive_stats", json={"dataset_id": "campaigns"})
+    assert response.headers["X-Dataset-Version"] == '"v2"'
+
+    inline = client.post(f"{api_prefix}/main", json={"data": [], "filter_options": {}, "pagination": {"page": 1, "size": 2}})
+    assert "X-Dataset-Version" not in inline.headers
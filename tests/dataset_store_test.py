@@ -0,0 +1,82 @@
+import os
+import pandas as pd
+import pytest
+from fastapi.testclient import TestClient
+from app.routers.dataset_registry import DatasetRegistry
+from app.routers.dataset_store import ArrowDatasetStore
+
+@pytest.fixture
+def typed_campaigns_df(campaigns_df):
+    # Like `load_campaigns_df()`: string IDs and a sorted (non-range) index
+    df = campaigns_df.copy()
+    df['Campaign ID'] = df['Campaign ID'].astype('string[pyarrow]')
+    return df.sort_values(['Amount Spent'], ascending=False)
+
+@pytest.fixture
+def counting_loader(typed_campaigns_df):
+    def loader():
+        loader.calls += 1
+        return typed_campaigns_df
+    loader.calls = 0
+    return loader
+
+def test_store_round_trips_the_frame(tmp_path, typed_campaigns_df, counting_loader):
+    frame = ArrowDatasetStore(str(tmp_path)).load("campaigns", '"etag-1"', counting_loader)
+    pd.testing.assert_frame_equal(frame, typed_campaigns_df)
+
+def test_store_is_shared_between_workers(tmp_path, counting_loader):
+    ArrowDatasetStore(str(tmp_path)).load("campaigns", '"etag-1"', counting_loader)
+    # A second worker maps the file written by the first one
+    ArrowDatasetStore(str(tmp_path)).load("campaigns", '"etag-1"', counting_loader)
+    assert counting_loader.calls == 1
+    assert [name for name in os.listdir(tmp_path)] == [os.path.basename(ArrowDatasetStore(str(tmp_path)).path_for("campaigns", '"etag-1"', ".arrow"))]
+
+def test_store_maps_numeric_columns_without_copying(tmp_path, counting_loader):
+    frame = ArrowDatasetStore(str(tmp_path)).load("campaigns", '"etag-1"', counting_loader)
+    # Views on the mapped file are read-only
+    assert not frame['Amount Spent'].to_numpy().flags.writeable
+    assert not frame['Impressions'].to_numpy().flags.writeable
+
+def test_new_version_replaces_the_old_file(tmp_path, counting_loader):
+    store = ArrowDatasetStore(str(tmp_path))
+    store.load("campaigns", '"etag-1"', counting_loader)
+    store.load("campaigns", '"etag-2"', counting_loader)
+    assert counting_loader.calls == 2
+    assert os.listdir(tmp_path) == [os.path.basename(store.path_for("campaigns", '"etag-2"', ".arrow"))]
+
+def test_new_store_format_replaces_the_old_file(tmp_path, counting_loader):
+    ArrowDatasetStore(str(tmp_path), format_version="1").load("campaigns", '"etag-1"', counting_loader)
+    # Same dataset version, written by code with another store format
+    store = ArrowDatasetStore(str(tmp_path), format_version="2")
+    store.load("campaigns", '"etag-1"', counting_loader)
+    assert counting_loader.calls == 2
+    assert os.listdir(tmp_path) == [os.path.basename(store.path_for("campaigns", '"etag-1"', ".arrow"))]
+
+def test_registry_loads_versioned_datasets_through_the_store(tmp_path, counting_loader):
+    store = ArrowDatasetStore(str(tmp_path))
+    DatasetRegistry({"campaigns": counting_loader}, versions=lambda dataset_id: '"etag-1"', store=store).get("campaigns")
+    DatasetRegistry({"campaigns": counting_loader}, versions=lambda dataset_id: '"etag-1"', store=store).get("campaigns")
+    assert counting_loader.calls == 1
+
+    # Without a version there is nothing to key the file on
+    DatasetRegistry({"campaigns": counting_loader}, store=store).get("campaigns")
+    assert counting_loader.calls == 2
+
+def test_endpoints_work_on_mapped_frames(app_module, router_module, api_prefix, monkeypatch, tmp_path, typed_campaigns_df, counting_loader):
+    registry = DatasetRegistry({"campaigns": counting_loader}, versions=lambda dataset_id: '"etag-1"', store=ArrowDatasetStore(str(tmp_path)))
+    monkeypatch.setattr(router_module, "dataset_registry", registry)
+    router_module.stats_cache.clear()
+    client = TestClient(app_module.app)
+
+    response = client.post(f"{api_prefix}/get_descriptive_stats", json={"dataset_id": "campaigns"})
+    assert response.status_code == 200
+    expected = router_module.get_descriptive_stats(typed_campaigns_df)
+    assert [row["Result Type"] for row in response.json()] == list(expected["Result Type"])
+
+    response = client.post(f"{api_prefix}/main", json={
+        "dataset_id": "campaigns",
+        "filter_options": {"Country": ["USA"]},
+        "pagination": {"page": 1, "size": 10},
+    })
+    assert response.status_code == 200
+    assert [row["Campaign ID"] for row in response.json()] == ["5", "1", "3"]
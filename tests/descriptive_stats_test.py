@@ -0,0 +1,37 @@
+import numpy as np
+import pandas as pd
+import pytest
+from benchmarks.bench_descriptive_stats import legacy_get_descriptive_stats
+
+@pytest.mark.parametrize("seed", range(20))
+def test_get_descriptive_stats_matches_per_result_type_loop(router_module, seed):
+    rng = np.random.default_rng(seed)
+    n = int(rng.integers(1, 1500))
+    result_types = np.array(['Likes', 'Sales', 'Comments', 'Leads', 'Reach', None, np.nan], dtype=object)
+    df = pd.DataFrame({
+        'Result Type': rng.choice(result_types, n, p=[0.3, 0.2, 0.2, 0.1, 0.1, 0.05, 0.05]),
+        'Cost per Result': np.round(rng.gamma(2.0, 3.0, n), int(rng.integers(0, 4))),
+        # Values sitting on rounding boundaries, missing and infinite costs
+        'Cost per Mile': rng.choice([0.005, 0.015, 1.125, 2.675, 3.0, np.nan, np.inf], n),
+    })
+    df.loc[rng.random(n) < 0.05, 'Cost per Result'] = np.nan
+    if seed % 4 == 0:
+        df['Cost per Result'] = df['Cost per Result'].astype(str)
+
+    with np.errstate(all='ignore'):
+        expected = legacy_get_descriptive_stats(df)
+    result = router_module.get_descriptive_stats(df)
+    # Same rows, on a RangeIndex instead of the loop's repeated 0 index
+    assert result.index.equals(pd.RangeIndex(len(expected)))
+    pd.testing.assert_frame_equal(result, expected.reset_index(drop=True), check_exact=True)
+
+def test_get_descriptive_stats_does_not_modify_input(router_module, campaigns_df):
+    df = campaigns_df.astype({'Cost per Mile': str})
+    before = df.copy()
+    router_module.get_descriptive_stats(df)
+    pd.testing.assert_frame_equal(df, before)
+
+def test_get_descriptive_stats_empty(router_module, campaigns_df):
+    result = router_module.get_descriptive_stats(campaigns_df.iloc[:0])
+    assert result.empty
+    assert 'Median CPR' in result.columns
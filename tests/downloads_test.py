@@ -0,0 +1,134 @@
+import anyio
+import boto3
+import pytest
+from fastapi import HTTPException
+from fastapi.testclient import TestClient
+from moto import mock_aws
+from app.routers import downloads
+from app.routers.downloads import etag_matches, parse_range
+from app.routers.load_exp_data_utils import ImportDataS3
+from app.routers.s3_disk_cache import S3DiskCache
+
+BUCKET = "roas-dashboard-test"
+PAYLOAD = bytes(range(256)) * 40
+
+@pytest.fixture(params=["disk_cache", "s3"])
+def client(request, app_module, router_module, monkeypatch, tmp_path):
+    """A client whose `/load-data` reads a moto bucket, with or without the disk cache."""
+    with mock_aws():
+        s3 = boto3.client("s3", region_name="us-east-1", aws_access_key_id="testing", aws_secret_access_key="testing")
+        s3.create_bucket(Bucket=BUCKET)
+        s3.put_object(Bucket=BUCKET, Key="exports/campaign_final.parquet", Body=PAYLOAD)
+
+        cache = S3DiskCache(str(tmp_path)) if request.param == "disk_cache" else None
+        storage = ImportDataS3("testing", "testing", BUCKET, cache=cache)
+        storage.s3_client = s3
+        monkeypatch.setattr(router_module, "get_s3_storage", lambda: storage)
+        # Small chunks so every download spans several of them
+        monkeypatch.setattr(downloads, "DOWNLOAD_CHUNK_SIZE", 1000)
+        client = TestClient(app_module.app)
+        client.s3 = s3
+        client.storage = storage
+        yield client
+
+@pytest.fixture
+def url(api_prefix):
+    return f"{api_prefix}/load-data/exports/campaign_final.parquet"
+
+def test_parse_range():
+    assert parse_range("bytes=0-99", 1000) == (0, 99)
+    assert parse_range("bytes=900-", 1000) == (900, 999)
+    assert parse_range("bytes=-100", 1000) == (900, 999)
+    assert parse_range("bytes=990-2000", 1000) == (990, 999)
+    assert parse_range("bytes=-5000", 1000) == (0, 999)
+    # Ignored: whole object
+    assert parse_range("bytes=0-1,5-9", 1000) is None
+    assert parse_range("items=0-1", 1000) is None
+    assert parse_range("bytes=9-1", 1000) is None
+    with pytest.raises(HTTPException) as e:
+        parse_range("bytes=1000-", 1000)
+    assert e.value.status_code == 416
+
+def test_etag_matches():
+    assert etag_matches('"abc"', '"abc"')
+    assert etag_matches('W/"abc", "def"', '"abc"')
+    assert etag_matches("*", '"abc"')
+    assert not etag_matches('"def"', '"abc"')
+
+def test_download_streams_the_requested_object(client, url):
+    response = client.get(url)
+    assert response.status_code == 200
+    assert response.content == PAYLOAD
+    assert response.headers["content-length"] == str(len(PAYLOAD))
+    assert response.headers["accept-ranges"] == "bytes"
+    assert response.headers["content-disposition"] == 'attachment; filename="campaign_final.parquet"'
+
+    # Repeated downloads each get the whole object
+    assert client.get(url).content == PAYLOAD
+
+def test_download_conditional_get(client, url):
+    etag = client.get(url).headers["etag"]
+    response = client.get(url, headers={"If-None-Match": etag})
+    assert response.status_code == 304
+    assert response.content == b""
+    assert client.get(url, headers={"If-None-Match": '"stale"'}).status_code == 200
+
+def test_download_range(client, url):
+    response = client.get(url, headers={"Range": "bytes=1500-4999"})
+    assert response.status_code == 206
+    assert response.content == PAYLOAD[1500:5000]
+    assert response.headers["content-range"] == f"bytes 1500-4999/{len(PAYLOAD)}"
+    assert response.headers["content-length"] == "3500"
+
+    response = client.get(url, headers={"Range": "bytes=-10"})
+    assert response.content == PAYLOAD[-10:]
+
+    response = client.get(url, headers={"Range": f"bytes={len(PAYLOAD)}-"})
+    assert response.status_code == 416
+    assert response.headers["content-range"] == f"bytes */{len(PAYLOAD)}"
+
+def test_download_resume_with_if_range(client, url):
+    etag = client.get(url).headers["etag"]
+    response = client.get(url, headers={"Range": "bytes=100-", "If-Range": etag})
+    assert response.status_code == 206
+    assert response.content == PAYLOAD[100:]
+
+    # The object changed since the partial download: send all of it
+    response = client.get(url, headers={"Range": "bytes=100-", "If-Range": '"stale"'})
+    assert response.status_code == 200
+    assert response.content == PAYLOAD
+
+def test_download_missing_object(client, api_prefix):
+    assert client.get(f"{api_prefix}/load-data/missing.parquet").status_code == 404
+
+def test_download_survives_a_new_version(client, url, router_module, monkeypatch):
+    if client.storage.cache is None:
+        pytest.skip("streams straight from S3")
+    updated = PAYLOAD[::-1]
+    iter_file = router_module.iter_file
+
+    def store_new_version_then_stream(file, start, length):
+        # Another request stores a new version, which removes the old one
+        # from disk, before this response is streamed
+        client.s3.put_object(Bucket=BUCKET, Key="exports/campaign_final.parquet", Body=updated)
+        new_file, _ = client.storage.fetch_file("exports/campaign_final.parquet")
+        new_file.close()
+        return iter_file(file, start, length)
+
+    monkeypatch.setattr(router_module, "iter_file", store_new_version_then_stream)
+    response = client.get(url)
+    assert response.status_code == 200
+    assert response.content == PAYLOAD
+
+    monkeypatch.setattr(router_module, "iter_file", iter_file)
+    assert client.get(url).content == updated
+
+def test_download_closes_the_file_without_streaming(client, router_module):
+    if client.storage.cache is None:
+        pytest.skip("streams straight from S3")
+    key = "exports/campaign_final.parquet"
+    file, etag = client.storage.fetch_file(key)
+    response = anyio.run(router_module._load_data_response, client.storage, key, file, etag, len(PAYLOAD), None, None, None)
+    # The client went away before the body was iterated
+    anyio.run(response.background)
+    assert file.closed
@@ -0,0 +1,85 @@
+import pickle
+import threading
+import time
+import numpy as np
+import pandas as pd
+import pytest
+from fastapi import HTTPException
+from fastapi.testclient import TestClient
+from app.routers.dataset_registry import DatasetRegistry
+from app.routers.dataset_store import ArrowDatasetStore
+from app.routers.execution import ExecutionBackend, SharedFrame, shared_frame
+from app.routers.load_exp_data_utils import CAMPAIGN_SCHEMA, apply_schema
+
+@pytest.fixture
+def stored_snapshot(campaigns_df, tmp_path):
+    df = apply_schema(campaigns_df.copy(), CAMPAIGN_SCHEMA)
+    registry = DatasetRegistry({"campaigns": lambda: df}, versions=lambda dataset_id: '"v1"', store=ArrowDatasetStore(str(tmp_path)))
+    return registry.snapshot("campaigns")
+
+def test_shared_frame_only_pickles_the_path(stored_snapshot):
+    shared = shared_frame(stored_snapshot)
+    assert isinstance(shared, SharedFrame) and shared.frame is stored_snapshot.frame
+    restored = pickle.loads(pickle.dumps(shared))
+    assert restored.path == stored_snapshot.path and restored.frame is None
+
+def test_process_backend_maps_the_stored_dataset(router_module, stored_snapshot):
+    backend = ExecutionBackend("process", workers=1, queue_limit=1, timeout=60)
+    positions = np.array([0, 2, 4])
+    try:
+        stats = backend.run(router_module.get_descriptive_stats_at, shared_frame(stored_snapshot), positions)
+    finally:
+        backend.shutdown()
+    expected = router_module.get_descriptive_stats(stored_snapshot.frame.iloc[positions])
+    pd.testing.assert_frame_equal(stats, expected)
+
+def test_queue_limit_rejects_with_503():
+    backend = ExecutionBackend("thread", workers=1, queue_limit=1, timeout=5)
+    release = threading.Event()
+    running = [threading.Thread(target=backend.run, args=(release.wait,)) for _ in range(2)]
+    for thread in running:
+        thread.start()
+    time.sleep(0.1)
+    with pytest.raises(HTTPException) as excinfo:
+        backend.run(lambda: None)
+    assert excinfo.value.status_code == 503
+    assert excinfo.value.headers == {"Retry-After": "1"}
+
+    release.set()
+    for thread in running:
+        thread.join()
+    assert backend.run(lambda: 42) == 42
+    assert backend.info()["rejected"] == 1
+    backend.shutdown()
+
+def test_timeout_returns_504_and_frees_the_slot_once_done():
+    backend = ExecutionBackend("thread", workers=1, queue_limit=0, timeout=0.05)
+    with pytest.raises(HTTPException) as excinfo:
+        backend.run(time.sleep, 0.3)
+    assert excinfo.value.status_code == 504
+    # The computation still holds the only slot
+    with pytest.raises(HTTPException) as excinfo:
+        backend.run(lambda: None)
+    assert excinfo.value.status_code == 503
+    time.sleep(0.4)
+    assert backend.run(lambda: 42) == 42
+    backend.shutdown()
+
+def test_endpoints_report_a_full_queue(router_module, app_module, api_prefix, campaigns_df, monkeypatch):
+    backend = ExecutionBackend("thread", workers=1, queue_limit=0, timeout=5)
+    release = threading.Event()
+    blocker = threading.Thread(target=backend.run, args=(release.wait,))
+    blocker.start()
+    time.sleep(0.1)
+    monkeypatch.setattr(router_module, "execution_backend", backend)
+
+    client = TestClient(app_module.app)
+    response = client.post(f"{api_prefix}/get_descriptive_stats", json={"data": campaigns_df.to_dict(orient='records')})
+    assert response.status_code == 503
+    assert response.headers["Retry-After"] == "1"
+    assert client.get(f"{api_prefix}/execution").json()["rejected"] == 1
+
+    release.set()
+    blocker.join()
+    assert client.post(f"{api_prefix}/get_descriptive_stats", json={"data": campaigns_df.to_dict(orient='records')}).status_code == 200
+    backend.shutdown()
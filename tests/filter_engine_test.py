@@ -0,0 +1,61 @@
+import numpy as np
+import pandas as pd
+import pytest
+from fastapi.testclient import TestClient
+from app.routers.filter_engine import CategoricalIndex
+from app.routers.dataset_registry import DatasetRegistry
+
+@pytest.fixture(scope="module")
+def random_campaigns():
+    rng = np.random.default_rng(7)
+    n = 2000
+    return pd.DataFrame({
+        'Client Industry': rng.choice(['Tech', 'Health', 'Education', None], n),
+        'Facebook Page Category': rng.choice(['Business', 'Medical', 'Education'], n),
+        'Ads Objective': rng.choice(['Awareness', 'Conversion', 'Engagement'], n),
+        'Result Type': rng.choice(['Likes', 'Sales', 'Comments', 'Reach'], n),
+        'Country': rng.choice(['USA', 'Canada', 'UK', np.nan], n),
+        'Start Year': rng.choice([2020, 2021, 2022, 2023], n),
+        'Facebook Page Name': rng.choice(['PageA', 'PageB', 'PageC'], n),
+        'Cost per Result': rng.gamma(2.0, 1.5, n),
+    }, index=rng.permutation(n))
+
+@pytest.mark.parametrize("options", [
+    {},
+    {'Client Industry': 'Tech'},
+    {'Client Industry': 'Tech', 'Country': 'USA'},
+    {'Client Industry': ['Tech', 'Health'], 'Start Year': [2022, 2023], 'Result Type': 'Sales'},
+    {'Country': [None]},
+    {'Client Industry': None},
+    {'Start Year': 2021.0, 'Ads Objective': ['Awareness', 'Unknown']},
+    {'Start Year': '2021'},
+    {'Result Type': []},
+    {'Facebook Page Name': 'PageB', 'Country': ['UK', 'Canada']},
+    {'Not A Column': 'x', 'Ads Objective': 'Engagement'},
+])
+def test_categorical_index_matches_filter_dataframe(router_module, random_campaigns, options):
+    expected = router_module.filter_dataframe(random_campaigns, options)
+    result = CategoricalIndex(random_campaigns).filter(options)
+    pd.testing.assert_frame_equal(result, expected)
+
+def test_categorical_index_does_not_modify_source(random_campaigns):
+    before = random_campaigns.copy()
+    result = CategoricalIndex(random_campaigns).filter({})
+    assert result is not random_campaigns
+    pd.testing.assert_frame_equal(random_campaigns, before)
+
+def test_main_endpoint_uses_filter_index(router_module, app_module, api_prefix, random_campaigns, monkeypatch):
+    registry = DatasetRegistry({"campaigns": lambda: random_campaigns}, build_filter_index=True)
+    monkeypatch.setattr(router_module, "dataset_registry", registry)
+    monkeypatch.setattr(router_module, "USE_FILTER_INDEX", True)
+    client = TestClient(app_module.app)
+
+    options = {'Client Industry': ['Tech', 'Health'], 'Country': 'USA'}
+    response = client.post(f"{api_prefix}/main", json={
+        "dataset_id": "campaigns",
+        "filter_options": options,
+        "pagination": {"page": 2, "size": 25},
+    })
+    assert response.status_code == 200
+    expected = router_module.filter_dataframe(random_campaigns, options).iloc[25:50]
+    assert [row['Cost per Result'] for row in response.json()] == expected['Cost per Result'].tolist()
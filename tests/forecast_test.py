@@ -0,0 +1,122 @@
+import numpy as np
+import pandas as pd
+import pytest
+from fastapi.testclient import TestClient
+
+@pytest.fixture
+def stats_df():
+    return pd.DataFrame({
+        'Result Type': ['Likes', 'Sales', 'Likes', 'Comments'],
+        'Min CPM': [200.0, 300.0, 250.0, 350.0],
+        'Median CPM': [220.0, 320.0, 270.0, 370.0],
+        'Max CPM': [240.0, 340.0, 290.0, 390.0],
+        'Min CPR': [10.0, 20.0, 15.0, 25.0],
+        'Median CPR': [12.0, 22.0, 18.0, 28.0],
+        'Max CPR': [14.0, 24.0, 21.0, 31.0],
+    })
+
+def test_get_forecast_batch_matches_get_forecast_by_value(router_module, stats_df):
+    rng = np.random.default_rng(3)
+    budgets = rng.uniform(100, 100_000, 50).round(2).tolist()
+    distributions = [
+        dict(zip(['Likes', 'Sales', 'Comments'], rng.integers(0, 100, 3).tolist()))
+        for _ in budgets
+    ]
+    distributions[0] = {'Likes': 40}
+
+    result = router_module.get_forecast_batch(stats_df, budgets, distributions)
+
+    expected = pd.concat([
+        router_module.get_forecast_by_value(stats_df, budget, distribution).assign(Scenario=scenario)
+        for scenario, (budget, distribution) in enumerate(zip(budgets, distributions))
+    ], ignore_index=True)
+    pd.testing.assert_frame_equal(result, expected[result.columns], check_exact=True)
+
+def test_get_forecast_batch_no_scenarios(router_module, stats_df):
+    result = router_module.get_forecast_batch(stats_df, [], [])
+    assert result.empty
+    assert 'Median Results' in result.columns
+
+def test_get_forecast_batch_endpoint(app_module, api_prefix, stats_df):
+    client = TestClient(app_module.app)
+    response = client.post(f"{api_prefix}/get_forecast_batch", json={
+        "data": stats_df.to_dict(orient='records'),
+        "scenarios": [
+            {"budget": 1000, "distribution": {"Likes": 40, "Sales": 30, "Comments": 30}},
+            {"budget": 5000, "distribution": {"Sales": 100}},
+        ],
+    })
+    assert response.status_code == 200
+    rows = response.json()
+    assert len(rows) == 2 * len(stats_df)
+    assert [row['Scenario'] for row in rows] == [0, 0, 0, 0, 1, 1, 1, 1]
+    assert rows[5] == {
+        'Scenario': 1, 'Result Type': 'Sales', 'Ad Spent': 5000.0,
+        'Max Impressions': 16667.0, 'Median Impressions': 15625.0, 'Min Impressions': 14706.0,
+        'Max Results': 250.0, 'Median Results': 227.0, 'Min Results': 208.0,
+    }
+
+def grid_search(stats_df, objective_column, multiplier, constraints, step=5):
+    """Best objective value over every distribution on a `step`% grid."""
+    result_types = list(stats_df['Result Type'].unique())
+    costs = stats_df.groupby('Result Type', sort=False)[objective_column].apply(lambda c: (multiplier / c).sum())
+    best = -np.inf
+    grid = np.arange(0, 101, step)
+    for shares in np.array(np.meshgrid(*[grid] * (len(result_types) - 1))).T.reshape(-1, len(result_types) - 1):
+        shares = np.append(shares, 100 - shares.sum())
+        bounds = [constraints.get(rt, (0, 100)) for rt in result_types]
+        if all(low <= share <= high for share, (low, high) in zip(shares, bounds)):
+            best = max(best, float((shares * costs[result_types].to_numpy()).sum()))
+    return best
+
+@pytest.mark.parametrize("objective, column, multiplier", [
+    ('median_results', 'Median CPR', 1),
+    ('impressions', 'Median CPM', 1000),
+])
+@pytest.mark.parametrize("constraints", [
+    {},
+    {'Likes': (10, 50), 'Sales': (20, 100)},
+    {'Comments': (30, 30), 'Likes': (0, 20)},
+])
+def test_get_optimal_distribution_beats_grid_search(router_module, stats_df, objective, column, multiplier, constraints):
+    distribution = router_module.get_optimal_distribution(stats_df, objective, constraints)
+    assert sum(distribution.values()) == pytest.approx(100)
+    for result_type, (low, high) in constraints.items():
+        assert low - 1e-9 <= distribution[result_type] <= high + 1e-9
+
+    costs = stats_df.groupby('Result Type', sort=False)[column].apply(lambda c: (multiplier / c).sum())
+    value = sum(share * costs[result_type] for result_type, share in distribution.items())
+    assert value >= grid_search(stats_df, column, multiplier, constraints) - 1e-9
+
+@pytest.mark.parametrize("constraints", [
+    {'Likes': (60, 100), 'Sales': (50, 100)},
+    {'Likes': (0, 10), 'Sales': (0, 10), 'Comments': (0, 10)},
+    {'Unknown': (0, 10)},
+    {'Likes': (50, 40)},
+])
+def test_get_optimal_distribution_infeasible(router_module, stats_df, constraints):
+    with pytest.raises(ValueError):
+        router_module.get_optimal_distribution(stats_df, 'median_results', constraints)
+
+def test_get_optimal_distribution_endpoint(app_module, api_prefix, router_module, stats_df):
+    client = TestClient(app_module.app)
+    response = client.post(f"{api_prefix}/get_optimal_distribution", json={
+        "data": stats_df.to_dict(orient='records'),
+        "budget": 1000,
+        "objective": "median_results",
+        "constraints": {"Sales": {"min": 20}, "Comments": {"max": 10}},
+    })
+    assert response.status_code == 200
+    result = response.json()
+    # Likes has the cheapest results, so it takes everything the constraints allow
+    assert result['distribution'] == {'Likes': 80.0, 'Sales': 20.0, 'Comments': 0.0}
+    forecast = router_module.get_forecast_by_value(stats_df, 1000, result['distribution'])
+    assert result['forecast'] == forecast.to_dict(orient='records')
+    assert result['expected_value'] == forecast['Median Results'].sum()
+
+    infeasible = client.post(f"{api_prefix}/get_optimal_distribution", json={
+        "data": stats_df.to_dict(orient='records'),
+        "budget": 1000,
+        "constraints": {"Sales": {"min": 60}, "Likes": {"min": 60}},
+    })
+    assert infeasible.status_code == 422
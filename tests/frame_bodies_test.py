@@ -0,0 +1,63 @@
+import json
+from io import BytesIO
+import pandas as pd
+import pytest
+from fastapi.testclient import TestClient
+from app.routers.frame_bodies import read_frame_body
+from app.routers.serialization import ARROW_STREAM_MEDIA_TYPE, PARQUET_MEDIA_TYPE, to_arrow_stream
+
+@pytest.fixture
+def client(app_module):
+    return TestClient(app_module.app)
+
+def encode(df: pd.DataFrame, media_type: str) -> bytes:
+    if media_type == ARROW_STREAM_MEDIA_TYPE:
+        return to_arrow_stream(df)
+    buffer = BytesIO()
+    df.to_parquet(buffer, index=False)
+    return buffer.getvalue()
+
+def post_frame(client, url, df, media_type, params):
+    return client.post(url, params={"params": json.dumps(params)}, content=encode(df, media_type), headers={"Content-Type": media_type})
+
+@pytest.mark.parametrize("media_type", [ARROW_STREAM_MEDIA_TYPE, PARQUET_MEDIA_TYPE])
+def test_read_frame_body(campaigns_df, media_type):
+    frame = read_frame_body(encode(campaigns_df, media_type), media_type)
+    pd.testing.assert_frame_equal(frame.fillna(""), campaigns_df.fillna(""), check_dtype=False)
+    assert frame['Country'].dtype == "string[pyarrow]"
+
+@pytest.mark.parametrize("media_type", [ARROW_STREAM_MEDIA_TYPE, PARQUET_MEDIA_TYPE])
+def test_main_endpoint_with_binary_body(client, api_prefix, campaigns_df, media_type):
+    params = {"filter_options": {"Country": "USA"}, "pagination": {"page": 1, "size": 2}}
+    expected = client.post(f"{api_prefix}/main", json={"data": campaigns_df.to_dict(orient='records'), **params})
+    response = post_frame(client, f"{api_prefix}/main", campaigns_df, media_type, params)
+    assert response.status_code == 200
+    assert response.json() == expected.json()
+    assert [row['Campaign ID'] for row in response.json()] == ["1", "3"]
+
+@pytest.mark.parametrize("media_type", [ARROW_STREAM_MEDIA_TYPE, PARQUET_MEDIA_TYPE])
+def test_stats_and_forecast_with_binary_bodies(client, api_prefix, campaigns_df, media_type):
+    stats = post_frame(client, f"{api_prefix}/get_descriptive_stats", campaigns_df, media_type, {})
+    assert stats.status_code == 200
+    assert stats.json() == client.post(f"{api_prefix}/get_descriptive_stats", json={"data": campaigns_df.to_dict(orient='records')}).json()
+
+    params = {"budget": 1000, "distribution": {"Likes": 50, "Sales": 30, "Comments": 20}}
+    forecast = post_frame(client, f"{api_prefix}/get_forecast_by_value", pd.DataFrame(stats.json()), media_type, params)
+    assert forecast.status_code == 200
+    assert forecast.json() == client.post(f"{api_prefix}/get_forecast_by_value", json={"data": stats.json(), **params}).json()
+
+def test_binary_body_errors(client, api_prefix, campaigns_df):
+    body = encode(campaigns_df, ARROW_STREAM_MEDIA_TYPE)
+    headers = {"Content-Type": ARROW_STREAM_MEDIA_TYPE}
+    # The other fields of the model are still validated
+    assert client.post(f"{api_prefix}/main", content=body, headers=headers).status_code == 422
+    assert client.post(f"{api_prefix}/main", params={"params": "{not json"}, content=body, headers=headers).status_code == 422
+    assert client.post(f"{api_prefix}/main", content=b"not arrow", headers=headers).status_code == 400
+    assert client.post(f"{api_prefix}/get_forecast_by_value", json={"budget": 1000, "distribution": {}}).status_code == 422
+
+def test_binary_bodies_are_documented(client, api_prefix):
+    paths = client.get(f"{api_prefix}/openapi.json").json()["paths"]
+    content = paths[f"{api_prefix}/main"]["post"]["requestBody"]["content"]
+    assert set(content) == {"application/json", ARROW_STREAM_MEDIA_TYPE, PARQUET_MEDIA_TYPE}
+    assert "$ref" in content["application/json"]["schema"]
+    assert ARROW_STREAM_MEDIA_TYPE not in paths[f"{api_prefix}/get_forecast_batch"]["post"]["requestBody"]["content"]
@@ -0,0 +1,102 @@
+from io import BytesIO
+import boto3
+import numpy as np
+import pandas as pd
+import pytest
+from moto import mock_aws
+from app.routers import load_exp_data_utils
+from app.routers.load_exp_data_utils import ImportDataS3, ADSETS_COLUMNS
+from app.routers.s3_disk_cache import S3DiskCache
+
+BUCKET = "roas-dashboard-test"
+N_ROWS = 50_000
+
+@pytest.fixture(scope="module")
+def wide_df():
+    """Sorted by result type, with a bulky column the dashboard never reads."""
+    rng = np.random.default_rng(0)
+    return pd.DataFrame({
+        'Result Type': np.sort(rng.choice(['Link Click', 'Lead', 'Page Like', 'Purchase', 'Reach'], N_ROWS)),
+        'Amount Spent': rng.gamma(2.0, 400.0, N_ROWS),
+        'Total Results': rng.integers(1, 20_000, N_ROWS),
+        'Raw Payload': [f'{{"campaign": {i}, "padding": "{"x" * 40}"}}' for i in range(N_ROWS)],
+    })
+
+@pytest.fixture
+def storage(wide_df):
+    with mock_aws():
+        s3 = boto3.client("s3", region_name="us-east-1", aws_access_key_id="testing", aws_secret_access_key="testing")
+        s3.create_bucket(Bucket=BUCKET)
+        buffer = BytesIO()
+        wide_df.to_parquet(buffer, index=False, row_group_size=5_000)
+        s3.put_object(Bucket=BUCKET, Key="campaign_final.parquet", Body=buffer.getvalue())
+        s3.put_object(Bucket=BUCKET, Key="roas_final.csv", Body=wide_df.head(10).to_csv(index=False).encode())
+
+        storage = ImportDataS3("testing", "testing", BUCKET)
+        storage.s3_client = s3
+        storage.object_size = len(buffer.getvalue())
+        storage.downloaded = []
+        s3.meta.events.register("after-call.s3.GetObject", lambda parsed, **kwargs: storage.downloaded.append(parsed["ContentLength"]))
+        yield storage
+
+def test_full_read_matches_pandas(storage, wide_df):
+    pd.testing.assert_frame_equal(storage.load_df("campaign_final.parquet"), wide_df)
+
+def test_column_projection_downloads_only_the_needed_columns(storage, wide_df):
+    df = storage.load_df("campaign_final.parquet", columns=['Result Type', 'Amount Spent'])
+    pd.testing.assert_frame_equal(df, wide_df[['Result Type', 'Amount Spent']])
+    assert sum(storage.downloaded) < storage.object_size / 2
+
+def test_filters_skip_row_groups(storage, wide_df):
+    df = storage.load_df("campaign_final.parquet", columns=['Result Type', 'Total Results'], filters=[('Result Type', 'in', ['Purchase'])])
+    expected = wide_df.loc[wide_df['Result Type'] == 'Purchase', ['Result Type', 'Total Results']].reset_index(drop=True)
+    pd.testing.assert_frame_equal(df, expected)
+
+    projected = sum(storage.downloaded)
+    storage.downloaded.clear()
+    storage.load_df("campaign_final.parquet", columns=['Result Type', 'Total Results'])
+    # Row groups without 'Purchase' were never downloaded
+    assert projected < sum(storage.downloaded)
+
+def test_missing_columns_are_skipped(storage):
+    df = storage.load_df("campaign_final.parquet", columns=['Result Type', 'Median CPR'])
+    assert list(df.columns) == ['Result Type']
+
+def test_csv_columns(storage, wide_df):
+    df = storage.load_df("roas_final.csv", columns=['Result Type', 'Total Results', 'Median CPR'])
+    pd.testing.assert_frame_equal(df, wide_df.head(10)[['Result Type', 'Total Results']])
+    with pytest.raises(Exception, match="Filters are only supported for parquet files"):
+        storage.load_df("roas_final.csv", filters=[('Result Type', '==', 'Lead')])
+
+def test_pushdown_through_the_disk_cache(storage, wide_df, tmp_path):
+    storage.cache = S3DiskCache(str(tmp_path))
+    df = storage.load_df("campaign_final.parquet", columns=['Total Results'], filters=[('Result Type', '==', 'Lead')])
+    assert df['Total Results'].tolist() == wide_df.loc[wide_df['Result Type'] == 'Lead', 'Total Results'].tolist()
+
+def test_load_adsets_df_reads_only_its_columns(storage, monkeypatch):
+    adsets = pd.DataFrame({column: ['1'] for column in ADSETS_COLUMNS})
+    adsets['Result Type'] = ['link_click']
+    adsets['Psychographic'] = ['INTERESTS: "Travel", "Food"']
+    adsets['Unused Notes'] = ['x' * 100]
+    buffer = BytesIO()
+    adsets.to_parquet(buffer, index=False)
+    storage.s3_client.put_object(Bucket=BUCKET, Key="adsets_final.parquet", Body=buffer.getvalue())
+    monkeypatch.setattr(load_exp_data_utils, "get_s3_storage", lambda: storage)
+
+    df = load_exp_data_utils.load_adsets_df()
+    assert list(df.columns) == ADSETS_COLUMNS
+    assert df['Result Type'].tolist() == ['Link Click']
+
+def test_load_adsets_df_pushes_filters_down(storage, monkeypatch):
+    adsets = pd.DataFrame({column: ['1', '2'] for column in ADSETS_COLUMNS})
+    adsets['Result Type'] = ['link_click', 'lead']
+    adsets['Psychographic'] = ['INTERESTS: "Travel"', 'INTERESTS: "Food"']
+    buffer = BytesIO()
+    adsets.to_parquet(buffer, index=False)
+    storage.s3_client.put_object(Bucket=BUCKET, Key="adsets_final.parquet", Body=buffer.getvalue())
+    monkeypatch.setattr(load_exp_data_utils, "get_s3_storage", lambda: storage)
+
+    # Filters apply to the stored values, before the title casing
+    df = load_exp_data_utils.load_adsets_df(filters=[('Result Type', '==', 'lead')])
+    assert df['Result Type'].tolist() == ['Lead']
+    assert df['Psychographic'].tolist() == ['INTERESTS:\nFood']
@@ -0,0 +1,61 @@
+import json
+import re
+import pytest
+from fastapi.testclient import TestClient
+from app.routers import metrics
+from app.routers.metrics import Histogram, render_metrics, stage
+
+@pytest.fixture
+def client(app_module):
+    for histogram in metrics.HISTOGRAMS:
+        histogram.clear()
+    return TestClient(app_module.app)
+
+def sample(text: str, name: str, **labels) -> float:
+    label_text = ",".join(f'{key}="{value}"' for key, value in labels.items())
+    match = re.search(rf"^{re.escape(name)}{{{re.escape(label_text)}}} (\S+)$", text, re.MULTILINE)
+    assert match, f"{name}{{{label_text}}} not found"
+    return float(match.group(1))
+
+def test_histogram_buckets_are_cumulative():
+    histogram = Histogram("test_seconds", "Test.", ("endpoint",), (0.1, 1.0))
+    for value in (0.05, 0.1, 0.5, 2.0):
+        histogram.observe(value, 'say "hi"')
+    text = "\n".join(histogram.render())
+    labels = {"endpoint": 'say \\"hi\\"'}
+    assert sample(text, "test_seconds_bucket", **labels, le="0.1") == 2
+    assert sample(text, "test_seconds_bucket", **labels, le="1") == 3
+    assert sample(text, "test_seconds_bucket", **labels, le="+Inf") == 4
+    assert sample(text, "test_seconds_count", **labels) == 4
+    assert sample(text, "test_seconds_sum", **labels) == pytest.approx(2.65)
+
+def test_stage_is_a_no_op_outside_requests():
+    metrics.STAGE_DURATION.clear()
+    with stage("filter"):
+        pass
+    assert "roas_stage_duration_seconds_count" not in render_metrics()
+
+def test_metrics_endpoint_reports_stages_rows_and_bytes(client, api_prefix, campaigns_df):
+    body = json.dumps({"data": campaigns_df.to_dict(orient='records'), "filter_options": {"Country": "USA"}, "pagination": {"page": 1, "size": 2}}).encode()
+    page = client.post(f"{api_prefix}/main", content=body, headers={"Content-Type": "application/json"})
+    assert page.status_code == 200
+
+    response = client.get("/metrics")
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain; version=0.0.4")
+    text = response.text
+
+    endpoint = f"{api_prefix}/main"
+    for name in ("decode", "validate", "dataframe", "filter", "serialize", "total"):
+        assert sample(text, "roas_stage_duration_seconds_count", endpoint=endpoint, stage=name) == 1
+    assert sample(text, "roas_payload_rows_sum", endpoint=endpoint, direction="in") == len(campaigns_df)
+    assert sample(text, "roas_payload_rows_sum", endpoint=endpoint, direction="out") == 2
+    assert sample(text, "roas_request_duration_seconds_count", endpoint=endpoint, method="POST", status="200") == 1
+    assert sample(text, "roas_request_body_bytes_sum", endpoint=endpoint) == len(body)
+    assert sample(text, "roas_response_body_bytes_sum", endpoint=endpoint) == len(page.content)
+
+def test_unknown_paths_share_one_series(client):
+    client.get("/no/such/path")
+    client.get("/another/missing/path")
+    text = client.get("/metrics").text
+    assert sample(text, "roas_request_duration_seconds_count", endpoint="unmatched", method="GET", status="404") == 2
@@ -0,0 +1,120 @@
+import numpy as np
+import pytest
+from fastapi.testclient import TestClient
+from app.routers.dataset_registry import DatasetRegistry
+from app.routers.pagination import ResultSet, ResultSetCache
+
+@pytest.fixture
+def cursor_client(router_module, app_module, campaigns_df, monkeypatch):
+    registry = DatasetRegistry({"campaigns": lambda: campaigns_df})
+    monkeypatch.setattr(router_module, "dataset_registry", registry)
+    monkeypatch.setattr(router_module, "result_set_cache", ResultSetCache())
+
+    scans = []
+    scan_positions = router_module.scan_positions
+    def counting_scan_positions(*args, **kwargs):
+        scans.append(args[1])
+        return scan_positions(*args, **kwargs)
+    monkeypatch.setattr(router_module, "scan_positions", counting_scan_positions)
+
+    client = TestClient(app_module.app)
+    client.scans = scans
+    return client
+
+def test_result_set_pages():
+    result_set = ResultSet("campaigns", np.arange(7))
+    assert result_set.total_rows == 7
+    assert result_set.total_pages(3) == 3
+    assert result_set.page_positions(3, 3).tolist() == [6]
+    assert result_set.page_positions(4, 3).tolist() == []
+
+def test_cursor_is_canonical():
+    first = ResultSetCache.cursor_for("campaigns", {"Country": ["USA", "UK"], "Start Year": 2023})
+    second = ResultSetCache.cursor_for("campaigns", {"Start Year": 2023, "Country": ["UK", "USA"]})
+    assert first == second
+    assert first != ResultSetCache.cursor_for("adsets", {"Country": ["USA", "UK"], "Start Year": 2023})
+
+def test_main_endpoint_cursor_pagination(cursor_client, api_prefix):
+    body = {
+        "dataset_id": "campaigns",
+        "filter_options": {"Result Type": ["Likes", "Sales"]},
+        "pagination": {"page": 1, "size": 2, "use_cursor": True},
+    }
+    first = cursor_client.post(f"{api_prefix}/main", json=body)
+    assert first.status_code == 200
+    first_page = first.json()
+    assert [row["Campaign ID"] for row in first_page["items"]] == ["1", "2"]
+    assert first_page["total_rows"] == 5
+    assert first_page["total_pages"] == 3
+
+    pages = [first_page]
+    for page in (2, 3):
+        body["pagination"] = {"page": page, "size": 2, "cursor": first_page["cursor"]}
+        response = cursor_client.post(f"{api_prefix}/main", json=body)
+        assert response.status_code == 200
+        pages.append(response.json())
+
+    assert [row["Campaign ID"] for page in pages for row in page["items"]] == ["1", "2", "3", "5", "6"]
+    assert all(page["cursor"] == first_page["cursor"] for page in pages)
+    # Only the first page filtered the dataset
+    assert len(cursor_client.scans) == 1
+
+def test_main_endpoint_expired_cursor_is_rebuilt(cursor_client, api_prefix):
+    response = cursor_client.post(f"{api_prefix}/main", json={
+        "dataset_id": "campaigns",
+        "filter_options": {"Country": "USA"},
+        "pagination": {"page": 2, "size": 2, "cursor": "expired"},
+    })
+    assert response.status_code == 200
+    page = response.json()
+    assert page["cursor"] != "expired"
+    assert page["total_rows"] == 3
+    assert [row["Campaign ID"] for row in page["items"]] == ["5"]
+
+def test_main_endpoint_stale_cursor_with_other_filters(cursor_client, api_prefix):
+    body = {
+        "dataset_id": "campaigns",
+        "filter_options": {"Country": "USA"},
+        "pagination": {"page": 1, "size": 2, "use_cursor": True},
+    }
+    first = cursor_client.post(f"{api_prefix}/main", json=body).json()
+
+    # The cursor of the USA result set, sent with other filters
+    body["filter_options"] = {"Result Type": "Sales"}
+    body["pagination"] = {"page": 1, "size": 2, "cursor": first["cursor"]}
+    response = cursor_client.post(f"{api_prefix}/main", json=body)
+    assert response.status_code == 200
+    page = response.json()
+    assert page["cursor"] == ResultSetCache.cursor_for("campaigns", {"Result Type": "Sales"})
+    assert page["cursor"] != first["cursor"]
+    assert page["total_rows"] == 2
+    assert all(row["Result Type"] == "Sales" for row in page["items"])
+    assert len(cursor_client.scans) == 2
+
+def test_cursor_pagination_requires_dataset_id(cursor_client, api_prefix, campaigns_df):
+    response = cursor_client.post(f"{api_prefix}/main", json={
+        "data": campaigns_df.head(2).to_dict(orient='records'),
+        "filter_options": {},
+        "pagination": {"page": 1, "size": 2, "use_cursor": True},
+    })
+    assert response.status_code == 422
+
+def test_cursor_is_rebuilt_after_a_refresh(router_module, app_module, api_prefix, campaigns_df, monkeypatch):
+    etags = {"campaigns": '"v1"'}
+    frames = {'"v1"': campaigns_df, '"v2"': campaigns_df.iloc[::-1].reset_index(drop=True)}
+    registry = DatasetRegistry({"campaigns": lambda: frames[etags["campaigns"]]}, versions=etags.get)
+    monkeypatch.setattr(router_module, "dataset_registry", registry)
+    monkeypatch.setattr(router_module, "result_set_cache", ResultSetCache())
+    client = TestClient(app_module.app)
+
+    body = {"dataset_id": "campaigns", "filter_options": {"Country": "USA"}, "pagination": {"page": 1, "size": 2, "use_cursor": True}}
+    first = client.post(f"{api_prefix}/main", json=body).json()
+    assert [row["Campaign ID"] for row in first["items"]] == ["1", "3"]
+
+    # The new version has its rows in another order: the cached positions no longer apply
+    etags["campaigns"] = '"v2"'
+    registry.refresh("campaigns")
+    body["pagination"] = {"page": 1, "size": 2, "cursor": first["cursor"]}
+    response = client.post(f"{api_prefix}/main", json=body)
+    assert response.headers["X-Dataset-Version"] == '"v2"'
+    assert [row["Campaign ID"] for row in response.json()["items"]] == ["5", "3"]
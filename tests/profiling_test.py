@@ -0,0 +1,98 @@
+import marshal
+import pytest
+from fastapi.testclient import TestClient
+from app.routers import profiling
+from app.routers.execution import ExecutionBackend
+from app.routers.profiling import PROFILE_HEADER, PROFILE_ID_HEADER, ProfileStore, profile_store
+
+TOKEN = "secret"
+
+@pytest.fixture
+def client(app_module, monkeypatch):
+    profile_store.clear()
+    monkeypatch.setattr(profiling, "PROFILE_TOKEN", TOKEN)
+    client = TestClient(app_module.app)
+    client.headers["X-Profile-Token"] = TOKEN
+    return client
+
+def stats_body(campaigns_df):
+    return {"data": campaigns_df.to_dict(orient='records'), "filter_options": {"Country": "USA"}}
+
+def page_body(campaigns_df):
+    return {**stats_body(campaigns_df), "pagination": {"page": 1, "size": 2}}
+
+def test_header_profiles_the_request(client, api_prefix, campaigns_df):
+    response = client.post(f"{api_prefix}/get_descriptive_stats", json=stats_body(campaigns_df), headers={PROFILE_HEADER: TOKEN})
+    assert response.status_code == 200
+    profile_id = response.headers[PROFILE_ID_HEADER]
+
+    summaries = client.get(f"{api_prefix}/profiles").json()
+    assert [summary["id"] for summary in summaries] == [profile_id]
+    summary = summaries[0]
+    assert summary["endpoint"] == f"{api_prefix}/get_descriptive_stats" and summary["trigger"] == "header"
+    assert summary["status_code"] == 200 and summary["peak_memory"] > 0
+
+    # The stats computed on the execution backend are part of the profile
+    report = client.get(f"{api_prefix}/profiles/{profile_id}").text
+    assert "get_filtered_descriptive_stats" in report
+
+    download = client.get(f"{api_prefix}/profiles/{profile_id}/download")
+    assert download.headers["content-disposition"] == f'attachment; filename="{profile_id}.prof"'
+    stats = marshal.loads(download.content)
+    assert any(name == "get_filtered_descriptive_stats" for _, _, name in stats)
+
+def test_requests_are_not_profiled_by_default(client, api_prefix, campaigns_df):
+    response = client.post(f"{api_prefix}/get_descriptive_stats", json=stats_body(campaigns_df))
+    assert PROFILE_ID_HEADER not in response.headers
+    assert client.get(f"{api_prefix}/profiles").json() == []
+    assert client.get(f"{api_prefix}/profiles/unknown").status_code == 404
+
+def test_sampled_profiles_are_kept_above_the_threshold(client, api_prefix, campaigns_df, monkeypatch):
+    monkeypatch.setattr(profiling, "PROFILE_SAMPLE_RATE", 1.0)
+    monkeypatch.setattr(profiling, "PROFILE_THRESHOLD_SECONDS", 3600.0)
+    response = client.post(f"{api_prefix}/main", json=page_body(campaigns_df))
+    assert PROFILE_ID_HEADER not in response.headers
+
+    monkeypatch.setattr(profiling, "PROFILE_THRESHOLD_SECONDS", 0.0)
+    response = client.post(f"{api_prefix}/main", json=page_body(campaigns_df))
+    assert client.get(f"{api_prefix}/profiles").json()[0]["trigger"] == "sample"
+    assert client.get(f"{api_prefix}/profiles/{response.headers[PROFILE_ID_HEADER]}").status_code == 200
+
+def test_token_guards_the_header_and_the_endpoints(client, api_prefix, campaigns_df):
+    response = client.post(f"{api_prefix}/main", json=page_body(campaigns_df), headers={PROFILE_HEADER: "1"})
+    assert PROFILE_ID_HEADER not in response.headers
+    response = client.post(f"{api_prefix}/main", json=page_body(campaigns_df), headers={PROFILE_HEADER: TOKEN})
+    assert PROFILE_ID_HEADER in response.headers
+
+    assert client.get(f"{api_prefix}/profiles", headers={"X-Profile-Token": "wrong"}).status_code == 403
+    assert len(client.get(f"{api_prefix}/profiles").json()) == 1
+
+def test_profiling_on_demand_is_disabled_without_a_token(client, api_prefix, campaigns_df, monkeypatch):
+    monkeypatch.setattr(profiling, "PROFILE_TOKEN", "")
+    for value in ("1", "true", ""):
+        response = client.post(f"{api_prefix}/main", json=page_body(campaigns_df), headers={PROFILE_HEADER: value})
+        assert response.status_code == 200 and PROFILE_ID_HEADER not in response.headers
+    assert len(profile_store.list()) == 0
+
+    for path in ("/profiles", "/profiles/unknown", "/profiles/unknown/download"):
+        assert client.get(f"{api_prefix}{path}").status_code == 404
+
+def test_process_backend_sends_back_its_profile(router_module, campaigns_df):
+    backend = ExecutionBackend("process", workers=1, queue_limit=1, timeout=60)
+    session = profiling._Session()
+    token = profiling._session.set(session)
+    try:
+        stats = backend.run(router_module.get_descriptive_stats, campaigns_df)
+    finally:
+        profiling._session.reset(token)
+        backend.shutdown()
+    assert list(stats.columns) == list(router_module.get_descriptive_stats(campaigns_df).columns)
+    assert session.backend_peak_memory > 0
+    assert any(name == "get_descriptive_stats" for _, _, name in session.sources[0].stats)
+
+def test_store_keeps_the_last_profiles():
+    store = ProfileStore(maxsize=2)
+    for profile_id in "abc":
+        store.add(profiling.RequestProfile(profile_id, "/main", "POST", "header", "", 0.1, 200, 0, None, "", b""))
+    assert [profile.id for profile in store.list()] == ["c", "b"]
+    assert store.get("a") is None
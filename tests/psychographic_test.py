@@ -0,0 +1,47 @@
+import re
+import numpy as np
+import pandas as pd
+import pytest
+from app.routers.load_exp_data_utils import format_psychographic
+
+def legacy_format_psychographic(psychographic: pd.Series) -> pd.Series:
+    """The per-row formatting `load_adsets_df` used before `format_psychographic`."""
+    pattern = r'(\b[A-Z]+\b):[ \t]+(.*?)(?=[A-Z]+:|$)'
+
+    def format_text(text):
+        matches = re.findall(pattern, text, re.MULTILINE)
+        formatted_data = {label: items.split(",") for label, items in matches}
+
+        temp = []
+        for label, items in formatted_data.items():
+            temp.append(f"{label}:\n{', '.join(map(str.strip, items))}")
+
+        final_data = "\n".join(temp)
+        return final_data
+
+    return psychographic.str.replace('"', " ").str.replace(":,", ": ").apply(format_text)
+
+FRAGMENTS = [
+    'INTERESTS: "Travel", "Food"', 'BEHAVIORS: "Frequent travelers"', 'INTERESTS:, "Online shopping"',
+    'DEMOGRAPHICS: "Parents (All)",  "Newlyweds" ', 'WORK: ,"Engineer",', 'INTERESTS:\t"Cars"',
+    'no label here', 'lower: "ignored"', 'EMPTY: ', 'NOSPACE:"x"', '\n', ' ', 'ÉCOLE: "Café", "Thé"',
+    'INTERESTS: "Sports"\nBEHAVIORS: "Gamers"', 'A: "b" C: "d"', 'X:  ,  , ',
+]
+
+@pytest.mark.parametrize("seed", range(10))
+def test_format_psychographic_matches_per_row_formatting(seed):
+    rng = np.random.default_rng(seed)
+    texts = ["".join(rng.choice(FRAGMENTS, int(rng.integers(0, 5)))) for _ in range(60)]
+    psychographic = pd.Series(rng.choice(np.array(texts, dtype=object), 500), index=rng.permutation(500), name='Psychographic')
+
+    result = format_psychographic(psychographic)
+    pd.testing.assert_series_equal(result, legacy_format_psychographic(psychographic), check_exact=True)
+    assert all(isinstance(value, str) for value in result)
+
+def test_format_psychographic_missing_values():
+    psychographic = pd.Series([None, 'INTERESTS: "Travel"', np.nan, None])
+    result = format_psychographic(psychographic)
+    assert result[1] == "INTERESTS:\nTravel"
+    assert result[0] is None and result[3] is None and np.isnan(result[2])
+    assert format_psychographic(pd.Series([None, None], dtype=object)).isna().all()
+    assert format_psychographic(pd.Series([], dtype=object)).empty
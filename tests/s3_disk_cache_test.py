@@ -0,0 +1,71 @@
+import os
+from io import BytesIO
+import boto3
+import pandas as pd
+import pytest
+from moto import mock_aws
+from app.routers.load_exp_data_utils import ImportDataS3
+from app.routers.s3_disk_cache import S3DiskCache
+
+BUCKET = "roas-dashboard-test"
+
+@pytest.fixture
+def s3():
+    with mock_aws():
+        client = boto3.client("s3", region_name="us-east-1", aws_access_key_id="testing", aws_secret_access_key="testing")
+        client.create_bucket(Bucket=BUCKET)
+        yield client
+
+def put_parquet(client, key, df):
+    buffer = BytesIO()
+    df.to_parquet(buffer, index=False)
+    client.put_object(Bucket=BUCKET, Key=key, Body=buffer.getvalue())
+
+@pytest.fixture
+def storage(s3, tmp_path):
+    storage = ImportDataS3("testing", "testing", BUCKET, cache=S3DiskCache(str(tmp_path)))
+    storage.s3_client = s3
+    calls = []
+    s3.meta.events.register("after-call.s3.GetObject", lambda http_response, **kwargs: calls.append(http_response.status_code))
+    storage.get_object_statuses = calls
+    return storage
+
+def test_load_df_downloads_once_then_revalidates(s3, storage):
+    df = pd.DataFrame({"Campaign ID": ["1", "2"], "Amount Spent": [10.0, 20.0]})
+    put_parquet(s3, "campaign_final.parquet", df)
+
+    pd.testing.assert_frame_equal(storage.load_df("campaign_final.parquet"), df)
+    pd.testing.assert_frame_equal(storage.load_df("campaign_final.parquet"), df)
+    # Full (ranged) download, then a 304 served from disk
+    assert storage.get_object_statuses == [206, 304]
+
+def test_load_df_picks_up_a_new_version(s3, storage, tmp_path):
+    put_parquet(s3, "campaign_final.parquet", pd.DataFrame({"Campaign ID": ["1"]}))
+    storage.load_df("campaign_final.parquet")
+
+    updated = pd.DataFrame({"Campaign ID": ["1", "2", "3"]})
+    put_parquet(s3, "campaign_final.parquet", updated)
+    pd.testing.assert_frame_equal(storage.load_df("campaign_final.parquet"), updated)
+    assert storage.get_object_statuses == [206, 206]
+
+    # Only the current version stays on disk
+    [object_dir] = os.listdir(tmp_path)
+    assert len(os.listdir(tmp_path / object_dir)) == 2
+
+def test_cache_survives_a_new_process(s3, storage, tmp_path):
+    s3.put_object(Bucket=BUCKET, Key="roas_final.csv", Body=b"Campaign ID,Amount Spent\n1,10.5\n")
+    storage.load_df("roas_final.csv")
+
+    # A restarted container reuses the files written by the previous one
+    restarted = S3DiskCache(str(tmp_path))
+    etag = s3.head_object(Bucket=BUCKET, Key="roas_final.csv")["ETag"]
+    assert restarted.cached_etag(BUCKET, "roas_final.csv") == etag
+    path, cached_etag = restarted.fetch(s3, BUCKET, "roas_final.csv")
+    assert cached_etag == etag
+    assert pd.read_csv(path).equals(pd.DataFrame({"Campaign ID": [1], "Amount Spent": [10.5]}))
+    assert storage.get_object_statuses == [206, 304]
+
+def test_missing_object_is_not_cached(s3, storage, tmp_path):
+    with pytest.raises(Exception, match="Failed to load data from S3"):
+        storage.load_df("missing.parquet")
+    assert storage.cache.cached_etag(BUCKET, "missing.parquet") is None
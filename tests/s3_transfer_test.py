@@ -0,0 +1,67 @@
+import threading
+import boto3
+import pytest
+from botocore.exceptions import ClientError
+from moto import mock_aws
+from app.routers.data_layer import DataLayer
+from app.routers.dataset_registry import DatasetRegistry
+from app.routers.s3_transfer import download_bytes, download_object
+
+BUCKET = "roas-dashboard-test"
+PAYLOAD = bytes(range(256)) * 1000
+
+@pytest.fixture
+def s3():
+    with mock_aws():
+        client = boto3.client("s3", region_name="us-east-1", aws_access_key_id="testing", aws_secret_access_key="testing")
+        client.create_bucket(Bucket=BUCKET)
+        client.put_object(Bucket=BUCKET, Key="campaign_final.parquet", Body=PAYLOAD)
+        client.put_object(Bucket=BUCKET, Key="empty.csv", Body=b"")
+        yield client
+
+def test_download_object_in_parallel_parts(s3):
+    parts = {}
+    threads = set()
+
+    def write_at(offset, data):
+        parts[offset] = data
+        threads.add(threading.current_thread().name)
+
+    etag, size = download_object(s3, BUCKET, "campaign_final.parquet", write_at, part_size=10_000, max_concurrency=4)
+    assert size == len(PAYLOAD)
+    assert etag == s3.head_object(Bucket=BUCKET, Key="campaign_final.parquet")["ETag"]
+    assert sorted(parts) == list(range(0, len(PAYLOAD), 10_000))
+    assert b"".join(parts[offset] for offset in sorted(parts)) == PAYLOAD
+    assert len(threads) > 1
+
+def test_download_object_not_modified(s3):
+    etag = s3.head_object(Bucket=BUCKET, Key="campaign_final.parquet")["ETag"]
+    assert download_object(s3, BUCKET, "campaign_final.parquet", lambda offset, data: None, if_none_match=etag) is None
+
+def test_download_empty_object(s3):
+    assert download_bytes(s3, BUCKET, "empty.csv") == b""
+
+def test_download_fails_if_the_object_changes_midway(s3):
+    def write_at(offset, data):
+        if offset == 0:
+            s3.put_object(Bucket=BUCKET, Key="campaign_final.parquet", Body=PAYLOAD[::-1])
+
+    # The remaining parts are pinned to the first part's ETag
+    with pytest.raises(ClientError):
+        download_object(s3, BUCKET, "campaign_final.parquet", write_at, part_size=10_000)
+
+def test_datasets_load_concurrently(campaigns_df):
+    barrier = threading.Barrier(3, timeout=5)
+
+    def loader():
+        # Only returns once all three loads are running at the same time
+        barrier.wait()
+        return campaigns_df
+
+    loaders = {"campaigns": loader, "roas": loader, "adsets": loader}
+    DatasetRegistry(loaders).load_all(max_workers=3)
+
+    layer = DataLayer(DatasetRegistry(loaders), list(loaders), max_workers=3)
+    layer.start()
+    assert layer.wait(5)
+    assert layer.ready
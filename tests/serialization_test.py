@@ -0,0 +1,98 @@
+import json
+import numpy as np
+import orjson
+import pandas as pd
+import pytest
+from fastapi.testclient import TestClient
+from app.routers import serialization
+from app.routers.dataset_registry import DatasetRegistry
+from app.routers.load_exp_data_utils import CAMPAIGN_SCHEMA, apply_schema
+from app.routers.serialization import dumps, to_columnar, to_records
+
+@pytest.fixture
+def typed_campaigns_df(campaigns_df):
+    df = apply_schema(campaigns_df.copy(), CAMPAIGN_SCHEMA)
+    df.loc[1, 'Cost per Result'] = np.nan
+    return df
+
+@pytest.fixture
+def client(router_module, app_module, typed_campaigns_df, monkeypatch):
+    registry = DatasetRegistry({"campaigns": lambda: typed_campaigns_df}, versions=lambda dataset_id: '"v1"')
+    monkeypatch.setattr(router_module, "dataset_registry", registry)
+    return TestClient(app_module.app)
+
+def test_dumps_handles_missing_and_numpy_values():
+    content = {
+        "floats": [np.nan, np.inf, 1.5],
+        "array": np.array([1, 2, 3], dtype='int16'),
+        "strided": np.arange(6.0)[::2],
+        "scalar": np.float32(0.5),
+        "missing": [pd.NaT, pd.NA, None],
+        "date": pd.Timestamp("2023-03-01"),
+    }
+    assert orjson.loads(dumps(content)) == {
+        "floats": [None, None, 1.5],
+        "array": [1, 2, 3],
+        "strided": [0.0, 2.0, 4.0],
+        "scalar": 0.5,
+        "missing": [None, None, None],
+        "date": "2023-03-01T00:00:00",
+    }
+
+def test_columnar_holds_the_same_values_as_records(typed_campaigns_df):
+    records = orjson.loads(dumps(to_records(typed_campaigns_df)))
+    columnar = orjson.loads(dumps(to_columnar(typed_campaigns_df)))
+    assert list(columnar) == list(typed_campaigns_df.columns)
+    assert [dict(zip(columnar, row)) for row in zip(*columnar.values())] == records
+    assert records[1]['Cost per Result'] is None
+    assert records[5]['Client Industry'] is None
+
+def test_main_endpoint_columnar(client, api_prefix):
+    body = {"dataset_id": "campaigns", "filter_options": {"Country": "USA"}, "pagination": {"page": 1, "size": 2}}
+    records = client.post(f"{api_prefix}/main", json=body)
+    columnar = client.post(f"{api_prefix}/main", params={"format": "columnar"}, json=body)
+    assert columnar.status_code == 200
+    assert columnar.headers["X-Dataset-Version"] == '"v1"'
+    assert columnar.json()["Campaign ID"] == ["1", "3"]
+    assert [dict(zip(columnar.json(), row)) for row in zip(*columnar.json().values())] == records.json()
+    assert len(columnar.content) < len(records.content)
+
+    body["pagination"]["use_cursor"] = True
+    page = client.post(f"{api_prefix}/main", params={"format": "columnar"}, json=body).json()
+    assert page["items"]["Campaign ID"] == ["1", "3"]
+    assert (page["total_rows"], page["total_pages"]) == (3, 2)
+
+    assert client.post(f"{api_prefix}/main", params={"format": "xml"}, json=body).status_code == 422
+
+def test_descriptive_stats_columnar(client, api_prefix):
+    response = client.post(f"{api_prefix}/get_descriptive_stats", params={"format": "columnar"}, json={"dataset_id": "campaigns"})
+    assert response.status_code == 200
+    assert response.json()["Result Type"] == ["Likes", "Sales", "Comments"]
+    assert response.json()["No. of Campaigns"] == [3, 2, 1]
+
+def test_missing_costs_are_sent_as_null(client, api_prefix):
+    body = {"dataset_id": "campaigns", "filter_options": {}, "pagination": {"page": 1, "size": 10}}
+    response = client.post(f"{api_prefix}/main", json=body)
+    assert response.status_code == 200
+    assert json.loads(response.content)[1]["Cost per Result"] is None
+
+def test_response_validation_can_be_skipped(router_module, app_module, api_prefix, monkeypatch):
+    item = {
+        "Start_Date": "2023-03-01", "Stop_Date": "2023-03-31", "Client_Industry": "Tech",
+        "Facebook_Page_Category": "Business", "Ads_Objective": "Awareness", "Facebook_Page_Name": "TechPage",
+        "Amount_Spent": 100.0, "Impressions": 10000, "Reach": 8000, "Result_Type": "Likes", "Total_Results": 100,
+        "Cost_per_Result": 1.0, "Cost_per_Mile": 10.0, "Campaign_Name": "Spring", "Campaign_ID": 1.0,
+        "Account_ID": "act_1", "Company_Name": "Tech Co", "Country": "USA", "Start_Year": 2023, "Start_Month": "March",
+    }
+    client = TestClient(app_module.app)
+    body = {"data": [item], "filter_options": {}, "pagination": {"page": 1, "size": 10}}
+    validated = client.post(f"{api_prefix}/filter_dataframe", json=body)
+
+    monkeypatch.setattr(serialization, "VALIDATE_RESPONSES", False)
+    unvalidated = client.post(f"{api_prefix}/filter_dataframe", json=body)
+    assert validated.status_code == unvalidated.status_code == 200
+    assert validated.json() == unvalidated.json() == [item]
+
+    # Without validation, rows are sent as they are
+    body["data"][0]["Extra"] = "kept"
+    assert client.post(f"{api_prefix}/filter_dataframe", json=body).json()[0]["Extra"] == "kept"
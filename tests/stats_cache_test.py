@@ -0,0 +1,79 @@
+import pytest
+from fastapi.testclient import TestClient
+from app.routers.dataset_registry import DatasetRegistry
+from app.routers.stats_cache import StatsCache
+
+@pytest.fixture
+def versioned_registry(campaigns_df):
+    etags = {"campaigns": '"v1"'}
+    loads = []
+
+    def load_campaigns():
+        loads.append(etags["campaigns"])
+        return campaigns_df.copy()
+
+    # Without a stats cube, so every request reaches the cache
+    registry = DatasetRegistry({"campaigns": load_campaigns}, versions=etags.get, stats_cube_depth=0)
+    registry.etags = etags
+    registry.loads = loads
+    return registry
+
+@pytest.fixture
+def stats_client(router_module, app_module, versioned_registry, monkeypatch):
+    cache = StatsCache(maxsize=8, ttl=60)
+    versioned_registry.add_invalidation_listener(cache.invalidate_dataset)
+    monkeypatch.setattr(router_module, "dataset_registry", versioned_registry)
+    monkeypatch.setattr(router_module, "stats_cache", cache)
+    client = TestClient(app_module.app)
+    client.cache = cache
+    return client
+
+def test_stats_cache_key_is_canonical():
+    first = StatsCache.key_for("campaigns", '"v1"', {"Country": ["USA", "UK"], "Start Year": 2023})
+    assert first == StatsCache.key_for("campaigns", '"v1"', {"Start Year": 2023, "Country": ["UK", "USA", "UK"]})
+    assert first != StatsCache.key_for("campaigns", '"v2"', {"Start Year": 2023, "Country": ["UK", "USA"]})
+    assert first != StatsCache.key_for("campaigns", '"v1"', {"Start Year": 2022, "Country": ["UK", "USA"]})
+
+def test_stats_cache_is_size_bounded(campaigns_df):
+    cache = StatsCache(maxsize=2, ttl=60)
+    for year in (2021, 2022, 2023):
+        cache.get_or_compute("campaigns", None, {"Start Year": year}, lambda: campaigns_df)
+    assert cache.info() == {'hits': 0, 'misses': 3, 'size': 2, 'maxsize': 2}
+
+def test_descriptive_stats_endpoint_is_cached(stats_client, api_prefix, router_module, campaigns_df):
+    body = {"dataset_id": "campaigns", "filter_options": {"Country": ["USA", "Canada"]}}
+    first = stats_client.post(f"{api_prefix}/get_descriptive_stats", json=body)
+    second = stats_client.post(f"{api_prefix}/get_descriptive_stats", json={
+        "dataset_id": "campaigns", "filter_options": {"Country": ["Canada", "USA"]},
+    })
+    assert first.status_code == second.status_code == 200
+    assert first.json() == second.json()
+
+    expected = router_module.get_descriptive_stats(router_module.filter_dataframe(campaigns_df, body["filter_options"]))
+    assert first.json() == expected.to_dict(orient='records')
+
+    info = stats_client.get(f"{api_prefix}/get_descriptive_stats/cache").json()
+    assert (info['hits'], info['misses'], info['size']) == (1, 1, 1)
+
+def test_descriptive_stats_cache_invalidated_on_etag_change(stats_client, api_prefix, versioned_registry):
+    body = {"dataset_id": "campaigns", "filter_options": {}}
+    stats_client.post(f"{api_prefix}/get_descriptive_stats", json=body)
+    assert stats_client.cache.info()['size'] == 1
+
+    versioned_registry.etags["campaigns"] = '"v2"'
+    assert versioned_registry.refresh("campaigns")
+    response = stats_client.post(f"{api_prefix}/get_descriptive_stats", json=body)
+    assert response.status_code == 200
+    assert versioned_registry.loads == ['"v1"', '"v2"']
+    assert versioned_registry.version("campaigns") == '"v2"'
+    assert stats_client.cache.info()['misses'] == 2
+
+def test_descriptive_stats_endpoint_inline_data_with_filters(api_prefix, app_module, campaigns_df):
+    client = TestClient(app_module.app)
+    response = client.post(f"{api_prefix}/get_descriptive_stats", json={
+        "data": campaigns_df.where(campaigns_df.notna(), None).to_dict(orient='records'),
+        "filter_options": {"Result Type": "Likes"},
+    })
+    assert response.status_code == 200
+    assert [row['Result Type'] for row in response.json()] == ['Likes']
+    assert response.json()[0]['No. of Campaigns'] == 3
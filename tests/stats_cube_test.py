@@ -0,0 +1,65 @@
+import itertools
+import pandas as pd
+import pytest
+from fastapi.testclient import TestClient
+from app.routers.dataset_registry import DatasetRegistry
+from app.routers.stats_cube import CUBE_DIMENSIONS, StatsCube, build_stats_cube
+
+def live_stats(router_module, df, filter_options):
+    return router_module.get_descriptive_stats(router_module.filter_dataframe(df, filter_options))
+
+def all_filters(df, depth):
+    """Every combination of up to `depth` dimensions with one of their values."""
+    for size in range(depth + 1):
+        for dimensions in itertools.combinations(CUBE_DIMENSIONS, size):
+            values = [df[dimension].dropna().unique().tolist() for dimension in dimensions]
+            for combination in itertools.product(*values):
+                yield dict(zip(dimensions, combination))
+
+@pytest.mark.parametrize("categorical", [False, True])
+def test_stats_cube_matches_live_stats(router_module, campaigns_df, categorical):
+    df = campaigns_df
+    if categorical:
+        df = df.astype({column: 'category' for column in ['Client Industry', 'Country', 'Result Type']})
+    cube = StatsCube(df, depth=2)
+    for filter_options in all_filters(df, 2):
+        pd.testing.assert_frame_equal(cube.get(filter_options), live_stats(router_module, df, filter_options))
+
+def test_stats_cube_missing_result_types(router_module, campaigns_df):
+    df = campaigns_df.copy()
+    df.loc[[1, 4], 'Result Type'] = None
+    cube = StatsCube(df, depth=1)
+    for filter_options in [{}, {"Country": "USA"}, {"Ads Objective": "Conversion"}]:
+        pd.testing.assert_frame_equal(cube.get(filter_options), live_stats(router_module, df, filter_options))
+
+def test_stats_cube_falls_back_for_other_filters(router_module, campaigns_df):
+    cube = StatsCube(campaigns_df, depth=2)
+    assert cube.get({"Country": ["USA", "UK"]}) is None
+    assert cube.get({"Country": "USA", "Start Year": 2023, "Ads Objective": "Awareness"}) is None
+    assert cube.get({"Result Type": "Likes"}) is None
+    assert cube.get({"Country": "France"}) is None
+    assert cube.get({"Client Industry": None}) is None
+    assert cube.info()['misses'] == 5
+
+    # Known values no row combines
+    stats = cube.get({"Country": ["Canada"], "Start Year": 2022})
+    pd.testing.assert_frame_equal(stats, live_stats(router_module, campaigns_df, {"Country": ["Canada"], "Start Year": 2022}))
+    assert stats.empty and cube.info()['hits'] == 1
+
+def test_build_stats_cube_needs_its_columns(campaigns_df):
+    assert build_stats_cube(campaigns_df, depth=0) is None
+    assert build_stats_cube(campaigns_df.drop(columns=['Country']), depth=2) is None
+    assert build_stats_cube(campaigns_df, depth=2).info()['depth'] == 2
+
+def test_descriptive_stats_endpoint_uses_the_cube(router_module, app_module, api_prefix, campaigns_df, monkeypatch):
+    registry = DatasetRegistry({"campaigns": lambda: campaigns_df.copy()}, stats_cube_depth=2)
+    monkeypatch.setattr(router_module, "dataset_registry", registry)
+    client = TestClient(app_module.app)
+
+    for filter_options in [{"Country": "USA", "Start Year": 2023}, {"Country": ["USA", "UK"]}]:
+        response = client.post(f"{api_prefix}/get_descriptive_stats", json={"dataset_id": "campaigns", "filter_options": filter_options})
+        assert response.status_code == 200
+        assert response.json() == live_stats(router_module, campaigns_df, filter_options).to_dict(orient='records')
+
+    info = client.get(f"{api_prefix}/get_descriptive_stats/cube").json()
+    assert info['campaigns']['hits'] == 1 and info['campaigns']['misses'] == 1